@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Architectures module.
+
+This module contains the base class of model architectures and an
+in-process cache of their loaded models.
+"""
+from .base import ArchitectureBase
+from .cache import ModelCache
+
+
+__all__ = [
+    'ArchitectureBase',
+    'ModelCache',
+]
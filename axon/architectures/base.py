@@ -1,5 +1,90 @@
-from axon.process import Process
+# -*- coding: utf-8 -*-
+"""Architecture Module.
+
+This module defines the base class of model architectures.
+"""
+import shutil
+import tempfile
+
+from mlflow.artifacts import download_artifacts
+
+from axon.processes import Process
 
 
 class ArchitectureBase(Process):
-    pass
+    """Architecture base class.
+
+    An architecture builds models from weights logged to mlflow. Subclasses
+    implement :meth:`load`, which builds a model from a downloaded artifact.
+    Loaded models are usually shared through a
+    :class:`~axon.architectures.cache.ModelCache`, which keeps the
+    downloaded artifact while the model is cached, so :meth:`load` can
+    return models that read their weights lazily.
+
+    Examples
+    --------
+    .. code-block:: python
+        class LinearModel(ArchitectureBase):
+            name = 'Linear Model'
+
+            def load(self, path):
+                return np.load(path)
+
+            def run(self, model, features):
+                return features @ model
+
+        cache = ModelCache(max_bytes=2 ** 30)
+        architecture = LinearModel()
+        model = cache.load(architecture, run_id)
+    """
+
+    # Artifact of the weights within the runs that trained them
+    artifact_path = 'model'
+
+    fingerprint_ignore = Process.fingerprint_ignore + ('_cache_fingerprint',)
+
+    def load(self, path):
+        """Build a model from a downloaded weights artifact."""
+        message = '{} does not support loading models.'
+        raise NotImplementedError(message.format(type(self).__name__))
+
+    def artifact_uri(self, source):
+        """Get the artifact URI of a run id or a model registry URI."""
+        if ':/' in source:
+            return source
+        return 'runs:/{}/{}'.format(source, self.artifact_path)
+
+    def load_model(self, source, directory=None):
+        """Download and build the model of a run id or model URI.
+
+        Parameters
+        ----------
+        source : str
+            Id of the run that logged the weights, or an mlflow URI such as
+            ``models:/<name>/<version>``.
+        directory : str, optional
+            Directory to download the artifact to, owned by the caller. If
+            not given, the artifact is downloaded to a temporary directory
+            that is removed once the model is built, so :meth:`load` must
+            then read the weights fully into memory.
+        """
+        if directory is not None:
+            path = download_artifacts(
+                artifact_uri=self.artifact_uri(source), dst_path=directory)
+            return self.load(path)
+
+        directory = tempfile.mkdtemp()
+        try:
+            return self.load_model(source, directory=directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def cache_key(self, source):
+        """Get the key of the model of a source in model caches.
+
+        The fingerprint of the architecture is computed once, so its
+        parameters should not change after the first call.
+        """
+        if getattr(self, '_cache_fingerprint', None) is None:
+            self._cache_fingerprint = self.fingerprint()
+        return (self._cache_fingerprint, source)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Model Cache Module.
+
+This module keeps loaded models in memory so services that serve several
+models do not load them again on every request. Models are evicted in least
+recently used order once their total size exceeds a byte budget, and
+concurrent requests of a model that is being loaded wait for that single
+load instead of starting their own.
+"""
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import tempfile
+import threading
+import weakref
+
+from axon.data.cache import ByteLRUCache
+from axon.data.cache import sizeof
+
+
+_MISSING = object()
+
+
+class ModelCache:
+    """Thread-safe LRU cache of loaded models bounded by bytes.
+
+    Models are stored in a :class:`~axon.data.cache.ByteLRUCache`. The
+    artifacts downloaded by :meth:`load` are kept until their model is
+    garbage collected, so models may read their weights lazily, even after
+    they are evicted while another thread still uses them. Artifacts of
+    models that cannot be weakly referenced are kept until the cache is
+    closed.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Budget of the total size of cached models. Models larger than the
+        budget are returned but not cached.
+    size_of : callable, optional
+        Function that returns the bytes of a model. Defaults to
+        :func:`axon.data.cache.sizeof`.
+    preload_workers : int
+        Number of threads that load models in the background with
+        :meth:`preload`.
+
+    Examples
+    --------
+    .. code-block:: python
+        cache = ModelCache(max_bytes=4 * 2 ** 30)
+
+        def predict(run_id, features):
+            model = cache.load(architecture, run_id)
+            return architecture(model, features)
+
+        cache.preload(architecture, next_run_id)
+    """
+
+    def __init__(self, max_bytes, size_of=None, preload_workers=1):
+        """Create an empty model cache."""
+        if max_bytes <= 0:
+            message = 'The byte budget must be positive. (max_bytes={})'
+            raise ValueError(message.format(max_bytes))
+
+        self.max_bytes = max_bytes
+        self.size_of = size_of or sizeof
+        self.preload_workers = preload_workers
+
+        self._models = ByteLRUCache(max_bytes, size_function=self.size_of)
+        self._counts = {'misses': 0, 'waits': 0, 'loads': 0}
+        self._directories = []
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def nbytes(self):
+        """Total size of the cached models."""
+        return self._models.nbytes
+
+    @property
+    def stats(self):
+        """Counts of hits, misses, waits, loads and evictions."""
+        return {
+            'hits': self._models.stats.hits,
+            'evictions': self._models.stats.evictions,
+            **self._counts,
+        }
+
+    def __len__(self):
+        """Get the number of cached models."""
+        return len(self._models)
+
+    def __contains__(self, key):
+        """Check whether a model is cached."""
+        return key in self._models
+
+    def keys(self):
+        """Get the keys of cached models, least recently used first."""
+        return self._models.keys()
+
+    def get(self, key, loader):
+        """Get a cached model or load it once.
+
+        If another thread is loading the same key, this call waits for it
+        and returns its model. Errors of the load are raised to every
+        waiting thread and nothing is cached.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the model.
+        loader : callable
+            Function without arguments that loads the model.
+        """
+        owner = False
+        with self._lock:
+            future = self._loading.get(key)
+            if future is not None:
+                self._counts['waits'] += 1
+            elif key in self._models:
+                model = self._models.get(key, _MISSING)
+                if model is not _MISSING:
+                    return model
+
+            if future is None:
+                future = Future()
+                self._loading[key] = future
+                self._counts['misses'] += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            model = loader()
+        except BaseException as error:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            self._counts['loads'] += 1
+            self._models.put(key, model)
+        future.set_result(model)
+        return model
+
+    def _keep_artifacts(self, model, directory):
+        # Remove the artifacts of a model once nothing references it
+        try:
+            weakref.finalize(model, shutil.rmtree, directory, True)
+        except TypeError:
+            with self._lock:
+                self._directories.append(directory)
+
+    def load(self, architecture, source):
+        """Get the model of an architecture and a run id or model URI."""
+        key = architecture.cache_key(source)
+
+        def loader():
+            directory = tempfile.mkdtemp()
+            try:
+                model = architecture.load_model(source, directory=directory)
+            except BaseException:
+                shutil.rmtree(directory, ignore_errors=True)
+                raise
+
+            self._keep_artifacts(model, directory)
+            return model
+
+        return self.get(key, loader)
+
+    def preload(self, architecture, source):
+        """Load a model in the background if it is not cached.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of the model.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.preload_workers)
+        return self._executor.submit(self.load, architecture, source)
+
+    def evict(self, key):
+        """Remove a model from the cache, if cached."""
+        self._models.pop(key)
+
+    def clear(self):
+        """Remove all cached models."""
+        self._models.clear()
+
+    def close(self):
+        """Stop the preload threads.
+
+        Artifacts of models that cannot be weakly referenced are removed.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        with self._lock:
+            directories, self._directories = self._directories, []
+
+        for directory in directories:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -5,3 +5,31 @@ This module defines the basic building block of processing pipelines: data.
 Data objects have a definite data type and may have differents ways of loading
 and saving to external storages (database, filesystem, etc).
 """
+from .base import Data
+from .backends import FileSystemBackend
+from .backends import SQLiteBackend
+from .backends import StorageBackend
+from .database import ConnectionPool
+from .database import DatabaseBackend
+from .cache import ByteLRUCache
+from .cache import get_cache
+from .cache import set_cache_size
+from .serializers import Serializer
+from .serializers import get_serializer
+from .serializers import register
+
+
+__all__ = [
+    'Data',
+    'FileSystemBackend',
+    'SQLiteBackend',
+    'StorageBackend',
+    'ConnectionPool',
+    'DatabaseBackend',
+    'ByteLRUCache',
+    'get_cache',
+    'set_cache_size',
+    'Serializer',
+    'get_serializer',
+    'register',
+]
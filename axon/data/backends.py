@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Storage Backends Module.
+
+This module defines the storages that data values are loaded from and saved
+to. Every value is stored under a locator, a string key that is unique
+within the backend.
+"""
+from abc import ABC
+from abc import abstractmethod
+import os
+import sqlite3
+import threading
+
+from axon.data import serializers
+
+
+def serialize(value, datatype=None):
+    """Serialize a value to bytes in the format of its DataType."""
+    return serializers.dumps(value, datatype)
+
+
+def deserialize(payload, datatype=None):
+    """Load a value from bytes."""
+    return serializers.loads(payload, datatype)
+
+
+class StorageBackend(ABC):
+    """Storage backend base class.
+
+    Backends must be picklable, so data handles can be sent to other
+    processes, and should reopen any connection lazily.
+    """
+
+    @property
+    @abstractmethod
+    def uri(self):
+        """Unique identifier of the storage."""
+
+    @abstractmethod
+    def load(self, locator, datatype=None):
+        """Load the value stored under a locator."""
+
+    @abstractmethod
+    def save(self, locator, value, datatype=None):
+        """Store a value under a locator."""
+
+    @abstractmethod
+    def exists(self, locator):
+        """Check whether a value is stored under a locator."""
+
+    @abstractmethod
+    def delete(self, locator):
+        """Remove the value stored under a locator."""
+
+
+class FileSystemBackend(StorageBackend):
+    """Backend that stores every value in a file under a root directory."""
+
+    def __init__(self, root):
+        """Create a backend rooted at the given directory."""
+        self.root = os.path.abspath(root)
+
+    @property
+    def uri(self):
+        """Uri of the root directory."""
+        return 'file://{}'.format(self.root)
+
+    def path(self, locator):
+        """Get the file path of a locator."""
+        path = os.path.normpath(os.path.join(self.root, locator))
+        if os.path.commonpath([self.root, path]) != self.root:
+            message = 'Locator outside of the backend root. (locator={})'
+            raise ValueError(message.format(locator))
+
+        return path
+
+    def load(self, locator, datatype=None):
+        """Load the value stored in the file of a locator.
+
+        Arrays and dataframes are memory mapped instead of read.
+        """
+        return serializers.load(self.path(locator), datatype)
+
+    def save(self, locator, value, datatype=None):
+        """Write a value to the file of a locator."""
+        path = self.path(locator)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temporary = '{}.tmp'.format(path)
+        serializers.dump(value, temporary, datatype)
+        os.replace(temporary, path)
+
+    def exists(self, locator):
+        """Check whether the file of a locator exists."""
+        return os.path.exists(self.path(locator))
+
+    def delete(self, locator):
+        """Remove the file of a locator."""
+        os.remove(self.path(locator))
+
+
+class SQLiteBackend(StorageBackend):
+    """Backend that stores values as blobs in a sqlite table."""
+
+    def __init__(self, path, table='data'):
+        """Create a backend on a sqlite database file."""
+        if not table.isidentifier():
+            message = 'Invalid table name {!r}.'.format(table)
+            raise ValueError(message)
+
+        self.path = os.path.abspath(path)
+        self.table = table
+
+        self._local = threading.local()
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS {} ('
+                'locator TEXT PRIMARY KEY, payload BLOB NOT NULL)'.format(
+                    table))
+
+    @property
+    def uri(self):
+        """Uri of the database table."""
+        return 'sqlite://{}#{}'.format(self.path, self.table)
+
+    @property
+    def connection(self):
+        """Connection to the database of the current thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            self._local.connection = connection
+
+        return connection
+
+    def __getstate__(self):
+        """Drop connections when pickling, they are reopened lazily."""
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled backend."""
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def load(self, locator, datatype=None):
+        """Load the value stored under a locator."""
+        row = self.connection.execute(
+            'SELECT payload FROM {} WHERE locator = ?'.format(self.table),
+            (locator,)).fetchone()
+
+        if row is None:
+            message = 'No value stored under locator {}. (uri={})'
+            raise KeyError(message.format(locator, self.uri))
+
+        return deserialize(row[0], datatype)
+
+    def save(self, locator, value, datatype=None):
+        """Store a value under a locator."""
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO {} VALUES (?, ?)'.format(self.table),
+                (locator, serialize(value, datatype)))
+
+    def exists(self, locator):
+        """Check whether a value is stored under a locator."""
+        row = self.connection.execute(
+            'SELECT 1 FROM {} WHERE locator = ?'.format(self.table),
+            (locator,)).fetchone()
+        return row is not None
+
+    def delete(self, locator):
+        """Remove the value stored under a locator."""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM {} WHERE locator = ?'.format(self.table),
+                (locator,))
@@ -3,3 +3,205 @@
 
 This module defines what an atomic Data object is.
 """
+import collections
+
+from axon.data.cache import get_cache
+
+
+class _Unset:
+    """Marker of a value that has not been loaded."""
+
+    def __reduce__(self):
+        return '_UNSET'
+
+
+_UNSET = _Unset()
+
+
+class Data:
+    """Data object.
+
+    A data object holds a DataType, the locator of its value in a storage
+    backend and, once it has been touched, the value itself. Values are
+    loaded lazily on first access and kept in the process wide data cache
+    (see :func:`axon.data.cache.get_cache`), so data objects are cheap
+    handles that can be passed around and only pay for I/O when their value
+    is needed. Pickled data objects do not include their value.
+
+    Examples
+    --------
+    .. code-block:: python
+        backend = FileSystemBackend('/data/spectrograms')
+        spec = Data(NumpyArray(Float(), (513, 400)), 'site-x/0001.npy',
+                    backend=backend)
+
+        spec.loaded   # False, nothing has been read
+        spec.value    # read from disk, or from the cache
+    """
+
+    def __init__(
+            self,
+            datatype=None,
+            locator=None,
+            backend=None,
+            value=_UNSET,
+            cache=None,
+            validate=False):
+        """Create a data object."""
+        if value is _UNSET and (locator is None or backend is None):
+            message = 'Data needs either a value or a locator and a backend.'
+            raise ValueError(message)
+
+        self.datatype = datatype
+        self.locator = locator
+        self.backend = backend
+        self.validate = validate
+
+        self._cache = cache
+        self._value = _UNSET
+        self._dirty = False
+
+        if value is not _UNSET:
+            self._set(value)
+
+    @classmethod
+    def from_value(cls, value, datatype=None, **kwargs):
+        """Create a data object that holds a value in memory."""
+        return cls(datatype=datatype, value=value, **kwargs)
+
+    @classmethod
+    def prefetch(cls, data_objects):
+        """Load the values of many data objects with as few reads as possible.
+
+        Values that are not loaded yet are put in the cache of their data
+        object. Backends with a ``load_many`` method load all values of a
+        group in bulk, so the cost of a read is shared by many values.
+        """
+        groups = collections.OrderedDict()
+        for data in data_objects:
+            if not data.loaded:
+                groups.setdefault(data.backend.uri, []).append(data)
+
+        for group in groups.values():
+            backend = group[0].backend
+            if not hasattr(backend, 'load_many'):
+                for data in group:
+                    data.value  # pylint: disable=pointless-statement
+                continue
+
+            values = backend.load_many(
+                [data.locator for data in group], group[0].datatype)
+            for data in group:
+                if data.locator in values:
+                    value = values[data.locator]
+                    data._check(value)  # pylint: disable=protected-access
+                    data.cache.put(data.key, value)
+
+    @property
+    def cache(self):
+        """The cache of loaded values."""
+        if self._cache is None:
+            return get_cache()
+
+        return self._cache
+
+    @property
+    def key(self):
+        """The key of the value in the cache, if it is stored."""
+        if self.backend is None or self.locator is None:
+            return None
+
+        return (self.backend.uri, self.locator)
+
+    @property
+    def loaded(self):
+        """Whether the value is held in memory or in the cache."""
+        if self._value is not _UNSET:
+            return True
+
+        return self.key is not None and self.key in self.cache
+
+    @property
+    def dirty(self):
+        """Whether the value has changes that are not saved."""
+        return self._dirty
+
+    @property
+    def value(self):
+        """The value, loaded from the backend on first access."""
+        if self._value is not _UNSET:
+            return self._value
+
+        value = self.cache.get(self.key, _UNSET)
+        if value is _UNSET:
+            value = self.backend.load(self.locator, self.datatype)
+            self._check(value)
+            self.cache.put(self.key, value)
+
+        return value
+
+    def _check(self, value):
+        if not self.validate or self.datatype is None:
+            return
+
+        if not self.datatype.validate(value):
+            message = 'Value is not of the expected DataType. (dtype={})'
+            raise ValueError(message.format(repr(self.datatype)))
+
+    def _set(self, value):
+        self._check(value)
+        self._value = value
+        self._dirty = True
+
+    def set(self, value):
+        """Replace the value. It is not saved until :meth:`save` is called."""
+        self._set(value)
+
+    def save(self, locator=None, backend=None):
+        """Write the value to the backend.
+
+        After saving, the value is released from the data object and kept
+        only in the cache, so it can be evicted when memory is needed.
+        """
+        if locator is not None:
+            self.locator = locator
+
+        if backend is not None:
+            self.backend = backend
+
+        if self.locator is None or self.backend is None:
+            message = 'A locator and a backend are needed to save data.'
+            raise ValueError(message)
+
+        value = self.value
+        self.backend.save(self.locator, value, self.datatype)
+        self.cache.put(self.key, value)
+        self._value = _UNSET
+        self._dirty = False
+
+    def unload(self):
+        """Drop the value from memory and from the cache.
+
+        Unsaved changes are discarded, and the value is loaded again from
+        the backend on the next access.
+        """
+        if self.backend is None or self.locator is None:
+            message = 'Only data stored in a backend can be unloaded.'
+            raise ValueError(message)
+
+        self._value = _UNSET
+        self._dirty = False
+        self.cache.pop(self.key)
+
+    def __getstate__(self):
+        """Drop the value when pickling data whose value is saved."""
+        state = self.__dict__.copy()
+        if not self._dirty:
+            state['_value'] = _UNSET
+        state['_cache'] = None
+        return state
+
+    def __repr__(self):
+        """Get full representation."""
+        return 'Data(datatype={!r}, locator={!r}, loaded={})'.format(
+            self.datatype, self.locator, self.loaded)
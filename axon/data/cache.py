@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Data Cache Module.
+
+This module defines the in-memory cache of loaded data values. The cache is
+bounded by the total size in bytes of the values it holds, not by their
+number, and evicts the least recently used values first. A single cache is
+shared by all Data objects of the process.
+"""
+import collections
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def sizeof(value):
+    """Estimate the memory used by a value in bytes.
+
+    Numpy arrays count their buffer and dataframes their deep memory usage.
+    Objects can report their own size with an integer ``nbytes`` attribute.
+    Containers count their entries and other objects their attributes,
+    recursively. Objects shared within the value are counted once.
+    """
+    seen = set()
+    stack = [value]
+    total = 0
+
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+            continue
+
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            usage = value.memory_usage(deep=True)
+            total += (
+                int(usage.sum()) if isinstance(usage, pd.Series) else usage)
+            continue
+
+        nbytes = getattr(value, 'nbytes', None)
+        if isinstance(nbytes, int):
+            total += nbytes
+            continue
+
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif hasattr(value, '__dict__') and not isinstance(value, type):
+            stack.append(vars(value))
+
+    return total
+
+
+class CacheStats:
+    """Data cache statistics."""
+
+    def __init__(self):
+        """Create empty statistics."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def to_dict(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class ByteLRUCache:
+    """Thread safe least recently used cache bounded by size in bytes.
+
+    Values larger than the cache are never stored. If on_remove is given it
+    is called with the key and value of every entry that leaves the cache,
+    outside of the cache lock.
+    """
+
+    def __init__(
+            self,
+            max_bytes=DEFAULT_MAX_BYTES,
+            size_function=sizeof,
+            on_remove=None):
+        """Create an empty cache."""
+        self.max_bytes = max_bytes
+        self.size_function = size_function
+        self.on_remove = on_remove
+        self.nbytes = 0
+        self.stats = CacheStats()
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached values."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Check whether a key is cached."""
+        return key in self._entries
+
+    def keys(self):
+        """Get the cached keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key, default=None):
+        """Get a cached value and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self.stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        """Cache a value, evicting least recently used values if needed.
+
+        Returns
+        -------
+        bool
+            Whether the value was cached.
+        """
+        size = self.size_function(value)
+
+        with self._lock:
+            removed = self._remove(key)
+            if size > self.max_bytes:
+                cached = False
+            else:
+                self._entries[key] = (value, size)
+                self.nbytes += size
+                removed += self._evict()
+                cached = True
+
+        self._notify(removed)
+        return cached
+
+    def pop(self, key):
+        """Remove a value from the cache."""
+        with self._lock:
+            removed = self._remove(key)
+        self._notify(removed)
+
+    def clear(self):
+        """Remove all values from the cache."""
+        with self._lock:
+            removed = [
+                (key, value) for key, (value, _) in self._entries.items()]
+            self._entries.clear()
+            self.nbytes = 0
+        self._notify(removed)
+
+    def resize(self, max_bytes):
+        """Change the size limit of the cache."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            removed = self._evict()
+        self._notify(removed)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return []
+
+        self.nbytes -= entry[1]
+        return [(key, entry[0])]
+
+    def _evict(self):
+        removed = []
+        while self.nbytes > self.max_bytes:
+            key, (value, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.stats.evictions += 1
+            removed.append((key, value))
+        return removed
+
+    def _notify(self, removed):
+        if self.on_remove is None:
+            return
+
+        for key, value in removed:
+            self.on_remove(key, value)
+
+
+_CACHE = ByteLRUCache()
+
+
+def get_cache():
+    """Get the process wide data cache."""
+    return _CACHE
+
+
+def set_cache_size(max_bytes):
+    """Set the size limit in bytes of the process wide data cache."""
+    _CACHE.resize(max_bytes)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Database Module.
+
+This module defines a pool of database connections and a storage backend
+that keeps values as rows of a relational table. Rows are fetched in bulk
+with batched ``IN (...)`` queries, so the cost of a query is shared by many
+values (see :meth:`axon.data.Data.prefetch`).
+
+Any DB-API 2.0 driver can be used. sqlite is used for local databases.
+"""
+import contextlib
+import functools
+import os
+import queue
+import re
+import sqlite3
+import threading
+
+from axon.data.backends import StorageBackend
+
+
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Number of keys per IN (...) query, below the sqlite parameter limit
+MAX_PARAMETERS = 500
+
+
+def quote(name):
+    """Quote a table or column name for use in a query."""
+    if not IDENTIFIER_PATTERN.match(name):
+        message = 'Invalid identifier {!r}.'.format(name)
+        raise ValueError(message)
+
+    return '"{}"'.format(name)
+
+
+def chunked(values, size):
+    """Split a sequence into lists of at most size values."""
+    for start in range(0, len(values), size):
+        yield list(values[start:start + size])
+
+
+def execute(connection, query, parameters=()):
+    """Run a query on a connection and return its cursor."""
+    cursor = connection.cursor()
+    cursor.execute(query, parameters)
+    return cursor
+
+
+def fetch_rows(cursor, size=None):
+    """Fetch rows of a cursor as dictionaries of column values."""
+    names = [column[0] for column in cursor.description]
+    rows = cursor.fetchall() if size is None else cursor.fetchmany(size)
+    return [dict(zip(names, row)) for row in rows]
+
+
+class ConnectionPool:
+    """Thread safe pool of database connections.
+
+    Connections are opened lazily, up to size connections, and reused
+    afterwards. Pools can be pickled, their connections are reopened in the
+    new process.
+
+    Parameters
+    ----------
+    connect : callable
+        Function that opens a new connection. Must be picklable to pickle
+        the pool.
+    uri : str
+        Unique identifier of the database.
+    size : int
+        Maximum number of open connections.
+    timeout : float, optional
+        Seconds to wait for a free connection. Waits forever by default.
+    placeholder : str
+        Query parameter placeholder of the driver.
+    """
+
+    def __init__(self, connect, uri, size=4, timeout=None, placeholder='?'):
+        """Create an empty pool."""
+        if size < 1:
+            message = 'Pool size should be positive. (size={})'
+            raise ValueError(message.format(size))
+
+        self.connect = connect
+        self.uri = uri
+        self.size = size
+        self.timeout = timeout
+        self.placeholder = placeholder
+        self._reset()
+
+    @classmethod
+    def sqlite(cls, path, size=4, **kwargs):
+        """Create a pool of connections to a sqlite database file."""
+        path = os.path.abspath(path)
+        connect = functools.partial(
+            sqlite3.connect, path, check_same_thread=False)
+        return cls(connect, 'sqlite://{}'.format(path), size=size, **kwargs)
+
+    def _reset(self):
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            message = 'No free connection after {} seconds. (uri={})'
+            raise TimeoutError(message.format(self.timeout, self.uri))
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            connection = self.connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection of the pool.
+
+        Changes are committed when the block exits and rolled back if it
+        raises.
+        """
+        connection = self._acquire()
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            connection.commit()
+        finally:
+            self._idle.put(connection)
+            self._slots.release()
+
+    def placeholders(self, count):
+        """Get the placeholders of count query parameters."""
+        return ', '.join([self.placeholder] * count)
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+
+    def __getstate__(self):
+        """Drop connections when pickling."""
+        state = self.__dict__.copy()
+        for name in ('opened', '_idle', '_slots', '_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled pool."""
+        self.__dict__.update(state)
+        self._reset()
+
+
+class DatabaseBackend(StorageBackend):
+    """Backend that stores every value as a row of a database table.
+
+    Values are dictionaries of column values and locators are the values
+    of the key column. The table must already exist.
+
+    Parameters
+    ----------
+    pool : ConnectionPool
+        Pool of connections to the database.
+    table : str
+        Name of the table.
+    key : str
+        Name of the unique key column.
+    columns : list of str, optional
+        Columns to load. All columns are loaded by default.
+    """
+
+    def __init__(self, pool, table, key='id', columns=None):
+        """Create a backend on a database table."""
+        self.pool = pool
+        self.table = table
+        self.key = key
+        self.columns = columns
+
+        self._table = quote(table)
+        self._key = quote(key)
+        if columns is None:
+            self._columns = '*'
+        else:
+            self._columns = ', '.join(quote(column) for column in columns)
+
+    @property
+    def uri(self):
+        """Uri of the database table."""
+        return '{}#{}'.format(self.pool.uri, self.table)
+
+    def load(self, locator, datatype=None):
+        """Load the row of a key."""
+        values = self.load_many([locator], datatype)
+        if locator not in values:
+            message = 'No value stored under locator {}. (uri={})'
+            raise KeyError(message.format(locator, self.uri))
+
+        return values[locator]
+
+    def load_many(self, locators, datatype=None):
+        """Load the rows of many keys with batched queries.
+
+        Returns a dictionary from key to row. Missing keys are left out.
+        """
+        # pylint: disable=unused-argument
+        locators = list(dict.fromkeys(locators))
+        values = {}
+
+        with self.pool.connection() as connection:
+            for batch in chunked(locators, MAX_PARAMETERS):
+                cursor = execute(
+                    connection,
+                    'SELECT {}, {} AS _key FROM {} WHERE {} IN ({})'.format(
+                        self._columns,
+                        self._key,
+                        self._table,
+                        self._key,
+                        self.pool.placeholders(len(batch))),
+                    batch)
+
+                for row in fetch_rows(cursor):
+                    values[row.pop('_key')] = row
+
+        return values
+
+    def save(self, locator, value, datatype=None):
+        """Replace the row of a key with a dictionary of column values."""
+        row = dict(value)
+        row[self.key] = locator
+        columns = ', '.join(quote(column) for column in row)
+
+        with self.pool.connection() as connection:
+            execute(
+                connection,
+                'DELETE FROM {} WHERE {} = {}'.format(
+                    self._table, self._key, self.pool.placeholder),
+                (locator,))
+            execute(
+                connection,
+                'INSERT INTO {} ({}) VALUES ({})'.format(
+                    self._table,
+                    columns,
+                    self.pool.placeholders(len(row))),
+                list(row.values()))
+
+    def exists(self, locator):
+        """Check whether a row has the key."""
+        with self.pool.connection() as connection:
+            cursor = execute(
+                connection,
+                'SELECT 1 FROM {} WHERE {} = {}'.format(
+                    self._table, self._key, self.pool.placeholder),
+                (locator,))
+            return cursor.fetchone() is not None
+
+    def delete(self, locator):
+        """Remove the row of a key."""
+        with self.pool.connection() as connection:
+            execute(
+                connection,
+                'DELETE FROM {} WHERE {} = {}'.format(
+                    self._table, self._key, self.pool.placeholder),
+                (locator,))
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""Serializers Module.
+
+This module defines a registry of serializers keyed by DataType. Every
+DataType is stored in the format that loads it fastest:
+
+* :class:`NumpyArray` values are stored as raw ``.npy`` files, which are
+  loaded as memory maps (or as read-only views of an in-memory payload)
+  without parsing or copying their data.
+* :class:`DataFrame` values are stored as Feather (Arrow IPC) files, which
+  are read through memory maps, if pyarrow is installed.
+* :class:`Dict`, :class:`Tuple` and :class:`List` values made only of
+  primitives are stored with msgpack, if it is installed.
+
+Any other value is pickled. Formats are recognized from the first bytes of
+a payload, so stored values can be loaded without knowing their DataType.
+"""
+from abc import ABC
+from abc import abstractmethod
+import io
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import axon.datatypes as dt
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+PRIMITIVES = (bool, int, float, str, bytes, type(None))
+
+_ANY = object()
+
+
+class Serializer(ABC):
+    """Serializer base class.
+
+    Serializers convert values to bytes and back. Serializers that can read
+    a file without loading it fully should rewrite :meth:`load`.
+    """
+
+    name = None
+    magic = None
+
+    @abstractmethod
+    def dumps(self, value, datatype=None):
+        """Serialize a value to bytes."""
+
+    @abstractmethod
+    def loads(self, payload, datatype=None):
+        """Load a value from bytes."""
+
+    def accepts(self, value, datatype=None):
+        """Check whether the serializer can store a value."""
+        # pylint: disable=unused-argument
+        return True
+
+    def dump(self, value, path, datatype=None):
+        """Write a value to a file."""
+        with open(path, 'wb') as fileobj:
+            fileobj.write(self.dumps(value, datatype))
+
+    def load(self, path, datatype=None):
+        """Load a value from a file."""
+        with open(path, 'rb') as fileobj:
+            return self.loads(fileobj.read(), datatype)
+
+
+# Readers of the latin-1 headers of the .npy format versions
+NPY_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+
+class NpySerializer(Serializer):
+    """Raw ``.npy`` serializer of numpy arrays."""
+
+    name = 'npy'
+    magic = b'\x93NUMPY'
+
+    def accepts(self, value, datatype=None):
+        """Check whether the value is a non object numpy array."""
+        return isinstance(value, np.ndarray) and value.dtype != np.object_
+
+    def dumps(self, value, datatype=None):
+        """Serialize an array in the ``.npy`` format."""
+        buffer = io.BytesIO()
+        np.save(buffer, value, allow_pickle=False)
+        return buffer.getvalue()
+
+    def loads(self, payload, datatype=None):
+        """Get a read-only view of the array stored in a payload."""
+        buffer = io.BytesIO(payload)
+        version = np.lib.format.read_magic(buffer)
+        if version not in NPY_HEADER_READERS:
+            # Other versions, such as 3.0 with UTF-8 headers, are parsed by
+            # numpy
+            array = np.load(io.BytesIO(payload), allow_pickle=False)
+            array.flags.writeable = False
+            return array
+
+        shape, fortran_order, dtype = NPY_HEADER_READERS[version](buffer)
+
+        array = np.frombuffer(
+            payload,
+            dtype=dtype,
+            count=int(np.prod(shape)),
+            offset=buffer.tell())
+        order = 'F' if fortran_order else 'C'
+        return array.reshape(shape, order=order)
+
+    def dump(self, value, path, datatype=None):
+        """Write an array to a ``.npy`` file."""
+        with open(path, 'wb') as fileobj:
+            np.save(fileobj, value, allow_pickle=False)
+
+    def load(self, path, datatype=None):
+        """Open a ``.npy`` file as a read-only memory map."""
+        return np.load(path, mmap_mode='r')
+
+
+def import_feather():
+    """Import the feather module of pyarrow, or return None if missing."""
+    try:
+        from pyarrow import feather  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: no cover
+        return None
+
+    return feather
+
+
+class FeatherSerializer(Serializer):
+    """Feather (Arrow IPC) serializer of dataframes.
+
+    pyarrow is only imported when the serializer is first used.
+    """
+
+    name = 'feather'
+    magic = b'ARROW1'
+
+    @property
+    def feather(self):
+        """The feather module of pyarrow."""
+        feather = import_feather()
+        if feather is None:
+            message = 'pyarrow is needed to read and write Feather files.'
+            raise ImportError(message)
+
+        return feather
+
+    def accepts(self, value, datatype=None):
+        """Check whether pyarrow is installed and the value is a dataframe."""
+        if not isinstance(value, pd.DataFrame):
+            return False
+
+        return import_feather() is not None
+
+    def dumps(self, value, datatype=None):
+        """Serialize a dataframe in the Feather format."""
+        buffer = io.BytesIO()
+        self.feather.write_feather(
+            value, buffer, compression='uncompressed')
+        return buffer.getvalue()
+
+    def loads(self, payload, datatype=None):
+        """Load a dataframe from a Feather payload."""
+        return self.feather.read_feather(io.BytesIO(payload))
+
+    def dump(self, value, path, datatype=None):
+        """Write a dataframe to a Feather file."""
+        self.feather.write_feather(value, path, compression='uncompressed')
+
+    def load(self, path, datatype=None):
+        """Read a Feather file through a memory map."""
+        return self.feather.read_feather(path, memory_map=True)
+
+
+class ParquetSerializer(Serializer):
+    """Parquet serializer of dataframes.
+
+    Parquet files are compressed, so they are smaller than Feather files
+    but slower to load. Not used by default.
+    """
+
+    name = 'parquet'
+    magic = b'PAR1'
+
+    def accepts(self, value, datatype=None):
+        """Check whether the value is a dataframe."""
+        return isinstance(value, pd.DataFrame)
+
+    def dumps(self, value, datatype=None):
+        """Serialize a dataframe in the Parquet format."""
+        buffer = io.BytesIO()
+        value.to_parquet(buffer)
+        return buffer.getvalue()
+
+    def loads(self, payload, datatype=None):
+        """Load a dataframe from a Parquet payload."""
+        return pd.read_parquet(io.BytesIO(payload))
+
+    def load(self, path, datatype=None):
+        """Read a Parquet file through a memory map."""
+        return pd.read_parquet(path, memory_map=True)
+
+
+def is_primitive(value, tuples=True):
+    """Check whether a value is made only of primitives."""
+    if isinstance(value, PRIMITIVES):
+        return True
+
+    containers = (list, tuple) if tuples else list
+    if isinstance(value, containers):
+        return all(is_primitive(item, tuples) for item in value)
+
+    if isinstance(value, dict):
+        return all(
+            isinstance(key, (str, int)) and is_primitive(item, tuples)
+            for key, item in value.items())
+
+    return False
+
+
+def restore_containers(value, datatype):
+    """Convert msgpack lists back into the tuples of a DataType."""
+    if isinstance(datatype, dt.Tuple):
+        return tuple(
+            restore_containers(item, item_type)
+            for item, item_type in zip(value, datatype))
+
+    if isinstance(datatype, dt.List):
+        return [
+            restore_containers(item, datatype.list_item_type)
+            for item in value]
+
+    if isinstance(datatype, dt.Dict):
+        return {
+            key: restore_containers(item, datatype.get(key))
+            for key, item in value.items()}
+
+    return value
+
+
+class MsgpackSerializer(Serializer):
+    """Msgpack serializer of containers of primitives.
+
+    Msgpack has no tuples, so tuples are restored from the DataType when
+    loading. Values with tuples and no DataType are left to pickle.
+    """
+
+    name = 'msgpack'
+    # Msgpack payloads have no magic bytes, so they are prefixed with a
+    # one byte extension value
+    magic = b'\xd4\x7fA'
+
+    def accepts(self, value, datatype=None):
+        """Check whether msgpack is installed and the value is primitive."""
+        if msgpack is None:
+            return False
+
+        return is_primitive(value, tuples=datatype is not None)
+
+    def dumps(self, value, datatype=None):
+        """Serialize a container of primitives with msgpack."""
+        return self.magic + msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, payload, datatype=None):
+        """Load a container of primitives from a msgpack payload."""
+        value = msgpack.unpackb(
+            payload[len(self.magic):],
+            raw=False,
+            strict_map_key=False)
+        return restore_containers(value, datatype)
+
+
+class PickleSerializer(Serializer):
+    """Pickle serializer, the fallback for any value."""
+
+    name = 'pickle'
+    magic = b'\x80'
+
+    def dumps(self, value, datatype=None):
+        """Pickle a value."""
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, payload, datatype=None):
+        """Unpickle a value."""
+        return pickle.loads(payload)
+
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer in [
+        NpySerializer(),
+        FeatherSerializer(),
+        ParquetSerializer(),
+        MsgpackSerializer(),
+        PickleSerializer(),
+    ]
+}
+
+# Serializers to try for every DataType class, in order
+REGISTRY = {
+    dt.NumpyArray: ['npy'],
+    dt.DataFrame: ['feather'],
+    dt.Dict: ['msgpack'],
+    dt.Tuple: ['msgpack'],
+    dt.List: ['msgpack'],
+}
+
+# Serializers to try for values of unknown DataType, in order
+DEFAULT_SERIALIZERS = ['npy', 'feather', 'msgpack']
+
+
+def register(datatype_class, name, serializer=None):
+    """Register the serializer to use for a DataType class.
+
+    Registered serializers are tried before the ones already registered for
+    the DataType class.
+    """
+    if serializer is not None:
+        SERIALIZERS[name] = serializer
+
+    if name not in SERIALIZERS:
+        message = 'Unknown serializer {}.'.format(name)
+        raise ValueError(message)
+
+    REGISTRY.setdefault(datatype_class, [])
+    REGISTRY[datatype_class].insert(0, name)
+
+
+def get_serializer(datatype=None, value=_ANY):
+    """Get the serializer to store a value of a DataType.
+
+    The pickle serializer is returned if no registered serializer accepts
+    the value.
+    """
+    if datatype is not None:
+        names = []
+        for datatype_class in type(datatype).__mro__:
+            names.extend(REGISTRY.get(datatype_class, []))
+    else:
+        names = DEFAULT_SERIALIZERS
+
+    for name in names:
+        serializer = SERIALIZERS[name]
+        if value is _ANY or serializer.accepts(value, datatype):
+            return serializer
+
+    return SERIALIZERS['pickle']
+
+
+def detect_serializer(header):
+    """Get the serializer of a payload from its first bytes.
+
+    Serializers without magic bytes can not be detected and are skipped.
+    """
+    for serializer in SERIALIZERS.values():
+        if serializer.magic is None:
+            continue
+
+        if header.startswith(serializer.magic):
+            return serializer
+
+    message = 'Unknown payload format. (header={!r})'
+    raise ValueError(message.format(header[:8]))
+
+
+def dumps(value, datatype=None):
+    """Serialize a value with the serializer of its DataType."""
+    return get_serializer(datatype, value).dumps(value, datatype)
+
+
+def loads(payload, datatype=None):
+    """Load a value from a payload of any registered format."""
+    return detect_serializer(payload[:8]).loads(payload, datatype)
+
+
+def dump(value, path, datatype=None):
+    """Write a value to a file with the serializer of its DataType."""
+    get_serializer(datatype, value).dump(value, path, datatype)
+
+
+def load(path, datatype=None):
+    """Load a value from a file of any registered format."""
+    with open(path, 'rb') as fileobj:
+        header = fileobj.read(8)
+
+    return detect_serializer(header).load(path, datatype)
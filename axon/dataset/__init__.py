@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Dataset module.
+
+This module contains the definition of a Dataset and its implementations. A
+Dataset is an iterable collection of data that share a single DataType.
+"""
+from .base import Dataset
+from .array_dataset import ArrayDataset
+from .cache import CachedDataset
+from .collate import BucketedDataset
+from .collate import Collator
+from .collate import PaddedBatch
+from .database import DatabaseDataset
+from .dvc_dataset import DVCDataset
+from .loader import DataLoader
+from .metadata import MetadataIndex
+from .sampling import EpochSampler
+from .sampling import Permutation
+from .sampling import ShuffledStream
+from .sharded import ShardedDataset
+from .sharded import ShardWriter
+from .sharded import write_dataset
+from .transforms import BatchedDataset
+from .transforms import FilteredDataset
+from .transforms import InterleavedDataset
+from .transforms import MappedDataset
+from .transforms import SubsetDataset
+from .transforms import TakenDataset
+from .transforms import UnbatchedDataset
+from .windows import WindowedDataset
+
+
+__all__ = [
+    'Dataset',
+    'ArrayDataset',
+    'CachedDataset',
+    'BucketedDataset',
+    'Collator',
+    'PaddedBatch',
+    'DatabaseDataset',
+    'DVCDataset',
+    'DataLoader',
+    'MetadataIndex',
+    'EpochSampler',
+    'Permutation',
+    'ShuffledStream',
+    'ShardedDataset',
+    'ShardWriter',
+    'write_dataset',
+    'BatchedDataset',
+    'FilteredDataset',
+    'InterleavedDataset',
+    'MappedDataset',
+    'SubsetDataset',
+    'TakenDataset',
+    'UnbatchedDataset',
+    'WindowedDataset',
+]
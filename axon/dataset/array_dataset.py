@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Array Dataset Module.
+
+This module defines datasets whose items are stored in a single contiguous
+numpy buffer. Items are returned as views into the buffer, and slicing or
+indexing the dataset returns a new dataset that shares the same buffer.
+"""
+import numbers
+
+import numpy as np
+
+from axon.dataset.base import Dataset
+from axon.fingerprint import fingerprint
+
+
+class ArrayDataset(Dataset):
+    """Random access dataset backed by a contiguous numpy buffer.
+
+    If no offsets are given, every entry along the first axis of the buffer
+    is an item, so all items have the same shape. Otherwise items may have
+    different lengths and item ``i`` is ``data[offsets[i]:offsets[i + 1]]``.
+
+    An optional index array selects and orders the items of the buffer that
+    belong to the dataset. Indexing with an integer returns a view of a
+    single item. Indexing with a slice, an integer array or a boolean mask
+    returns a new dataset that shares the buffer, so no item data is copied.
+
+    Examples
+    --------
+    .. code-block:: python
+        clips = ArrayDataset.from_arrays([wav1, wav2, wav3])
+        clips[0]           # view of wav1 inside the buffer
+        clips[[2, 0]]      # dataset with wav3 and wav1
+        clips[1:]          # dataset with wav2 and wav3
+    """
+
+    def __init__(self, data, offsets=None, index=None, datum_datatype=None):
+        """Create a dataset from a buffer, offsets and index arrays."""
+        if not isinstance(data, np.ndarray):
+            data = np.asarray(data)
+
+        if offsets is not None:
+            offsets = np.asarray(offsets, dtype=np.int64)
+
+            if offsets.ndim != 1 or offsets.size == 0:
+                message = 'Offsets should be a non empty 1-D array.'
+                raise ValueError(message)
+
+            if np.any(np.diff(offsets) < 0):
+                message = 'Offsets should be non decreasing.'
+                raise ValueError(message)
+
+            if offsets[0] < 0 or offsets[-1] > len(data):
+                message = 'Offsets out of bounds. (buffer length={})'
+                raise ValueError(message.format(len(data)))
+
+        if index is not None:
+            index = np.asarray(index, dtype=np.int64)
+
+            if index.ndim != 1:
+                message = 'Index should be a 1-D array.'
+                raise ValueError(message)
+
+        self.data = data
+        self.offsets = offsets
+        self.index = index
+
+        if datum_datatype is not None:
+            self.datum_datatype = datum_datatype
+
+    @classmethod
+    def from_arrays(cls, arrays, dtype=None, datum_datatype=None):
+        """Pack a sequence of arrays into a single buffer.
+
+        All arrays must have the same shape except along the first axis.
+        """
+        arrays = [np.asarray(array, dtype=dtype) for array in arrays]
+        lengths = [len(array) for array in arrays]
+
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        if arrays:
+            data = np.concatenate(arrays)
+        else:
+            data = np.zeros(0, dtype=dtype)
+
+        return cls(data, offsets=offsets, datum_datatype=datum_datatype)
+
+    @property
+    def variable_length(self):
+        """Whether items may have different lengths."""
+        return self.offsets is not None
+
+    def _size(self):
+        if self.offsets is not None:
+            return len(self.offsets) - 1
+
+        return len(self.data)
+
+    def len(self):
+        """Return the number of items."""
+        if self.index is not None:
+            return len(self.index)
+
+        return self._size()
+
+    def lengths(self):
+        """Return the length of every item as an array."""
+        if self.offsets is None:
+            length = self.data.shape[1] if self.data.ndim > 1 else 1
+            lengths = np.full(self._size(), length, dtype=np.int64)
+        else:
+            lengths = np.diff(self.offsets)
+
+        if self.index is not None:
+            return lengths[self.index]
+
+        return lengths
+
+    def positions(self):
+        """Return the buffer positions of all items as an array."""
+        if self.index is not None:
+            return self.index
+
+        return np.arange(self._size())
+
+    def get(self, position):
+        """Return a view of the item at the given buffer position."""
+        if self.offsets is None:
+            return self.data[position]
+
+        return self.data[self.offsets[position]:self.offsets[position + 1]]
+
+    def version(self):
+        """Return a fingerprint of the buffer, offsets and index.
+
+        The whole buffer is hashed, so this reads all of the data once.
+        """
+        return fingerprint((self.data, self.offsets, self.index))
+
+    def iter(self):
+        """Iterate over views of the dataset items."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over views of the dataset items, starting at an item."""
+        for position in self.positions()[start:]:
+            yield self.get(position)
+
+    def _view(self, offsets=None, index=None):
+        return ArrayDataset(
+            self.data,
+            offsets=offsets,
+            index=index,
+            datum_datatype=self.datum_datatype)
+
+    def __getitem__(self, key):
+        """Get an item view or a dataset view of a subset of items."""
+        if isinstance(key, numbers.Integral):
+            return self._get_item(key)
+
+        if isinstance(key, slice):
+            return self._get_slice(key)
+
+        return self._get_subset(key)
+
+    def _get_item(self, key):
+        length = self.len()
+        if not -length <= key < length:
+            message = 'Dataset index out of range. (index={}, len={})'
+            raise IndexError(message.format(key, length))
+
+        if key < 0:
+            key += length
+
+        if self.index is not None:
+            key = self.index[key]
+
+        return self.get(key)
+
+    def _get_slice(self, key):
+        if self.index is None and self.offsets is None:
+            return ArrayDataset(
+                self.data[key],
+                datum_datatype=self.datum_datatype)
+
+        start, stop, step = key.indices(self.len())
+        if self.index is None and step == 1:
+            stop = max(start, stop)
+            return self._view(offsets=self.offsets[start:stop + 1])
+
+        return self._view(
+            offsets=self.offsets,
+            index=self.positions()[key])
+
+    def _get_subset(self, key):
+        key = np.asarray(key)
+        if key.dtype == np.bool_:
+            if key.shape != (self.len(),):
+                message = 'Boolean mask does not match dataset length.'
+                raise IndexError(message)
+            key = np.flatnonzero(key)
+
+        if not np.issubdtype(key.dtype, np.integer):
+            message = 'Invalid dataset index. (type={})'
+            raise IndexError(message.format(key.dtype))
+
+        return self._view(offsets=self.offsets, index=self.positions()[key])
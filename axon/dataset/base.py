@@ -3,6 +3,7 @@
 
 This module defines the basic Dataset class.
 """
+import itertools
 from abc import ABC
 from abc import abstractmethod
 
@@ -12,6 +13,16 @@ class Dataset(ABC):
 
     A dataset is an iterable object that stores objects with a definite
     datatype.
+
+    Datasets can be transformed lazily with the chainable :meth:`map`,
+    :meth:`filter`, :meth:`batch`, :meth:`bucket_by_length`,
+    :meth:`unbatch`, :meth:`take` and :meth:`interleave` methods. No item is
+    read until the transformed dataset is iterated, and then all
+    transformations run in a single streaming pass.
+
+    Datasets that can tell when their contents change should implement
+    :meth:`version`, which is used to key caches of derived datasets (see
+    :meth:`cache`).
     """
 
     datum_datatype = None
@@ -22,4 +33,112 @@ class Dataset(ABC):
 
     @abstractmethod
     def len(self):
-        """Return the length of the dataset."""
+        """Return the length of the dataset, or None if it is unknown."""
+
+    def version(self):
+        """Return a fingerprint of the dataset contents.
+
+        The version must change whenever the contents of the dataset
+        change. Returns None if the version is unknown, which is the
+        default.
+        """
+        return None
+
+    def iter_from(self, start):
+        """Iterate over the dataset contents, starting at an item.
+
+        Rewrite if items can be skipped without reading them.
+        """
+        return itertools.islice(self.iter(), start, None)
+
+    def validation_path(self):
+        """Return the default sidecar file of validation reports.
+
+        Returns None by default, so reports are only persisted if a path
+        is given to :meth:`validate`.
+        """
+        return None
+
+    def validate(self, path=None, **kwargs):
+        """Validate all items against the datum_datatype in bulk.
+
+        The report is stored in a sidecar file, and the dataset is not
+        validated again until its version or datum_datatype change. See
+        :func:`axon.dataset.validation.validate_dataset`.
+        """
+        from axon.dataset.validation import validate_dataset
+        if path is None:
+            path = self.validation_path()
+        return validate_dataset(self, path=path, **kwargs)
+
+    def is_validated(self, path=None):
+        """Check whether a current report says that all items are valid.
+
+        Readers of a validated dataset can skip per-item checks.
+        """
+        from axon.dataset.validation import ValidationReport
+        if path is None:
+            path = self.validation_path()
+
+        if path is None:
+            return False
+
+        report = ValidationReport.load(path)
+        return bool(report and report.valid and report.is_current(self))
+
+    def __iter__(self):
+        """Iterate over the dataset contents."""
+        return iter(self.iter())
+
+    def __len__(self):
+        """Return the length of the dataset.
+
+        Raises a TypeError if the length is unknown. Use :meth:`len` to get
+        None instead.
+        """
+        length = self.len()
+        if length is None:
+            message = 'The length of {} is unknown until it is iterated.'
+            raise TypeError(message.format(type(self).__name__))
+
+        return length
+
+    def map(self, process):
+        """Apply a process (or any callable) to every item."""
+        from axon.dataset.transforms import MappedDataset
+        return MappedDataset(self, [process])
+
+    def filter(self, predicate):
+        """Keep only the items for which the predicate is true."""
+        from axon.dataset.transforms import FilteredDataset
+        return FilteredDataset(self, predicate)
+
+    def batch(self, batch_size, drop_remainder=False):
+        """Group consecutive items into lists of batch_size items."""
+        from axon.dataset.transforms import BatchedDataset
+        return BatchedDataset(self, batch_size, drop_remainder=drop_remainder)
+
+    def unbatch(self):
+        """Split every item into its entries."""
+        from axon.dataset.transforms import UnbatchedDataset
+        return UnbatchedDataset(self)
+
+    def take(self, count):
+        """Keep only the first count items."""
+        from axon.dataset.transforms import TakenDataset
+        return TakenDataset(self, count)
+
+    def bucket_by_length(self, boundaries, batch_size, **kwargs):
+        """Group items of similar length into batches."""
+        from axon.dataset.collate import BucketedDataset
+        return BucketedDataset(self, boundaries, batch_size, **kwargs)
+
+    def cache(self, path, max_bytes=None, **kwargs):
+        """Persist the dataset contents to disk on the first full pass."""
+        from axon.dataset.cache import CachedDataset
+        return CachedDataset(self, path, max_bytes=max_bytes, **kwargs)
+
+    def interleave(self, *datasets, block_length=1):
+        """Alternate between blocks of items of this and other datasets."""
+        from axon.dataset.transforms import InterleavedDataset
+        return InterleavedDataset([self] + list(datasets), block_length)
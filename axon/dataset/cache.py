@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Dataset Cache Module.
+
+This module defines an on-disk cache of dataset contents. The output of a
+transformation chain is written in the sharded dataset format on its first
+full pass and read back from memory maps afterwards. Cache entries are keyed
+by the version of the dataset, which combines the version of the source
+dataset with the fingerprints of all processes applied to it, so any change
+to the data or the computation leads to a new entry.
+
+A cache directory holds one subdirectory per entry::
+
+    cache/
+        3f2a...e1/          Complete entry, a sharded dataset.
+        9b04...7c/          Partial entry, resumed on the next pass.
+"""
+import os
+import shutil
+
+from axon.dataset.base import Dataset
+from axon.dataset.sharded import MANIFEST
+from axon.dataset.sharded import ShardedDataset
+from axon.dataset.sharded import ShardWriter
+
+
+def directory_size(path):
+    """Compute the total size in bytes of the files in a directory."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def evict(path, max_bytes, keep=()):
+    """Remove least recently used cache entries until they fit a budget.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory.
+    max_bytes : int
+        Maximum total size of the cache entries.
+    keep : iterable of str
+        Keys of entries that must not be removed.
+
+    Returns
+    -------
+    list of str
+        The keys of the removed entries.
+    """
+    entries = []
+    for key in os.listdir(path):
+        entry = os.path.join(path, key)
+        if os.path.isdir(entry):
+            entries.append((os.path.getmtime(entry), key, entry))
+
+    sizes = {key: directory_size(entry) for _, key, entry in entries}
+    total = sum(sizes.values())
+
+    removed = []
+    for _, key, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+
+        if key in keep:
+            continue
+
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= sizes[key]
+        removed.append(key)
+
+    return removed
+
+
+class CachedDataset(Dataset):
+    """Dataset whose contents are persisted to disk on the first pass.
+
+    Items must be numpy arrays that can be stored in the sharded dataset
+    format. The first full iteration reads the source dataset and writes
+    every item to the cache entry of its version; later iterations read the
+    entry back as memory mapped views, without touching the source.
+
+    Complete shards are kept if an iteration is interrupted. The next pass
+    yields the cached items and continues from the first missing item, so
+    only the missing items are computed when the source supports skipping
+    (see :meth:`Dataset.iter_from`).
+
+    If max_bytes is given, least recently used entries of the cache
+    directory are removed when a new entry is completed, until the cache
+    fits in max_bytes bytes.
+
+    Examples
+    --------
+    .. code-block:: python
+        features = recordings.map(SpectrogramMaker()).cache('cache/')
+        for epoch in range(epochs):
+            for spectrogram in features:
+                train_step(spectrogram)
+    """
+
+    def __init__(self, dataset, path, max_bytes=None, **writer_kwargs):
+        """Create a cached view of the dataset."""
+        key = dataset.version()
+        if key is None:
+            message = (
+                'Datasets without a version can not be cached. '
+                '(dataset={})')
+            raise ValueError(message.format(type(dataset).__name__))
+
+        self.dataset = dataset
+        self.path = path
+        self.key = key
+        self.max_bytes = max_bytes
+        self.writer_kwargs = writer_kwargs
+        self.datum_datatype = dataset.datum_datatype
+
+        self._cached = None
+
+    @property
+    def entry(self):
+        """Directory of the cache entry of this dataset."""
+        return os.path.join(self.path, self.key)
+
+    @property
+    def complete(self):
+        """Whether the cache entry has been completely written."""
+        return os.path.exists(os.path.join(self.entry, MANIFEST))
+
+    def cached(self):
+        """Get the cache entry as a :class:`ShardedDataset`, if complete."""
+        if self._cached is None and self.complete:
+            self._cached = ShardedDataset(self.entry)
+
+        if self._cached is not None:
+            # Mark the entry as recently used
+            os.utime(self.entry)
+
+        return self._cached
+
+    def version(self):
+        """Return the version of the source dataset."""
+        return self.key
+
+    def len(self):
+        """Return the number of items, if it is known."""
+        cached = self.cached()
+        if cached is not None:
+            return cached.len()
+
+        return self.dataset.len()
+
+    def iter(self):
+        """Iterate over the items, writing them to the cache if needed."""
+        cached = self.cached()
+        if cached is not None:
+            return cached.iter()
+
+        return self._write()
+
+    def _write(self):
+        writer = ShardWriter(
+            self.entry,
+            datum_datatype=self.datum_datatype,
+            resume=True,
+            **self.writer_kwargs)
+
+        # Items of an interrupted pass
+        done = writer.num_items
+        if done:
+            partial = ShardedDataset(self.entry, manifest=writer.manifest())
+            yield from partial.iter()
+
+        try:
+            for item in self.dataset.iter_from(done):
+                writer.write(item)
+                yield item
+
+        except BaseException:
+            # Keep the items of a pass that was stopped early
+            writer.flush()
+            raise
+
+        writer.close()
+
+        if self.max_bytes is not None:
+            evict(self.path, self.max_bytes, keep=[self.key])
+
+    def materialize(self):
+        """Write the cache entry if needed and return it.
+
+        Returns
+        -------
+        ShardedDataset
+            The complete cache entry.
+        """
+        if not self.complete:
+            for _ in self._write():
+                pass
+
+        return self.cached()
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""Batch Collation Module.
+
+This module defines the collation of batches of variable length arrays
+(such as audio clips) into padded arrays. Padded batches can be written
+into preallocated buffers that are reused across batches, and items can be
+grouped into buckets of similar length to reduce the padding.
+
+.. code-block:: python
+    collator = Collator(pad_multiple=256)
+    batches = (
+        clips
+        .bucket_by_length([16000, 32000, 64000], batch_size=32)
+        .map(collator))
+
+    for batch in batches:
+        train_step(batch.data, batch.mask)
+
+    print(collator.stats.to_dict())
+"""
+import collections
+import threading
+
+import numpy as np
+
+import axon.datatypes as dt
+from axon.dataset.base import Dataset
+from axon.fingerprint import combine
+from axon.fingerprint import fingerprint
+
+
+class PaddedBatch(
+        collections.namedtuple('PaddedBatch', ['data', 'lengths', 'mask'])):
+    """Batch of padded arrays.
+
+    Attributes
+    ----------
+    data : numpy.ndarray
+        Array of shape (batch, length, ...) with the padded items.
+    lengths : numpy.ndarray
+        Length of every item before padding.
+    mask : numpy.ndarray
+        Boolean array of shape (batch, length), True on item entries and
+        False on padding.
+    """
+
+    __slots__ = ()
+
+    @property
+    def datatype(self):
+        """The exact DataType of the batch."""
+        return get_batch_datatype(self)
+
+
+def get_item_datatype(dtype):
+    """Get the DataType of the entries of a numpy array dtype."""
+    dtype = np.dtype(dtype)
+    if dtype == np.bool_:
+        return dt.Bool()
+
+    if np.issubdtype(dtype, np.integer):
+        return dt.Int()
+
+    if np.issubdtype(dtype, np.floating):
+        return dt.Float()
+
+    message = 'No DataType for numpy dtype {}.'.format(dtype)
+    raise ValueError(message)
+
+
+def get_batch_datatype(batch):
+    """Get the exact DataType of a padded batch."""
+    return dt.Tuple([
+        dt.NumpyArray(get_item_datatype(batch.data.dtype), batch.data.shape),
+        dt.NumpyArray(dt.Int(), batch.lengths.shape),
+        dt.NumpyArray(dt.Bool(), batch.mask.shape),
+    ])
+
+
+class CollateStats:
+    """Batch collation statistics.
+
+    Attributes
+    ----------
+    batches : int
+        Number of collated batches.
+    items : int
+        Number of collated items.
+    allocations : int
+        Number of buffers allocated. Without buffer reuse every batch is
+        allocated. With reused buffers, once they are large enough for the
+        largest batch no more allocations happen.
+    elements : int
+        Number of entries of all padded batches, counted along the batch and
+        length axes.
+    padding : int
+        Number of padding entries, counted along the batch and length axes.
+    """
+
+    def __init__(self):
+        """Create empty statistics."""
+        self.batches = 0
+        self.items = 0
+        self.allocations = 0
+        self.elements = 0
+        self.padding = 0
+
+    @property
+    def padding_ratio(self):
+        """Fraction of the padded batch entries that are padding."""
+        if self.elements == 0:
+            return 0.0
+
+        return self.padding / self.elements
+
+    def to_dict(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'allocations': self.allocations,
+            'elements': self.elements,
+            'padding': self.padding,
+            'padding_ratio': self.padding_ratio,
+        }
+
+
+class Collator:
+    """Collate lists of variable length arrays into padded batches.
+
+    Items must share dtype and all but their first dimension. Every batch is
+    padded to the length of its longest item, rounded up to a multiple of
+    pad_multiple, and truncated to max_length if given. With
+    pad_to_max_length every batch is padded to max_length instead.
+
+    Every batch is written into new arrays by default. If num_buffers is
+    given, batches are written into a ring of num_buffers preallocated
+    buffers instead, so a returned batch is only valid until num_buffers
+    more batches have been collated. When collating in a
+    :class:`DataLoader` the ring must be larger than the number of batches
+    that can be prefetched and held at once (prefetch plus workers plus
+    the batches kept by the consumer). Buffers are flat, so the returned
+    arrays are contiguous, and they only grow when a batch does not fit.
+
+    If batch_size, dtype and pad_to_max_length are given, every batch has
+    the same shape (short batches are padded with empty rows) and
+    :meth:`get_output_dtype` gives its exact DataType.
+
+    Collators are thread safe and can be used as processes in
+    :meth:`Dataset.map`.
+    """
+
+    name = 'Collator'
+
+    def __init__(
+            self,
+            pad_value=0,
+            pad_multiple=1,
+            max_length=None,
+            num_buffers=None,
+            pad_to_max_length=False,
+            batch_size=None,
+            dtype=None,
+            item_shape=()):
+        """Create a collator."""
+        if pad_multiple < 1:
+            message = 'Pad multiple should be positive. (pad_multiple={})'
+            raise ValueError(message.format(pad_multiple))
+
+        if num_buffers is not None and num_buffers < 1:
+            message = 'Number of buffers should be positive. (buffers={})'
+            raise ValueError(message.format(num_buffers))
+
+        if pad_to_max_length and max_length is None:
+            message = 'A max_length is needed to pad to the max length.'
+            raise ValueError(message)
+
+        if batch_size is not None and batch_size < 1:
+            message = 'Batch size should be positive. (batch_size={})'
+            raise ValueError(message.format(batch_size))
+
+        self.pad_value = pad_value
+        self.pad_multiple = pad_multiple
+        self.max_length = max_length
+        self.num_buffers = num_buffers
+        self.pad_to_max_length = pad_to_max_length
+        self.batch_size = batch_size
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.item_shape = tuple(item_shape)
+
+        self.stats = CollateStats()
+        self._buffers = [None] * (num_buffers or 0)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """Drop the buffers and the lock when pickling."""
+        state = self.__dict__.copy()
+        state['_buffers'] = [None] * (self.num_buffers or 0)
+        state['_next'] = 0
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled collator with empty buffers."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_input_dtype(self):
+        """Get the input DataType, a list of arrays."""
+        return None
+
+    def get_output_dtype(self):
+        """Get the DataType of the collated batches.
+
+        Batch shapes depend on the items unless batch_size, dtype and
+        pad_to_max_length are set, so None is returned otherwise. The exact
+        DataType of any batch is given by its datatype attribute.
+        """
+        if not self.pad_to_max_length:
+            return None
+
+        if self.batch_size is None or self.dtype is None:
+            return None
+
+        shape = (self.batch_size, self.max_length)
+        return dt.Tuple([
+            dt.NumpyArray(
+                get_item_datatype(self.dtype), shape + self.item_shape),
+            dt.NumpyArray(dt.Int(), (self.batch_size,)),
+            dt.NumpyArray(dt.Bool(), shape),
+        ])
+
+    def fingerprint(self):
+        """Get a fingerprint of the collation parameters."""
+        return fingerprint((
+            'collator',
+            self.pad_value,
+            self.pad_multiple,
+            self.max_length,
+            self.pad_to_max_length,
+            self.batch_size,
+            None if self.dtype is None else self.dtype.str,
+            self.item_shape))
+
+    def padded_length(self, lengths):
+        """Get the padded length of a batch with the given item lengths."""
+        if self.pad_to_max_length:
+            return self.max_length
+
+        length = int(lengths.max()) if lengths.size else 0
+        length = -(-length // self.pad_multiple) * self.pad_multiple
+
+        if self.max_length is not None:
+            length = min(length, self.max_length)
+
+        return length
+
+    def _buffer(self, dtype, size):
+        """Get a buffer with room for size entries.
+
+        Must be called with the lock held.
+        """
+        if self.num_buffers is None:
+            self.stats.allocations += 1
+            return np.empty(size, dtype=dtype), np.empty(size, dtype=np.bool_)
+
+        slot = self._next
+        self._next = (slot + 1) % self.num_buffers
+
+        if self._buffers[slot] is not None:
+            data, mask = self._buffers[slot]
+            if data.dtype == dtype and data.size >= size:
+                return data, mask
+
+        data = np.empty(size, dtype=dtype)
+        mask = np.empty(size, dtype=np.bool_)
+        self._buffers[slot] = data, mask
+        self.stats.allocations += 1
+        return data, mask
+
+    def __call__(self, items):
+        """Collate a list of arrays into a padded batch."""
+        items = [np.asarray(item, dtype=self.dtype) for item in items]
+        if not items:
+            raise ValueError('Can not collate an empty batch.')
+
+        num_rows = len(items)
+        if self.batch_size is not None:
+            if num_rows > self.batch_size:
+                message = 'Batch is larger than the batch size. ({} > {})'
+                raise ValueError(message.format(num_rows, self.batch_size))
+            num_rows = self.batch_size
+
+        lengths = np.zeros(num_rows, dtype=np.int64)
+        lengths[:len(items)] = [len(item) for item in items]
+        length = self.padded_length(lengths)
+        trailing = items[0].shape[1:]
+        shape = (num_rows, length) + trailing
+        size = int(np.prod(shape))
+
+        with self._lock:
+            data, mask = self._buffer(items[0].dtype, size)
+
+        data = data[:size].reshape(shape)
+        mask = mask[:num_rows * length].reshape(num_rows, length)
+
+        for row, item in zip(data, items):
+            size = min(len(item), length)
+            row[:size] = item[:size]
+            row[size:] = self.pad_value
+        data[len(items):] = self.pad_value
+
+        lengths = np.minimum(lengths, length)
+        np.less(np.arange(length), lengths[:, None], out=mask)
+
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.items += len(items)
+            self.stats.elements += mask.size
+            self.stats.padding += mask.size - int(lengths.sum())
+
+        return PaddedBatch(data, lengths, mask)
+
+
+class BucketedDataset(Dataset):
+    """Dataset of batches of items of similar length.
+
+    Items are assigned to the bucket of the first boundary that is greater
+    or equal to their length (or to an extra last bucket if they are longer
+    than all boundaries). A batch is yielded as soon as a bucket holds
+    batch_size items. Incomplete buckets are yielded at the end, unless
+    drop_remainder is True.
+
+    Batches are lists of items, ready to be collated by a :class:`Collator`.
+    """
+
+    def __init__(
+            self,
+            dataset,
+            boundaries,
+            batch_size,
+            drop_remainder=False,
+            length=len):
+        """Create a bucketed view of the dataset."""
+        boundaries = list(boundaries)
+        if boundaries != sorted(boundaries):
+            raise ValueError('Bucket boundaries should be sorted.')
+
+        if batch_size < 1:
+            message = 'Batch size should be positive. (batch_size={})'
+            raise ValueError(message.format(batch_size))
+
+        self.dataset = dataset
+        self.boundaries = boundaries
+        self.batch_size = batch_size
+        self.drop_remainder = drop_remainder
+        self.length = length
+
+        self.datum_datatype = None
+        if dataset.datum_datatype is not None:
+            self.datum_datatype = dt.List(dataset.datum_datatype)
+
+    def bucket(self, item):
+        """Get the bucket number of an item."""
+        return int(np.searchsorted(self.boundaries, self.length(item)))
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the buckets."""
+        return combine(
+            self.dataset.version(),
+            'bucket_by_length',
+            self.boundaries,
+            self.batch_size,
+            self.drop_remainder,
+            fingerprint(self.length))
+
+    def iter(self):
+        """Iterate over batches of items of the same bucket."""
+        buckets = [[] for _ in range(len(self.boundaries) + 1)]
+
+        for item in self.dataset.iter():
+            bucket = buckets[self.bucket(item)]
+            bucket.append(item)
+
+            if len(bucket) == self.batch_size:
+                yield list(bucket)
+                bucket.clear()
+
+        if self.drop_remainder:
+            return
+
+        for bucket in buckets:
+            if bucket:
+                yield bucket
+
+    def len(self):
+        """Return None, the number of batches depends on the lengths."""
+        return None
+
+
+def bucket_counts(lengths, boundaries):
+    """Count the items of every bucket given their lengths.
+
+    Useful to choose bucket boundaries from the lengths of a dataset, such
+    as :meth:`ArrayDataset.lengths`.
+    """
+    buckets = np.searchsorted(boundaries, lengths)
+    return np.bincount(buckets, minlength=len(boundaries) + 1)
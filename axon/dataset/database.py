@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""Database Dataset Module.
+
+This module defines a dataset of the rows of a database table. Rows are
+read in pages with keyset pagination (``WHERE key > last ORDER BY key``),
+so every page costs a single indexed query no matter how deep into the
+table it is, and no connection is held between pages.
+
+Positions are resolved to keys with a key list that is read once and
+cached, so reading rows by position costs a single batched ``IN`` query.
+"""
+import numbers
+
+import numpy as np
+import pandas as pd
+
+import axon.datatypes as dt
+from axon.data import Data
+from axon.data.database import DatabaseBackend
+from axon.data.database import chunked
+from axon.data.database import execute
+from axon.data.database import fetch_rows
+from axon.data.database import quote
+from axon.dataset.base import Dataset
+
+
+DEFAULT_PAGE_SIZE = 1000
+
+PANDAS_TYPES = {
+    dt.Float: 'float64',
+    dt.Int: 'int64',
+    dt.Bool: 'bool',
+}
+
+
+def select_keys(keys, key):
+    """Select keys by a position, a slice, positions or a boolean mask.
+
+    Returns a single key for integer positions and a list otherwise.
+    """
+    length = len(keys)
+    if isinstance(key, numbers.Integral):
+        if not -length <= key < length:
+            message = 'Dataset index out of range. (index={}, len={})'
+            raise IndexError(message.format(key, length))
+        return keys[key]
+
+    if isinstance(key, slice):
+        return list(keys[key])
+
+    key = np.asarray(key)
+    if key.dtype == np.bool_:
+        if key.shape != (length,):
+            message = 'Boolean mask does not match dataset length. ({} != {})'
+            raise IndexError(message.format(key.shape, length))
+        key = np.flatnonzero(key)
+
+    if key.size and not np.issubdtype(key.dtype, np.integer):
+        message = 'Dataset positions should be integers. (dtype={})'
+        raise TypeError(message.format(key.dtype))
+
+    if key.size and not (-length <= key.min() and key.max() < length):
+        message = 'Dataset index out of range. (len={})'
+        raise IndexError(message.format(length))
+
+    return [keys[position] for position in key.tolist()]
+
+
+class DatabaseDataset(Dataset):
+    """Dataset of the rows of a database table.
+
+    Items are dictionaries of column values, in order of the key column.
+
+    Rows can be read by position, slice, positions or boolean mask. The
+    keys and the number of rows are read once and cached; call
+    :meth:`refresh` if the table changes.
+
+    Parameters
+    ----------
+    pool : axon.data.database.ConnectionPool
+        Pool of connections to the database.
+    table : str
+        Name of the table.
+    key : str
+        Name of a unique and sortable key column.
+    columns : list of str, optional
+        Columns to read. All columns are read by default.
+    where : str, optional
+        SQL condition on the rows to read. Values should be given as query
+        parameters.
+    parameters : tuple, optional
+        Parameters of the where condition.
+    page_size : int
+        Number of rows read by every query.
+    datum_datatype : DataType, optional
+        DataType of the rows.
+
+    Examples
+    --------
+    .. code-block:: python
+        pool = ConnectionPool.sqlite('annotations.sqlite')
+        dataset = DatabaseDataset(
+            pool, 'annotations', where='site = ?', parameters=('x',))
+
+        for chunk in dataset.chunks(chunksize=10000):
+            ...
+    """
+
+    def __init__(
+            self,
+            pool,
+            table,
+            key='id',
+            columns=None,
+            where=None,
+            parameters=(),
+            page_size=DEFAULT_PAGE_SIZE,
+            datum_datatype=None):
+        """Create a dataset of a database table."""
+        self.pool = pool
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.where = where
+        self.parameters = tuple(parameters)
+        self.page_size = page_size
+        self.datum_datatype = datum_datatype
+
+        self.backend = DatabaseBackend(pool, table, key=key, columns=columns)
+        self._keys = None
+        self._length = None
+
+    def refresh(self):
+        """Forget the cached keys and length of the table."""
+        self._keys = None
+        self._length = None
+
+    def _query(self, select, after=False, suffix=''):
+        conditions = []
+        parameters = []
+        if self.where is not None:
+            conditions.append('({})'.format(self.where))
+            parameters.extend(self.parameters)
+
+        if after:
+            conditions.append('{} > {}'.format(
+                quote(self.key), self.pool.placeholder))
+
+        query = 'SELECT {} FROM {}'.format(select, quote(self.table))
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+
+        return query + suffix, parameters
+
+    @property
+    def _select(self):
+        columns = '*'
+        if self.columns is not None:
+            columns = ', '.join(quote(column) for column in self.columns)
+
+        return '{}, {} AS _key'.format(columns, quote(self.key))
+
+    def pages(self, after=None):
+        """Iterate over pages of rows, starting after a key."""
+        suffix = ' ORDER BY {} LIMIT {}'.format(
+            quote(self.key), int(self.page_size))
+
+        while True:
+            query, parameters = self._query(
+                self._select, after=after is not None, suffix=suffix)
+            if after is not None:
+                parameters.append(after)
+
+            with self.pool.connection() as connection:
+                rows = fetch_rows(execute(connection, query, parameters))
+
+            if not rows:
+                return
+
+            after = rows[-1]['_key']
+            for row in rows:
+                del row['_key']
+            yield rows
+
+            if len(rows) < self.page_size:
+                return
+
+    def iter(self):
+        """Iterate over the rows of the table."""
+        for page in self.pages():
+            yield from page
+
+    def iter_from(self, start):
+        """Iterate over the rows of the table, starting at a row."""
+        if start <= 0:
+            return self.iter()
+
+        query, parameters = self._query(
+            quote(self.key),
+            suffix=' ORDER BY {} LIMIT 1 OFFSET {}'.format(
+                quote(self.key), int(start) - 1))
+        with self.pool.connection() as connection:
+            row = execute(connection, query, parameters).fetchone()
+
+        if row is None:
+            return iter([])
+
+        return (item for page in self.pages(row[0]) for item in page)
+
+    def len(self):
+        """Return the number of rows. Counted once and cached."""
+        if self._keys is not None:
+            return len(self._keys)
+
+        if self._length is None:
+            query, parameters = self._query('COUNT(*)')
+            with self.pool.connection() as connection:
+                self._length = execute(
+                    connection, query, parameters).fetchone()[0]
+
+        return self._length
+
+    def _load_keys(self):
+        # Read the keys once and return the cached list without copying it
+        if self._keys is None:
+            query, parameters = self._query(
+                quote(self.key),
+                suffix=' ORDER BY {}'.format(quote(self.key)))
+            with self.pool.connection() as connection:
+                cursor = execute(connection, query, parameters)
+                self._keys = [row[0] for row in cursor.fetchall()]
+            self._length = len(self._keys)
+
+        return self._keys
+
+    def keys(self):
+        """Get the keys of all rows, in order. Read once and cached."""
+        return list(self._load_keys())
+
+    def get_many(self, keys):
+        """Get the rows of many keys with batched queries.
+
+        Rows are returned in the order of the keys. Raises a KeyError if a
+        key is missing.
+        """
+        rows = self.backend.load_many(keys)
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            message = 'No rows with keys {}. (uri={})'
+            raise KeyError(message.format(missing[:10], self.backend.uri))
+
+        return [rows[key] for key in keys]
+
+    def data(self, keys=None):
+        """Get lazy data objects of the rows of some keys, or of all rows.
+
+        Use :meth:`axon.data.Data.prefetch` to load them in bulk.
+        """
+        if keys is None:
+            keys = self._load_keys()
+
+        return [Data(self.datum_datatype, key, self.backend) for key in keys]
+
+    def __getitem__(self, key):
+        """Get the row at a position, or a subset of rows.
+
+        Slices, arrays of positions and boolean masks return a
+        :class:`DatabaseSubset` of the selected rows.
+        """
+        selected = select_keys(self._load_keys(), key)
+        if isinstance(key, numbers.Integral):
+            return self.get_many([selected])[0]
+
+        return DatabaseSubset(self, selected)
+
+    def chunks(self, datatype=None, chunksize=None):
+        """Stream the rows as dataframes through a single cursor.
+
+        Parameters
+        ----------
+        datatype : axon.datatypes.DataFrame, optional
+            DataType of the chunks. Its columns are read, in order, and cast
+            to the pandas dtypes of their DataTypes. The chunksize defaults
+            to the number of rows of the DataType, so all chunks but the
+            last match it.
+        chunksize : int, optional
+            Number of rows of every chunk. Defaults to the page size.
+
+        Yields
+        ------
+        pandas.DataFrame
+            Chunks of rows in order of the key column.
+        """
+        columns = self.columns
+        if datatype is not None:
+            columns = list(datatype.pandas_dict)
+            if chunksize is None:
+                chunksize = datatype.shape[0]
+
+        if chunksize is None:
+            chunksize = self.page_size
+
+        select = '*'
+        if columns is not None:
+            select = ', '.join(quote(column) for column in columns)
+
+        query, parameters = self._query(
+            select, suffix=' ORDER BY {}'.format(quote(self.key)))
+
+        with self.pool.connection() as connection:
+            cursor = execute(connection, query, parameters)
+            names = [column[0] for column in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+
+                frame = pd.DataFrame.from_records(rows, columns=names)
+                if datatype is not None:
+                    frame = cast_frame(frame, datatype)
+                yield frame
+
+
+def cast_frame(frame, datatype):
+    """Cast the columns of a dataframe to the dtypes of a DataType."""
+    dtypes = {}
+    for column, column_type in datatype.pandas_dict.items():
+        if type(column_type) in PANDAS_TYPES:
+            dtypes[column] = PANDAS_TYPES[type(column_type)]
+
+    return frame.astype(dtypes)
+
+
+class DatabaseSubset(Dataset):
+    """Dataset of the rows of a database dataset with the given keys.
+
+    Rows are read in batched ``IN`` queries of page_size keys.
+    """
+
+    def __init__(self, dataset, keys):
+        """Create a view of the rows of some keys."""
+        self.dataset = dataset
+        self.selected = list(keys)
+        self.datum_datatype = dataset.datum_datatype
+
+    def iter(self):
+        """Iterate over the selected rows, in order of the given keys."""
+        for batch in chunked(self.selected, self.dataset.page_size):
+            yield from self.dataset.get_many(batch)
+
+    def len(self):
+        """Return the number of selected rows."""
+        return len(self.selected)
+
+    def keys(self):
+        """Get the keys of the selected rows."""
+        return list(self.selected)
+
+    def data(self):
+        """Get lazy data objects of the selected rows."""
+        return self.dataset.data(self.selected)
+
+    def __getitem__(self, key):
+        """Get a selected row by position, or a subset of the rows."""
+        selected = select_keys(self.selected, key)
+        if isinstance(key, numbers.Integral):
+            return self.dataset.get_many([selected])[0]
+
+        return DatabaseSubset(self.dataset, selected)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""DVC Dataset Module.
+
+This module defines datasets backed by a directory tracked with DVC. A
+dataset version (any git revision of the DVC repository) is resolved to the
+content hashes of its files without downloading them. Files are fetched from
+the DVC cache or remote only when an item is first accessed, and are kept in
+a local content addressed cache, so files shared between versions are only
+fetched once. With a local remote everything works offline.
+"""
+import copy
+import numbers
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from axon.dataset.base import Dataset
+from axon.fingerprint import combine
+
+
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'axon', 'dvc')
+
+
+def load_file(path):
+    """Load a fetched file.
+
+    ``.npy`` files are memory mapped, ``.npz`` archives are loaded with
+    numpy and any other file is returned as bytes.
+    """
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+
+    if path.endswith('.npz'):
+        with np.load(path) as archive:
+            return dict(archive)
+
+    with open(path, 'rb') as fileobj:
+        return fileobj.read()
+
+
+class DVCDataset(Dataset):
+    """Dataset of the files of a DVC tracked directory.
+
+    Parameters
+    ----------
+    path : str
+        Path of the tracked directory within the repository.
+    repo : str, optional
+        Location of the DVC repository (a local path or a git url). Defaults
+        to the current project.
+    rev : str, optional
+        Git revision of the dataset version. Defaults to the working tree.
+    remote : str, optional
+        Name of the DVC remote to fetch files from.
+    cache_dir : str, optional
+        Directory of the local cache of fetched files.
+    loader : callable, optional
+        Function that loads a fetched file given its local path. Defaults to
+        :func:`load_file`.
+    extensions : sequence of str, optional
+        Only files with these extensions are items of the dataset.
+
+    Examples
+    --------
+    .. code-block:: python
+        clips = DVCDataset('data/clips', rev='v2.1', remote='local')
+        clips.version()       # content hash of the v2.1 clips
+        subset = clips[:100]  # only these files will ever be fetched
+    """
+
+    def __init__(
+            self,
+            path,
+            repo=None,
+            rev=None,
+            remote=None,
+            cache_dir=None,
+            loader=None,
+            extensions=None):
+        """Resolve the files of a dataset version."""
+        self.path = path.rstrip('/')
+        self.repo = repo
+        self.rev = rev
+        self.remote = remote
+        self.cache_dir = os.path.expanduser(cache_dir or DEFAULT_CACHE_DIR)
+        self.loader = loader or load_file
+        self.extensions = None if extensions is None else tuple(extensions)
+
+        self._fs = None
+        self.files, self.tree_hash = self._resolve()
+
+    @property
+    def fs(self):
+        """The :class:`dvc.api.DVCFileSystem` of the dataset version."""
+        if self._fs is None:
+            from dvc.api import DVCFileSystem
+            self._fs = DVCFileSystem(
+                self.repo,
+                rev=self.rev,
+                remote=self.remote)
+
+        return self._fs
+
+    def __getstate__(self):
+        """Drop the file system when pickling, it is opened again lazily."""
+        state = self.__dict__.copy()
+        state['_fs'] = None
+        return state
+
+    def _resolve(self):
+        """List the files of the version and their content hashes."""
+        info = self.fs.info(self.path)
+        if info['type'] != 'directory':
+            message = 'Path is not a directory. (path={})'
+            raise ValueError(message.format(self.path))
+
+        files = []
+        for name, details in sorted(self.fs.find(self.path, detail=True)
+                                    .items()):
+            if self.extensions and not name.endswith(self.extensions):
+                continue
+
+            checksum = details.get('md5')
+            if checksum is None:
+                message = 'File is not tracked by DVC. (path={})'
+                raise ValueError(message.format(name))
+
+            files.append((name, checksum))
+
+        return files, info.get('md5')
+
+    def version(self):
+        """Return a fingerprint of the content hashes of all files."""
+        return combine(
+            'dvc',
+            [checksum for _, checksum in self.files])
+
+    def len(self):
+        """Return the number of files."""
+        return len(self.files)
+
+    def local_path(self, position):
+        """Get the path of a file in the local cache."""
+        name, checksum = self.files[position]
+        extension = os.path.splitext(name)[1]
+        return os.path.join(
+            self.cache_dir,
+            checksum[:2],
+            checksum[2:] + extension)
+
+    def is_fetched(self, position):
+        """Check whether a file is already in the local cache."""
+        return os.path.exists(self.local_path(position))
+
+    def fetch(self, position):
+        """Fetch a file into the local cache if needed and return its path."""
+        local = self.local_path(position)
+        if os.path.exists(local):
+            return local
+
+        directory = os.path.dirname(local)
+        os.makedirs(directory, exist_ok=True)
+
+        descriptor, temporary = tempfile.mkstemp(dir=directory)
+        os.close(descriptor)
+        try:
+            self.fs.get_file(self.files[position][0], temporary)
+            os.replace(temporary, local)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        return local
+
+    def prefetch(self, positions=None, workers=4):
+        """Fetch several files in parallel.
+
+        Returns
+        -------
+        list of str
+            The local paths of the files.
+        """
+        if positions is None:
+            positions = range(self.len())
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.fetch, positions))
+
+    def get(self, position):
+        """Load the file at the given position."""
+        return self.loader(self.fetch(position))
+
+    def iter(self):
+        """Iterate over the loaded files."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over the loaded files, starting at a file."""
+        for position in range(start, self.len()):
+            yield self.get(position)
+
+    def __getitem__(self, key):
+        """Load a file or get a dataset of a subset of the files."""
+        if isinstance(key, numbers.Integral):
+            length = self.len()
+            if not -length <= key < length:
+                message = 'Dataset index out of range. (index={}, len={})'
+                raise IndexError(message.format(key, length))
+            return self.get(key)
+
+        if isinstance(key, slice):
+            files = self.files[key]
+        else:
+            key = np.asarray(key)
+            if key.dtype == np.bool_:
+                key = np.flatnonzero(key)
+            files = [self.files[position] for position in key]
+
+        # Subsets share the opened file system
+        subset = copy.copy(self)
+        subset.files = files
+        return subset
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""Data Loader Module.
+
+This module defines a data loader that reads dataset items with a pool of
+thread or process workers into a bounded prefetch queue, so that loading
+overlaps with the computation done by the consumer.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+
+_STOP = object()
+
+# Dataset and transform of the current process worker
+_WORKER_STATE = {}
+
+
+def _init_worker(dataset, transform):
+    _WORKER_STATE['dataset'] = dataset
+    _WORKER_STATE['transform'] = transform
+
+
+def _load_position(position):
+    """Read an item by position and transform it inside a worker."""
+    item = _WORKER_STATE['dataset'][position]
+    return _apply_transform(item)
+
+
+def _apply_transform(item):
+    """Transform an item inside a worker."""
+    transform = _WORKER_STATE.get('transform')
+    if transform is None:
+        return item
+
+    return transform(item)
+
+
+def is_random_access(dataset):
+    """Check whether dataset items can be read by position."""
+    return hasattr(dataset, '__getitem__')
+
+
+class LoaderStats:
+    """Data loader statistics.
+
+    Attributes
+    ----------
+    items : int
+        Number of items delivered.
+    starved : int
+        Number of times the consumer asked for an item and none was ready.
+    wait_time : float
+        Seconds the consumer spent waiting for items. A large value means
+        that loading is the bottleneck.
+    blocked_time : float
+        Seconds the reader spent waiting for room in the prefetch queue. A
+        large value means that the consumer is the bottleneck.
+    queue_depth : float
+        Mean number of ready items found when the consumer asked for one.
+    max_queue_depth : int
+        Maximum number of ready items found.
+    """
+
+    def __init__(self):
+        """Create empty statistics."""
+        self.items = 0
+        self.starved = 0
+        self.wait_time = 0.0
+        self.blocked_time = 0.0
+        self.max_queue_depth = 0
+        self._total_depth = 0
+
+    @property
+    def queue_depth(self):
+        """Mean number of ready items found by the consumer."""
+        if self.items == 0:
+            return 0.0
+
+        return self._total_depth / self.items
+
+    def record_fetch(self, depth, wait_time):
+        """Record the delivery of an item."""
+        self.items += 1
+        self._total_depth += depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.wait_time += wait_time
+
+        if depth == 0:
+            self.starved += 1
+
+    def to_dict(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'items': self.items,
+            'starved': self.starved,
+            'wait_time': self.wait_time,
+            'blocked_time': self.blocked_time,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+class DataLoader:
+    """Parallel, prefetching data loader.
+
+    Items of the dataset are read by a pool of workers (threads by default,
+    or processes if use_processes is True) and optionally transformed by a
+    :class:`Process` inside the workers. At most prefetch items are loaded
+    ahead of the consumer.
+
+    Random access datasets (those implementing ``__getitem__``) are read by
+    position directly in the workers. Other datasets are iterated by a reader
+    thread that hands the items to the workers.
+
+    A sampler (such as :class:`EpochSampler`) can be given to choose the
+    positions of a random access dataset to read and their order.
+
+    If ordered is True items are delivered in dataset (or sampler) order,
+    otherwise they are delivered as soon as they are ready. Loading
+    statistics of the last iteration are available in the stats attribute.
+
+    Examples
+    --------
+    .. code-block:: python
+        loader = DataLoader(dataset, workers=8, transform=SpectrogramMaker())
+        for spectrogram in loader:
+            train_step(spectrogram)
+        print(loader.stats.to_dict())
+    """
+
+    def __init__(
+            self,
+            dataset,
+            workers=4,
+            prefetch=16,
+            transform=None,
+            ordered=True,
+            use_processes=False,
+            sampler=None):
+        """Create a data loader for the dataset."""
+        if workers < 1:
+            message = 'Number of workers should be positive. (workers={})'
+            raise ValueError(message.format(workers))
+
+        if prefetch < 1:
+            message = 'Prefetch size should be positive. (prefetch={})'
+            raise ValueError(message.format(prefetch))
+
+        self.dataset = dataset
+        self.workers = workers
+        self.prefetch = prefetch
+        self.transform = transform
+        self.ordered = ordered
+        if sampler is not None and not is_random_access(dataset):
+            message = 'Samplers can only be used with random access datasets.'
+            raise ValueError(message)
+
+        self.use_processes = use_processes
+        self.sampler = sampler
+        self.stats = LoaderStats()
+
+    def positions(self):
+        """Iterate over the positions of the items to load."""
+        if self.sampler is not None:
+            return iter(self.sampler)
+
+        length = self.dataset.len()
+        if length is None:
+            message = 'Random access datasets should have a known length.'
+            raise ValueError(message)
+
+        return range(length)
+
+    def len(self):
+        """Return the number of items to load, or None if it is unknown."""
+        if self.sampler is not None:
+            return len(self.sampler)
+
+        return self.dataset.len()
+
+    def __len__(self):
+        """Return the number of items to load.
+
+        Raises a TypeError if the number is unknown.
+        """
+        length = self.len()
+        if length is None:
+            message = 'The number of items of the {} dataset is unknown.'
+            raise TypeError(message.format(type(self.dataset).__name__))
+
+        return length
+
+    def _executor(self):
+        if self.use_processes:
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.dataset, self.transform))
+
+        return ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix='data-loader')
+
+    def _tasks(self):
+        """Iterate over (function, argument) pairs to submit to workers."""
+        if is_random_access(self.dataset):
+            if self.use_processes:
+                function = _load_position
+            else:
+                function = self._load_position
+
+            for position in self.positions():
+                yield function, position
+            return
+
+        function = _apply_transform if self.use_processes else self._apply
+        for item in self.dataset.iter():
+            yield function, item
+
+    def _load_position(self, position):
+        return self._apply(self.dataset[position])
+
+    def _apply(self, item):
+        if self.transform is None:
+            return item
+
+        return self.transform(item)
+
+    def __iter__(self):
+        """Iterate over the loaded items."""
+        self.stats = LoaderStats()
+        prefetcher = _Prefetcher(self)
+
+        try:
+            yield from prefetcher.results()
+
+        finally:
+            prefetcher.close()
+
+
+class _Prefetcher:
+    """State of a single iteration of a data loader."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.stats = loader.stats
+        self.ordered = loader.ordered
+
+        self.stop = threading.Event()
+        self.slots = threading.Semaphore(loader.prefetch)
+        self.submitted = 0
+        self.delivered = 0
+
+        # In order mode futures are queued as submitted, otherwise as done
+        self.output = queue.Queue()
+
+        self.executor = loader._executor()  # pylint: disable=protected-access
+        self.reader = threading.Thread(
+            target=self.read,
+            name='data-loader-reader',
+            daemon=True)
+        self.reader.start()
+
+    def acquire_slot(self):
+        """Wait for room in the prefetch queue."""
+        start = time.perf_counter()
+        while not self.slots.acquire(timeout=0.1):
+            if self.stop.is_set():
+                return False
+
+        self.stats.blocked_time += time.perf_counter() - start
+        return not self.stop.is_set()
+
+    def read(self):
+        """Submit all loading tasks to the workers."""
+        try:
+            tasks = self.loader._tasks()  # pylint: disable=protected-access
+            for function, argument in tasks:
+                if not self.acquire_slot():
+                    return
+
+                future = self.executor.submit(function, argument)
+                self.submitted += 1
+                if self.ordered:
+                    self.output.put(future)
+                else:
+                    future.add_done_callback(self.output.put)
+
+        except Exception as error:  # pylint: disable=broad-except
+            self.output.put(error)
+            return
+
+        self.output.put(_STOP)
+
+    def queue_depth(self):
+        """Count the items that are ready to be delivered."""
+        if not self.ordered:
+            return self.output.qsize()
+
+        with self.output.mutex:
+            return sum(
+                1 for future in self.output.queue
+                if isinstance(future, Future) and future.done())
+
+    def results(self):
+        """Iterate over loaded items as they are delivered."""
+        finished = False
+        while not finished or self.delivered < self.submitted:
+            start = time.perf_counter()
+            depth = self.queue_depth()
+
+            future = self.output.get()
+            if future is _STOP:
+                # Unordered futures may still be running
+                finished = True
+                continue
+
+            if isinstance(future, Exception):
+                raise future
+
+            item = future.result()
+            self.delivered += 1
+            self.slots.release()
+
+            self.stats.record_fetch(depth, time.perf_counter() - start)
+            yield item
+
+    def close(self):
+        """Stop reading and shut the workers down."""
+        self.stop.set()
+        self.reader.join()
+        self.executor.shutdown(wait=True)
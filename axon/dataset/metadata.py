@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""Metadata Index Module.
+
+This module defines a metadata index for datasets. Item metadata (site,
+date, label, duration, ...) is stored as a table in a sqlite database, so
+that filters run as queries against the index and only the matching items
+are ever loaded.
+
+Rows of the index are grouped by source. Every shard of a
+:class:`ShardedDataset` is a source, and is only indexed again if its
+checksum changes. Other datasets are a single source that grows as items
+are appended, and only new items are read when the index is updated.
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from axon.data.database import quote
+from axon.dataset.loader import is_random_access
+from axon.dataset.sharded import ShardedDataset
+from axon.dataset.transforms import SubsetDataset
+
+
+ITEMS_TABLE = 'items'
+SOURCES_TABLE = 'sources'
+DEFAULT_SOURCE = ''
+
+
+def quote_column(column):
+    """Quote a metadata column name for use in a query.
+
+    Names that start with an underscore are reserved for the index.
+    """
+    if column.startswith('_'):
+        message = (
+            'Invalid metadata column name {!r}. Names should be identifiers '
+            'that do not start with an underscore.')
+        raise ValueError(message.format(column))
+
+    return quote(column)
+
+
+def build_condition(where=None, **equals):
+    """Build a SQL condition from a condition string and column values.
+
+    Every keyword argument is a column that must be equal to the given value,
+    or to any of the values if a list or tuple is given.
+
+    Returns
+    -------
+    condition : str
+        The SQL condition.
+    params : list
+        The parameters of the condition.
+    """
+    clauses = []
+    params = []
+
+    if where is not None:
+        clauses.append('({})'.format(where))
+
+    for column, value in sorted(equals.items()):
+        if isinstance(value, (list, tuple)):
+            marks = ', '.join('?' * len(value))
+            clauses.append('{} IN ({})'.format(quote_column(column), marks))
+            params.extend(value)
+        else:
+            clauses.append('{} = ?'.format(quote_column(column)))
+            params.append(value)
+
+    return ' AND '.join(clauses) or '1', params
+
+
+class MetadataIndex:
+    """Sqlite index of the metadata of dataset items.
+
+    Examples
+    --------
+    .. code-block:: python
+        index = MetadataIndex('clips.sqlite')
+        index.update(clips)
+        selected = index.subset(
+            clips,
+            where='year = ? AND duration > ?',
+            params=[2019, 5],
+            site='X',
+            label='Y')
+    """
+
+    def __init__(self, path):
+        """Open or create the index stored at the given path."""
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS {sources} (
+                _source TEXT PRIMARY KEY,
+                _checksum TEXT,
+                _num_items INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {items} (
+                _source TEXT NOT NULL,
+                _offset INTEGER NOT NULL,
+                PRIMARY KEY (_source, _offset)
+            );
+        '''.format(sources=SOURCES_TABLE, items=ITEMS_TABLE))
+        self.columns = self._read_columns()
+
+    def _read_columns(self):
+        cursor = self.connection.execute(
+            'PRAGMA table_info({})'.format(ITEMS_TABLE))
+        return [
+            row[1] for row in cursor.fetchall()
+            if not row[1].startswith('_')
+        ]
+
+    def close(self):
+        """Close the index database."""
+        self.connection.close()
+
+    def sources(self):
+        """Get the indexed sources and their checksums and sizes."""
+        cursor = self.connection.execute(
+            'SELECT _source, _checksum, _num_items FROM {}'.format(
+                SOURCES_TABLE))
+        return {
+            source: (checksum, num_items)
+            for source, checksum, num_items in cursor.fetchall()
+        }
+
+    def _add_columns(self, records):
+        new_columns = []
+        for record in records:
+            for column in record:
+                if column not in self.columns and column not in new_columns:
+                    quote_column(column)
+                    new_columns.append(column)
+
+        for column in new_columns:
+            self.connection.execute(
+                'ALTER TABLE {} ADD COLUMN {}'.format(
+                    ITEMS_TABLE, quote_column(column)))
+            self.columns.append(column)
+
+    def _insert(self, source, start, records):
+        records = [record or {} for record in records]
+        self._add_columns(records)
+
+        columns = ['_source', '_offset'] + self.columns
+        query = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            ITEMS_TABLE,
+            ', '.join(
+                column if column.startswith('_') else quote_column(column)
+                for column in columns),
+            ', '.join('?' * len(columns)))
+
+        rows = (
+            [source, start + offset] + [
+                record.get(column) for column in self.columns]
+            for offset, record in enumerate(records))
+        self.connection.executemany(query, rows)
+
+    def _set_source(self, source, checksum, num_items):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO {} VALUES (?, ?, ?)'.format(
+                SOURCES_TABLE),
+            (source, checksum, num_items))
+
+    def _remove_source(self, source):
+        for table in (ITEMS_TABLE, SOURCES_TABLE):
+            self.connection.execute(
+                'DELETE FROM {} WHERE _source = ?'.format(table),
+                (source,))
+
+    def update(self, dataset, metadata=None):
+        """Index the items of a dataset that are not indexed yet.
+
+        Shards of a :class:`ShardedDataset` are indexed from their stored
+        metadata, unless a metadata function is given. Only new shards, or
+        shards whose contents changed, are read.
+
+        For other datasets metadata must be a function that returns a
+        dictionary of metadata for every item. Only items after the last
+        indexed item are read, so the dataset should only grow by appending
+        items.
+
+        Returns
+        -------
+        int
+            The number of newly indexed items.
+        """
+        with self.connection:
+            if isinstance(dataset, ShardedDataset) and metadata is None:
+                return self._update_shards(dataset)
+
+            if metadata is None:
+                message = 'A metadata function is needed to index {}.'
+                raise ValueError(message.format(type(dataset).__name__))
+
+            return self._update_items(dataset, metadata)
+
+    def _update_shards(self, dataset):
+        if dataset.index is not None:
+            message = 'Index the full sharded dataset, not a subset.'
+            raise ValueError(message)
+
+        indexed = self.sources()
+        shards = dataset.manifest['shards']
+        count = 0
+
+        for number, shard in enumerate(shards):
+            checksum = shard.get('sha256')
+            known = indexed.get(shard['name'])
+            if known is not None and known[0] == checksum:
+                continue
+
+            self._remove_source(shard['name'])
+            records = dataset.shard_metadata(number)
+            self._insert(shard['name'], 0, records)
+            self._set_source(shard['name'], checksum, len(records))
+            count += len(records)
+
+        names = {shard['name'] for shard in shards}
+        for source in indexed:
+            if source not in names:
+                self._remove_source(source)
+
+        return count
+
+    def _update_items(self, dataset, metadata):
+        # Rows of shard metadata would duplicate the items of the dataset
+        indexed = self.sources()
+        for source in indexed:
+            if source != DEFAULT_SOURCE:
+                self._remove_source(source)
+
+        _, start = indexed.get(DEFAULT_SOURCE, (None, 0))
+
+        records = [metadata(item) for item in dataset.iter_from(start)]
+        self._insert(DEFAULT_SOURCE, start, records)
+        self._set_source(DEFAULT_SOURCE, None, start + len(records))
+        return len(records)
+
+    def _source_starts(self, dataset):
+        # Items indexed with a metadata function are stored by position
+        starts = {DEFAULT_SOURCE: 0}
+        if isinstance(dataset, ShardedDataset):
+            # pylint: disable=protected-access
+            starts.update(
+                (shard['name'], int(start))
+                for shard, start in zip(
+                    dataset.manifest['shards'], dataset._starts))
+        return starts
+
+    def positions(self, dataset, where=None, params=(), **equals):
+        """Get the sorted positions of the items that match a filter.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            The indexed dataset.
+        where : str, optional
+            A SQL condition on the metadata columns, with ``?`` parameters.
+        params : sequence, optional
+            Parameters of the condition.
+        **equals
+            Values that columns must be equal to (or be one of, for lists).
+
+        Returns
+        -------
+        numpy.ndarray
+            The positions of the matching items in the dataset.
+        """
+        condition, equal_params = build_condition(where, **equals)
+        cursor = self.connection.execute(
+            'SELECT _source, _offset FROM {} WHERE {}'.format(
+                ITEMS_TABLE, condition),
+            list(params) + equal_params)
+
+        starts = self._source_starts(dataset)
+        positions = np.fromiter(
+            (
+                starts[source] + offset
+                for source, offset in cursor
+                if source in starts
+            ),
+            dtype=np.int64)
+        positions.sort()
+        return positions
+
+    def subset(self, dataset, where=None, params=(), **equals):
+        """Get a lazy dataset of the items that match a filter.
+
+        Random access datasets are indexed by the matching positions, so
+        only the matching items are read. See :meth:`positions` for the
+        filter arguments.
+        """
+        positions = self.positions(dataset, where, params, **equals)
+
+        if is_random_access(dataset):
+            return dataset[positions]
+
+        return SubsetDataset(dataset, positions)
+
+    def to_frame(self, where=None, params=(), **equals):
+        """Get the metadata of the matching items as a dataframe."""
+        condition, equal_params = build_condition(where, **equals)
+        query = 'SELECT * FROM {} WHERE {} ORDER BY _source, _offset'.format(
+            ITEMS_TABLE, condition)
+        return pd.read_sql_query(
+            query,
+            self.connection,
+            params=list(params) + equal_params)
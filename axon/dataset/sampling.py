@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""Sampling Module.
+
+This module defines deterministic shuffling and sharding of datasets for
+multi-worker and multi-node reads.
+
+Random access datasets are shuffled with a seeded pseudo-random permutation
+that is computed position by position, so no shuffled index of the whole
+dataset is ever held in memory. The permuted positions are then dealt
+round-robin to all (node, worker) ranks, so every item is read exactly once
+per epoch. Streaming datasets are sharded round-robin and shuffled with a
+bounded shuffle buffer.
+"""
+import itertools
+
+import numpy as np
+
+from axon.dataset.base import Dataset
+from axon.fingerprint import combine
+
+
+FEISTEL_ROUNDS = 4
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def _mix(values, key):
+    """Pseudo-random function of a uint64 array and a key."""
+    values = (values ^ key) * np.uint64(0x9E3779B97F4A7C15)
+    values ^= values >> np.uint64(31)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(29)
+    return values
+
+
+class Permutation:
+    """Seeded pseudo-random permutation of range(length).
+
+    The permutation is a Feistel network over the smallest power of four
+    that fits length, restricted to range(length) by cycle walking. Any
+    entry can be computed in constant time and memory, and the same seed
+    always produces the same permutation.
+    """
+
+    def __init__(self, length, seed=0):
+        """Create a permutation of range(length)."""
+        if length < 0:
+            message = 'Length should be non negative. (length={})'
+            raise ValueError(message.format(length))
+
+        self.length = length
+        self.seed = seed
+
+        bits = max(int(length - 1).bit_length(), 2)
+        self._half_bits = np.uint64((bits + 1) // 2)
+        self._mask = np.uint64((1 << int(self._half_bits)) - 1)
+
+        sequence = np.random.SeedSequence(seed)
+        self._keys = sequence.generate_state(FEISTEL_ROUNDS, dtype=np.uint64)
+
+    def _encrypt(self, values):
+        left = values >> self._half_bits
+        right = values & self._mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix(right, key) & self._mask)
+        return (left << self._half_bits) | right
+
+    def take(self, positions):
+        """Return the permuted values of an array of positions."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if np.any((positions < 0) | (positions >= self.length)):
+            message = 'Positions out of range. (length={})'
+            raise IndexError(message.format(self.length))
+
+        values = self._encrypt(positions.astype(np.uint64))
+        outside = values >= self.length
+        while np.any(outside):
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= self.length
+
+        return values.astype(np.int64)
+
+    def __getitem__(self, position):
+        """Return the permuted value of a position."""
+        if position < 0:
+            position += self.length
+
+        return int(self.take([position])[0])
+
+    def __len__(self):
+        """Return the length of the permutation."""
+        return self.length
+
+    def __iter__(self):
+        """Iterate over the whole permutation."""
+        for start in range(0, self.length, DEFAULT_CHUNK_SIZE):
+            stop = min(start + DEFAULT_CHUNK_SIZE, self.length)
+            yield from self.take(np.arange(start, stop)).tolist()
+
+
+def get_rank(node=0, worker=0, workers_per_node=1):
+    """Get the global rank of a worker in a node."""
+    if not 0 <= worker < workers_per_node:
+        message = 'Worker rank out of range. (worker={}, workers={})'
+        raise ValueError(message.format(worker, workers_per_node))
+
+    return node * workers_per_node + worker
+
+
+class EpochSampler:
+    """Deterministic, sharded sampler of dataset positions.
+
+    Yields the positions of the dataset items that the given rank should read
+    in the current epoch. Across all ranks in range(world_size) every
+    position is yielded exactly once per epoch. If shuffle is True the
+    positions are shuffled by a permutation seeded with (seed, epoch), so a
+    run is reproducible from its seed.
+
+    Examples
+    --------
+    .. code-block:: python
+        rank = get_rank(node, worker, workers_per_node)
+        sampler = EpochSampler(len(dataset), seed=7, rank=rank,
+                               world_size=num_nodes * workers_per_node)
+        for epoch in range(epochs):
+            sampler.set_epoch(epoch)
+            for position in sampler:
+                item = dataset[position]
+    """
+
+    def __init__(
+            self,
+            length,
+            seed=0,
+            rank=0,
+            world_size=1,
+            shuffle=True,
+            epoch=0,
+            chunk_size=DEFAULT_CHUNK_SIZE):
+        """Create a sampler of range(length)."""
+        if not 0 <= rank < world_size:
+            message = 'Rank out of range. (rank={}, world_size={})'
+            raise ValueError(message.format(rank, world_size))
+
+        self.length = length
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.shuffle = shuffle
+        self.epoch = epoch
+        self.chunk_size = chunk_size
+
+    def set_epoch(self, epoch):
+        """Set the epoch used to seed the shuffle."""
+        self.epoch = epoch
+
+    def __len__(self):
+        """Return the number of positions of this rank."""
+        return len(range(self.rank, self.length, self.world_size))
+
+    def __iter__(self):
+        """Iterate over the positions of this rank."""
+        permutation = None
+        if self.shuffle:
+            seed = (self.seed, self.epoch)
+            permutation = Permutation(self.length, seed=seed)
+
+        step = self.chunk_size * self.world_size
+        for start in range(self.rank, self.length, step):
+            stop = min(start + step, self.length)
+            positions = np.arange(start, stop, self.world_size)
+
+            if permutation is not None:
+                positions = permutation.take(positions)
+
+            yield from positions.tolist()
+
+
+def shard_stream(iterable, rank=0, world_size=1):
+    """Yield the items of a stream that belong to the given rank."""
+    if not 0 <= rank < world_size:
+        message = 'Rank out of range. (rank={}, world_size={})'
+        raise ValueError(message.format(rank, world_size))
+
+    return itertools.islice(iterable, rank, None, world_size)
+
+
+def shuffle_stream(iterable, buffer_size, seed=0, epoch=0):
+    """Shuffle a stream with a bounded shuffle buffer.
+
+    Items are collected in a buffer of buffer_size items. Once the buffer
+    is full, every new item replaces a randomly chosen item of the buffer,
+    which is yielded. At the end of the stream the buffer is yielded in a
+    random order. The shuffle is seeded with (seed, epoch).
+    """
+    if buffer_size < 1:
+        message = 'Buffer size should be positive. (buffer_size={})'
+        raise ValueError(message.format(buffer_size))
+
+    random = np.random.default_rng((seed, epoch))
+    buffer = []
+
+    for item in iterable:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+
+        position = int(random.integers(buffer_size))
+        yield buffer[position]
+        buffer[position] = item
+
+    for position in random.permutation(len(buffer)):
+        yield buffer[position]
+
+
+class ShuffledStream(Dataset):
+    """Sharded and shuffled view of a streaming dataset.
+
+    Every rank reads the items of the stream at positions congruent to its
+    rank modulo world_size, and shuffles them with a bounded buffer of
+    buffer_size items seeded with (seed, epoch).
+    """
+
+    def __init__(
+            self,
+            dataset,
+            buffer_size=1024,
+            seed=0,
+            rank=0,
+            world_size=1,
+            epoch=0):
+        """Create a shuffled view of the dataset."""
+        if not 0 <= rank < world_size:
+            message = 'Rank out of range. (rank={}, world_size={})'
+            raise ValueError(message.format(rank, world_size))
+
+        self.dataset = dataset
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = epoch
+        self.datum_datatype = dataset.datum_datatype
+
+    def set_epoch(self, epoch):
+        """Set the epoch used to seed the shuffle."""
+        self.epoch = epoch
+
+    def iter(self):
+        """Iterate over the items of this rank in shuffled order."""
+        stream = shard_stream(self.dataset.iter(), self.rank, self.world_size)
+        return shuffle_stream(
+            stream,
+            self.buffer_size,
+            seed=self.seed,
+            epoch=self.epoch)
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the shuffle."""
+        return combine(
+            self.dataset.version(),
+            'shuffled_stream',
+            self.buffer_size,
+            self.seed,
+            self.rank,
+            self.world_size,
+            self.epoch)
+
+    def len(self):
+        """Return the number of items of this rank."""
+        length = self.dataset.len()
+        if length is None:
+            return None
+
+        return len(range(self.rank, length, self.world_size))
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""Sharded Dataset Module.
+
+This module defines the axon on-disk dataset format and its reader and
+writer. A sharded dataset is a directory with the following files::
+
+    manifest.json            Format version, item dtype and list of shards.
+    progress.json            Shards written so far, only while writing.
+    validation.json          Report of the last validation, if any.
+    schema.pkl               The pickled datum_datatype of the dataset.
+    shard-00000.npy          Concatenated item data of the first shard.
+    shard-00000.index.npz    Item offsets and lengths within the shard.
+    shard-00000.meta.json    Item metadata of the shard.
+    ...
+
+Items are numpy arrays that share dtype and shape except for the first axis.
+Shard data files are plain ``.npy`` files, so they can be opened with
+``np.memmap`` and items are read as zero-copy views.
+"""
+import copy
+import hashlib
+import json
+import numbers
+import os
+import pickle
+
+import numpy as np
+
+from axon.dataset.array_dataset import ArrayDataset
+from axon.dataset.base import Dataset
+from axon.fingerprint import fingerprint
+
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+VALIDATION = 'validation.json'
+PROGRESS = 'progress.json'
+SCHEMA = 'schema.pkl'
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+
+def shard_name(number):
+    """Get the name of the n-th shard."""
+    return 'shard-{:05d}'.format(number)
+
+
+def _write_atomic(path, write):
+    """Write a file through a temporary file and rename it into place."""
+    temporary = '{}.tmp'.format(path)
+    with open(temporary, 'wb') as fileobj:
+        write(fileobj)
+    os.replace(temporary, path)
+
+
+class ShardWriter:
+    """Writer of sharded datasets.
+
+    Items are buffered in memory until the shard reaches shard_bytes bytes
+    (or shard_items items, if given) and then written to disk. Every shard
+    file is written to a temporary file and renamed when complete, and the
+    manifest is only written on :meth:`close`, so a partially written
+    dataset is never mistaken for a complete one.
+
+    The shards written so far are recorded in a progress file after every
+    shard. If resume is True, writing continues after the last complete
+    shard, so an interrupted write can be resumed. Resuming a complete
+    dataset appends new shards to it.
+
+    Examples
+    --------
+    .. code-block:: python
+        with ShardWriter('clips/', datum_datatype=dtype) as writer:
+            for wav, site in recordings:
+                writer.write(wav, metadata={'site': site})
+    """
+
+    def __init__(
+            self,
+            path,
+            datum_datatype=None,
+            shard_bytes=DEFAULT_SHARD_BYTES,
+            shard_items=None,
+            resume=False):
+        """Create a writer for a dataset at the given directory."""
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.datum_datatype = datum_datatype
+        self.shard_bytes = shard_bytes
+        self.shard_items = shard_items
+
+        self.shards = []
+        self.dtype = None
+        self.item_shape = None
+
+        self._items = []
+        self._metadata = []
+        self._bytes = 0
+
+        schema_path = os.path.join(path, SCHEMA)
+        if resume and datum_datatype is None and os.path.exists(schema_path):
+            with open(schema_path, 'rb') as fileobj:
+                self.datum_datatype = pickle.load(fileobj)
+        else:
+            _write_atomic(
+                schema_path,
+                lambda fileobj: pickle.dump(datum_datatype, fileobj))
+
+        if resume:
+            self._resume()
+
+    def _resume(self):
+        for name in (PROGRESS, MANIFEST):
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                with open(path) as fileobj:
+                    self._restore(json.load(fileobj))
+                return
+
+    def _restore(self, progress):
+        self.shards = progress['shards']
+        if progress['dtype'] is not None:
+            self.dtype = np.dtype(progress['dtype'])
+            self.item_shape = tuple(progress['item_shape'])
+
+    @property
+    def num_items(self):
+        """Number of items written to complete shards."""
+        return sum(shard['num_items'] for shard in self.shards)
+
+    def __enter__(self):
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer if no error was raised."""
+        if exc_type is None:
+            self.close()
+
+    def write(self, item, metadata=None):
+        """Add an item to the dataset."""
+        item = np.asarray(item)
+
+        if item.ndim == 0:
+            message = 'Items should be arrays with at least one dimension.'
+            raise ValueError(message)
+
+        if self.dtype is None:
+            self.dtype = item.dtype
+            self.item_shape = item.shape[1:]
+
+        if item.dtype != self.dtype or item.shape[1:] != self.item_shape:
+            message = (
+                'All items should share dtype and trailing shape. '
+                '(expected={} {}, got={} {})')
+            message = message.format(
+                self.dtype, self.item_shape, item.dtype, item.shape[1:])
+            raise ValueError(message)
+
+        self._items.append(item)
+        self._metadata.append(metadata)
+        self._bytes += item.nbytes
+
+        if self._shard_full():
+            self.flush()
+
+    def _shard_full(self):
+        if self.shard_items is not None:
+            return len(self._items) >= self.shard_items
+
+        return self._bytes >= self.shard_bytes
+
+    def flush(self):
+        """Write all buffered items as a new shard."""
+        if not self._items:
+            return
+
+        name = shard_name(len(self.shards))
+        prefix = os.path.join(self.path, name)
+
+        lengths = np.array([len(item) for item in self._items], dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        data = np.concatenate(self._items)
+
+        _write_atomic(
+            prefix + '.npy',
+            lambda fileobj: np.save(fileobj, data, allow_pickle=False))
+        _write_atomic(
+            prefix + '.index.npz',
+            lambda fileobj: np.savez(
+                fileobj, offsets=offsets, lengths=lengths))
+        _write_atomic(
+            prefix + '.meta.json',
+            lambda fileobj: fileobj.write(
+                json.dumps(self._metadata).encode('utf-8')))
+
+        self.shards.append({
+            'name': name,
+            'num_items': len(self._items),
+            'sha256': hashlib.sha256(data.tobytes()).hexdigest(),
+        })
+        self._items = []
+        self._metadata = []
+        self._bytes = 0
+
+        progress = {
+            'dtype': None if self.dtype is None else self.dtype.str,
+            'item_shape': self.item_shape,
+            'shards': self.shards,
+        }
+        _write_atomic(
+            os.path.join(self.path, PROGRESS),
+            lambda fileobj: fileobj.write(
+                json.dumps(progress).encode('utf-8')))
+
+    def manifest(self):
+        """Build the manifest of the shards written so far."""
+        return {
+            'format_version': FORMAT_VERSION,
+            'num_items': self.num_items,
+            'dtype': None if self.dtype is None else self.dtype.str,
+            'item_shape': None if self.dtype is None else self.item_shape,
+            'datum_datatype': repr(self.datum_datatype),
+            'shards': self.shards,
+        }
+
+    def close(self):
+        """Write the last shard and the manifest."""
+        self.flush()
+
+        manifest = self.manifest()
+        _write_atomic(
+            os.path.join(self.path, MANIFEST),
+            lambda fileobj: fileobj.write(
+                json.dumps(manifest, indent=2).encode('utf-8')))
+
+        progress_path = os.path.join(self.path, PROGRESS)
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+
+def write_dataset(
+        dataset,
+        path,
+        metadata=None,
+        shard_bytes=DEFAULT_SHARD_BYTES,
+        shard_items=None):
+    """Pack a dataset into the sharded on-disk format.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The dataset to pack. Its items must be numpy arrays.
+    path : str
+        Directory of the new dataset.
+    metadata : callable, optional
+        Function that returns a JSON serializable dictionary of metadata for
+        every item.
+
+    Returns
+    -------
+    ShardedDataset
+        A reader of the written dataset.
+    """
+    writer = ShardWriter(
+        path,
+        datum_datatype=dataset.datum_datatype,
+        shard_bytes=shard_bytes,
+        shard_items=shard_items)
+
+    for item in dataset.iter():
+        item_metadata = None if metadata is None else metadata(item)
+        writer.write(item, metadata=item_metadata)
+
+    writer.close()
+    return ShardedDataset(path)
+
+
+class ShardedDataset(Dataset):
+    """Reader of sharded datasets.
+
+    Shards are opened lazily with ``np.memmap`` the first time one of their
+    items is accessed, and items are returned as read-only views of the
+    memory mapped file. Indexing with a slice, an integer array or a boolean
+    mask returns a new dataset over the same shards.
+    """
+
+    def __init__(self, path, index=None, manifest=None):
+        """Open the dataset stored at the given directory.
+
+        A manifest can be given to read the shards of a dataset that is
+        still being written (see :meth:`ShardWriter.manifest`).
+        """
+        if manifest is None:
+            manifest = self._read_manifest(path)
+
+        self.manifest = manifest
+
+        if self.manifest['format_version'] != FORMAT_VERSION:
+            message = 'Unsupported dataset format version. (version={})'
+            message = message.format(self.manifest['format_version'])
+            raise ValueError(message)
+
+        with open(os.path.join(path, SCHEMA), 'rb') as fileobj:
+            self.datum_datatype = pickle.load(fileobj)
+
+        self.path = path
+        self.index = None if index is None else np.asarray(index, np.int64)
+
+        counts = [shard['num_items'] for shard in self.manifest['shards']]
+        self._starts = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._starts[1:])
+        self._shards = {}
+        self._metadata = {}
+
+    @staticmethod
+    def _read_manifest(path):
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            message = 'No sharded dataset found at {}.'.format(path)
+            raise ValueError(message)
+
+        with open(manifest_path) as fileobj:
+            return json.load(fileobj)
+
+    @property
+    def num_shards(self):
+        """Number of shards of the dataset."""
+        return len(self.manifest['shards'])
+
+    def shard(self, number):
+        """Get a shard as an :class:`ArrayDataset` over its memory map."""
+        if number not in self._shards:
+            name = self.manifest['shards'][number]['name']
+            prefix = os.path.join(self.path, name)
+
+            data = np.load(prefix + '.npy', mmap_mode='r')
+            with np.load(prefix + '.index.npz') as index:
+                offsets = index['offsets']
+
+            self._shards[number] = ArrayDataset(
+                data,
+                offsets=offsets,
+                datum_datatype=self.datum_datatype)
+
+        return self._shards[number]
+
+    def shard_metadata(self, number):
+        """Get the metadata of all items of a shard.
+
+        The metadata file of a shard is read once and shared by all
+        subsets, so the returned list should not be modified.
+        """
+        if number not in self._metadata:
+            name = self.manifest['shards'][number]['name']
+            path = os.path.join(self.path, name + '.meta.json')
+            with open(path) as fileobj:
+                self._metadata[number] = json.load(fileobj)
+
+        return self._metadata[number]
+
+    def locate(self, position):
+        """Get the shard number and position within it of an item."""
+        number = int(np.searchsorted(self._starts, position, side='right')) - 1
+        return number, position - self._starts[number]
+
+    def len(self):
+        """Return the number of items."""
+        if self.index is not None:
+            return len(self.index)
+
+        return int(self._starts[-1])
+
+    def positions(self):
+        """Return the global positions of all items as an array."""
+        if self.index is not None:
+            return self.index
+
+        return np.arange(self._starts[-1])
+
+    def get(self, position):
+        """Return a view of the item at the given global position."""
+        number, local = self.locate(position)
+        return self.shard(number).get(local)
+
+    def metadata(self, position):
+        """Return the metadata of the item at the given global position."""
+        number, local = self.locate(position)
+        return self.shard_metadata(number)[local]
+
+    def version(self):
+        """Return a fingerprint of the shard contents and the index.
+
+        Shard checksums are stored in the manifest, so no data is read.
+        """
+        checksums = [shard['sha256'] for shard in self.manifest['shards']]
+        return fingerprint((
+            self.manifest['dtype'],
+            self.manifest['item_shape'],
+            checksums,
+            self.index))
+
+    def validation_path(self):
+        """Return the sidecar file of validation reports of the dataset.
+
+        Subsets have no default sidecar file.
+        """
+        if self.index is not None:
+            return None
+
+        return os.path.join(self.path, VALIDATION)
+
+    def iter(self):
+        """Iterate over views of the dataset items."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over views of the dataset items, starting at an item."""
+        if self.index is not None:
+            for position in self.index[start:]:
+                yield self.get(position)
+            return
+
+        number, local = self.locate(start)
+        for number in range(max(number, 0), self.num_shards):
+            yield from self.shard(number).iter_from(local)
+            local = 0
+
+    def __getitem__(self, key):
+        """Get an item view or a dataset view of a subset of items."""
+        if isinstance(key, numbers.Integral):
+            length = self.len()
+            if not -length <= key < length:
+                message = 'Dataset index out of range. (index={}, len={})'
+                raise IndexError(message.format(key, length))
+
+            if self.index is not None:
+                return self.get(int(self.index[key]))
+            return self.get(key % length)
+
+        if not isinstance(key, slice):
+            key = np.asarray(key)
+
+        # Subsets share the opened shards and their metadata
+        subset = copy.copy(self)
+        subset.index = self.positions()[key]
+        return subset
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""Dataset Transformations Module.
+
+This module defines lazy dataset transformations. Transformations do not
+read any item when they are created; they wrap their parent dataset and
+build a plan that is executed in a single streaming pass when the resulting
+dataset is iterated. Only the items being processed are held in memory.
+
+Transformations are usually created with the chainable methods of
+:class:`Dataset`:
+
+.. code-block:: python
+    features = (
+        recordings
+        .map(SpectrogramMaker())
+        .filter(lambda spec: spec.shape[1] > 10)
+        .batch(32))
+"""
+import itertools
+
+import numpy as np
+
+import axon.datatypes as dt
+from axon.dataset.base import Dataset
+from axon.fingerprint import combine
+from axon.fingerprint import fingerprint
+
+
+def get_output_dtype(process):
+    """Get the output DataType of a process or function.
+
+    Plain functions do not declare an output DataType, so None is returned.
+    """
+    if hasattr(process, 'get_output_dtype'):
+        return process.get_output_dtype()
+
+    return None
+
+
+class MappedDataset(Dataset):
+    """Dataset of the outputs of processes applied to every item.
+
+    Consecutive maps are merged into a single mapped dataset, so the items
+    are sent through the whole chain of processes in one step.
+    """
+
+    def __init__(self, dataset, processes):
+        """Create a mapped view of the dataset."""
+        self.dataset = dataset
+        self.processes = list(processes)
+
+        self.datum_datatype = dataset.datum_datatype
+        if self.processes:
+            self.datum_datatype = get_output_dtype(self.processes[-1])
+
+    def map(self, process):
+        """Append a process to the chain of processes."""
+        return MappedDataset(self.dataset, self.processes + [process])
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the processes."""
+        return combine(
+            self.dataset.version(),
+            'map',
+            [fingerprint(process) for process in self.processes])
+
+    def iter(self):
+        """Iterate over the processed items."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over the processed items, starting at an item.
+
+        Skipped items of the parent dataset are not processed.
+        """
+        processes = self.processes
+        for item in self.dataset.iter_from(start):
+            for process in processes:
+                item = process(item)
+            yield item
+
+    def len(self):
+        """Return the length of the parent dataset."""
+        return self.dataset.len()
+
+
+class FilteredDataset(Dataset):
+    """Dataset of the items for which a predicate is true.
+
+    The length of a filtered dataset is unknown until it is iterated, so
+    :meth:`len` returns None.
+    """
+
+    def __init__(self, dataset, predicate):
+        """Create a filtered view of the dataset."""
+        self.dataset = dataset
+        self.predicate = predicate
+        self.datum_datatype = dataset.datum_datatype
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the predicate."""
+        return combine(
+            self.dataset.version(),
+            'filter',
+            fingerprint(self.predicate))
+
+    def iter(self):
+        """Iterate over the items that satisfy the predicate."""
+        return filter(self.predicate, self.dataset.iter())
+
+    def len(self):
+        """Return None, the length of a filtered dataset is unknown."""
+        return None
+
+
+class BatchedDataset(Dataset):
+    """Dataset of lists of consecutive items.
+
+    The last batch may be smaller than batch_size unless drop_remainder is
+    True, in which case it is discarded.
+    """
+
+    def __init__(self, dataset, batch_size, drop_remainder=False):
+        """Create a batched view of the dataset."""
+        if batch_size < 1:
+            message = 'Batch size should be positive. (batch_size={})'
+            raise ValueError(message.format(batch_size))
+
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.drop_remainder = drop_remainder
+
+        self.datum_datatype = None
+        if dataset.datum_datatype is not None:
+            self.datum_datatype = dt.List(dataset.datum_datatype)
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the batch size."""
+        return combine(
+            self.dataset.version(),
+            'batch',
+            self.batch_size,
+            self.drop_remainder)
+
+    def iter(self):
+        """Iterate over the batches."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over the batches, starting at a batch."""
+        skipped = start * self.batch_size
+        iterator = iter(self.dataset.iter_from(skipped))
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                return
+
+            if len(batch) < self.batch_size and self.drop_remainder:
+                return
+
+            yield batch
+
+    def len(self):
+        """Return the number of batches, if the parent length is known."""
+        length = self.dataset.len()
+        if length is None:
+            return None
+
+        if self.drop_remainder:
+            return length // self.batch_size
+
+        return -(-length // self.batch_size)
+
+
+class UnbatchedDataset(Dataset):
+    """Dataset of the entries of every item.
+
+    Every item of the parent dataset must be iterable. Batches may have any
+    size, so :meth:`len` returns None.
+    """
+
+    def __init__(self, dataset):
+        """Create an unbatched view of the dataset."""
+        self.dataset = dataset
+        self.datum_datatype = getattr(
+            dataset.datum_datatype, 'list_item_type', None)
+
+    def version(self):
+        """Return a fingerprint of the parent dataset."""
+        return combine(self.dataset.version(), 'unbatch')
+
+    def iter(self):
+        """Iterate over the entries of all items."""
+        return itertools.chain.from_iterable(self.dataset.iter())
+
+    def len(self):
+        """Return None, the number of entries is unknown."""
+        return None
+
+
+class TakenDataset(Dataset):
+    """Dataset of the first items of another dataset."""
+
+    def __init__(self, dataset, count):
+        """Create a view of the first count items of the dataset."""
+        if count < 0:
+            message = 'Count should be non negative. (count={})'
+            raise ValueError(message.format(count))
+
+        self.dataset = dataset
+        self.count = count
+        self.datum_datatype = dataset.datum_datatype
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the count."""
+        return combine(self.dataset.version(), 'take', self.count)
+
+    def iter(self):
+        """Iterate over the first items."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over the first items, starting at an item."""
+        stop = max(self.count - start, 0)
+        return itertools.islice(self.dataset.iter_from(start), stop)
+
+    def len(self):
+        """Return the number of items, if it is known."""
+        length = self.dataset.len()
+        if length is None:
+            return None
+
+        return min(length, self.count)
+
+
+class InterleavedDataset(Dataset):
+    """Dataset that alternates between the items of several datasets.
+
+    Blocks of block_length items are read from every dataset in turn.
+    Exhausted datasets are skipped until all of them are exhausted.
+    """
+
+    def __init__(self, datasets, block_length=1):
+        """Create an interleaved view of the datasets."""
+        if not datasets:
+            raise ValueError('At least one dataset is needed to interleave.')
+
+        if block_length < 1:
+            message = 'Block length should be positive. (block_length={})'
+            raise ValueError(message.format(block_length))
+
+        self.datasets = list(datasets)
+        self.block_length = block_length
+
+        datatypes = [dataset.datum_datatype for dataset in self.datasets]
+        self.datum_datatype = datatypes[0]
+        if any(datatype != datatypes[0] for datatype in datatypes[1:]):
+            self.datum_datatype = None
+
+    def version(self):
+        """Return a fingerprint of all datasets and the block length."""
+        return combine(
+            *[dataset.version() for dataset in self.datasets],
+            'interleave',
+            self.block_length)
+
+    def iter(self):
+        """Iterate over blocks of items of every dataset in turn."""
+        iterators = [iter(dataset.iter()) for dataset in self.datasets]
+        while iterators:
+            active = []
+            for iterator in iterators:
+                block = list(itertools.islice(iterator, self.block_length))
+                yield from block
+
+                if len(block) == self.block_length:
+                    active.append(iterator)
+            iterators = active
+
+    def len(self):
+        """Return the total number of items, if all lengths are known."""
+        lengths = [dataset.len() for dataset in self.datasets]
+        if any(length is None for length in lengths):
+            return None
+
+        return sum(lengths)
+
+
+class SubsetDataset(Dataset):
+    """Dataset of the items of another dataset at the given positions.
+
+    Positions must be sorted. The parent dataset is read sequentially up to
+    the last position, so prefer indexing random access datasets directly.
+    """
+
+    def __init__(self, dataset, positions):
+        """Create a view of the items at the given positions."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if np.any(np.diff(positions) <= 0):
+            message = 'Subset positions should be sorted and unique.'
+            raise ValueError(message)
+
+        self.dataset = dataset
+        self.positions = positions
+        self.datum_datatype = dataset.datum_datatype
+
+    def version(self):
+        """Return a fingerprint of the parent dataset and the positions."""
+        return combine(self.dataset.version(), 'subset', self.positions)
+
+    def iter(self):
+        """Iterate over the selected items."""
+        if self.positions.size == 0:
+            return
+
+        wanted = iter(self.positions.tolist())
+        target = next(wanted)
+        items = self.dataset.iter_from(target)
+        for position, item in enumerate(items, start=target):
+            if position != target:
+                continue
+
+            yield item
+            target = next(wanted, None)
+            if target is None:
+                return
+
+    def len(self):
+        """Return the number of selected items."""
+        return len(self.positions)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Dataset Validation Module.
+
+This module checks all items of a dataset against its datum_datatype in a
+single bulk pass. Items are validated in batches by a pool of workers, and
+the result is stored in a sidecar JSON file together with the fingerprint
+of the schema and the version of the dataset. A dataset is only validated
+again when its contents or its schema change, and readers of a validated
+dataset can skip per-item checks.
+"""
+import collections
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from axon.fingerprint import fingerprint
+
+
+DEFAULT_BATCH_SIZE = 1024
+
+
+def schema_fingerprint(datatype):
+    """Get the fingerprint of a DataType."""
+    return fingerprint(('schema', repr(datatype)))
+
+
+class ValidationReport:
+    """Result of the validation of a dataset.
+
+    Attributes
+    ----------
+    schema : str
+        Fingerprint of the datum_datatype the dataset was validated against.
+    version : str
+        Version of the validated dataset.
+    num_items : int
+        Number of validated items.
+    invalid : list of int
+        Positions of the items that did not validate.
+    """
+
+    def __init__(self, schema, version, num_items, invalid):
+        """Create a validation report."""
+        self.schema = schema
+        self.version = version
+        self.num_items = num_items
+        self.invalid = list(invalid)
+
+    @property
+    def valid(self):
+        """Whether all items are valid."""
+        return not self.invalid
+
+    def is_current(self, dataset):
+        """Check whether the report applies to the dataset as it is now."""
+        version = dataset.version()
+        if version is None or version != self.version:
+            return False
+
+        return self.schema == schema_fingerprint(dataset.datum_datatype)
+
+    def to_dict(self):
+        """Return the report as a dictionary."""
+        return {
+            'schema': self.schema,
+            'version': self.version,
+            'num_items': self.num_items,
+            'invalid': self.invalid,
+        }
+
+    def save(self, path):
+        """Write the report to a sidecar file."""
+        temporary = '{}.tmp'.format(path)
+        with open(temporary, 'w') as fileobj:
+            json.dump(self.to_dict(), fileobj)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a report from a sidecar file, if it exists."""
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as fileobj:
+            return cls(**json.load(fileobj))
+
+
+def _validate_batch(datatype, start, items):
+    """Get the positions of the invalid items of a batch."""
+    results = datatype.validate_many(items)
+    return [
+        start + offset
+        for offset, result in enumerate(results)
+        if not result
+    ]
+
+
+def validate_dataset(
+        dataset,
+        path=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        workers=4,
+        force=False):
+    """Validate all items of a dataset against its datum_datatype.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The dataset to validate.
+    path : str, optional
+        Sidecar file of the validation report. If a current report is found
+        there the dataset is not read again, unless force is True.
+    batch_size : int
+        Number of items validated at once by a worker.
+    workers : int
+        Number of worker threads.
+
+    Returns
+    -------
+    ValidationReport
+        The validation report.
+    """
+    datatype = dataset.datum_datatype
+    if datatype is None:
+        message = 'Dataset has no datum_datatype to validate against.'
+        raise ValueError(message)
+
+    if path is not None and not force:
+        report = ValidationReport.load(path)
+        if report is not None and report.is_current(dataset):
+            return report
+
+    invalid = []
+    num_items = 0
+    pending = collections.deque()
+    items = iter(dataset.iter())
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(itertools.islice(items, batch_size))
+            if batch:
+                pending.append(executor.submit(
+                    _validate_batch, datatype, num_items, batch))
+                num_items += len(batch)
+
+            # Bound the number of batches held in memory
+            if pending and (not batch or len(pending) > 2 * workers):
+                invalid.extend(pending.popleft().result())
+
+            if not batch and not pending:
+                break
+
+    report = ValidationReport(
+        schema=schema_fingerprint(datatype),
+        version=dataset.version(),
+        num_items=num_items,
+        invalid=invalid)
+
+    if path is not None and report.version is not None:
+        report.save(path)
+
+    return report
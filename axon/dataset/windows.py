@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Windowed Dataset Module.
+
+This module defines a dataset of fixed length sliding windows over a long
+recording. Windows are strided views into the recording, so no sample is
+copied, and recordings stored on disk are memory mapped so only the windows
+being read are loaded.
+"""
+import numbers
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+import axon.datatypes as dt
+from axon.dataset.base import Dataset
+from axon.dataset.collate import get_item_datatype
+from axon.fingerprint import combine
+from axon.fingerprint import fingerprint
+
+
+PADDING_POLICIES = ('drop', 'pad')
+
+
+def sliding_windows(array, window_length, hop):
+    """Get a read-only strided view of all full windows of an array.
+
+    Windows are taken along the first axis, so the view has shape
+    ``(num_windows, window_length) + array.shape[1:]``.
+    """
+    array = np.asarray(array)
+    num_windows = 0
+    if len(array) >= window_length:
+        num_windows = (len(array) - window_length) // hop + 1
+
+    shape = (num_windows, window_length) + array.shape[1:]
+    strides = (array.strides[0] * hop,) + array.strides
+    return as_strided(array, shape=shape, strides=strides, writeable=False)
+
+
+def open_recording(recording, dtype=None, shape=None):
+    """Open a recording given as an array or a file path.
+
+    ``.npy`` files are memory mapped with ``np.load``. Other files are read
+    as raw samples with ``np.memmap``, so their dtype must be given.
+    """
+    if not isinstance(recording, str):
+        return recording
+
+    if recording.endswith('.npy'):
+        return np.load(recording, mmap_mode='r')
+
+    if dtype is None:
+        message = 'The dtype of raw recording files must be given. (path={})'
+        raise ValueError(message.format(recording))
+
+    return np.memmap(recording, dtype=dtype, mode='r', shape=shape)
+
+
+class WindowedDataset(Dataset):
+    """Dataset of sliding windows over a recording.
+
+    Items are (offset, window) pairs, where window is a read-only view of
+    window_length samples of the recording and offset is its start, in
+    seconds if a sample rate is given or in samples otherwise.
+
+    If padding is 'drop' only complete windows are returned. If padding is
+    'pad' windows that extend beyond the end of the recording are padded
+    with pad_value; only these last windows are copied.
+
+    Examples
+    --------
+    .. code-block:: python
+        windows = WindowedDataset(
+            'recording.npy', window_length=48000, hop=24000,
+            sample_rate=48000, padding='pad')
+
+        for offsets, batch in windows.batches(256):
+            scores = detector(batch)
+    """
+
+    def __init__(
+            self,
+            recording,
+            window_length,
+            hop=None,
+            padding='drop',
+            pad_value=0,
+            sample_rate=None,
+            dtype=None):
+        """Create a windowed view of a recording."""
+        if padding not in PADDING_POLICIES:
+            message = 'Unknown padding {}. Valid options are: {}'
+            message = message.format(padding, ', '.join(PADDING_POLICIES))
+            raise ValueError(message)
+
+        if hop is None:
+            hop = window_length
+
+        if window_length < 1 or hop < 1:
+            message = (
+                'Window length and hop should be positive. '
+                '(window_length={}, hop={})')
+            raise ValueError(message.format(window_length, hop))
+
+        self.recording = open_recording(recording, dtype=dtype)
+        self.window_length = window_length
+        self.hop = hop
+        self.padding = padding
+        self.pad_value = pad_value
+        self.sample_rate = sample_rate
+
+        self.windows = sliding_windows(self.recording, window_length, hop)
+        self._tail = self._padded_tail()
+
+        self.datum_datatype = dt.Tuple([
+            dt.Float() if sample_rate else dt.Int(),
+            dt.NumpyArray(
+                get_item_datatype(self.recording.dtype),
+                self.windows.shape[1:]),
+        ])
+
+    def _padded_tail(self):
+        """Copy the windows that extend beyond the end of the recording.
+
+        Padded windows are added until every sample of the recording is
+        covered by a window.
+        """
+        length = len(self.recording)
+        num_windows = 0
+        if self.padding == 'pad' and length > 0:
+            overflow = max(length - self.window_length, 0)
+            num_windows = -(-overflow // self.hop) + 1 - len(self.windows)
+
+        shape = (max(num_windows, 0), self.window_length)
+        shape += self.recording.shape[1:]
+        if num_windows <= 0:
+            return np.empty(shape, dtype=self.recording.dtype)
+
+        start = len(self.windows) * self.hop
+        padded_length = (num_windows - 1) * self.hop + self.window_length
+        tail = self.recording[start:start + padded_length]
+
+        padded = np.full(
+            (padded_length,) + tail.shape[1:],
+            self.pad_value,
+            dtype=self.recording.dtype)
+        padded[:len(tail)] = tail
+        return sliding_windows(padded, self.window_length, self.hop)
+
+    def version(self):
+        """Return a fingerprint of the recording and window parameters."""
+        return combine(
+            fingerprint(np.asarray(self.recording)),
+            'windows',
+            self.window_length,
+            self.hop,
+            self.padding,
+            self.pad_value,
+            self.sample_rate)
+
+    def len(self):
+        """Return the number of windows."""
+        return len(self.windows) + len(self._tail)
+
+    def offsets(self):
+        """Return the start offsets of all windows as an array."""
+        starts = np.arange(self.len()) * self.hop
+        if self.sample_rate:
+            return starts / self.sample_rate
+
+        return starts
+
+    def window(self, number):
+        """Return the view of the n-th window."""
+        if number < len(self.windows):
+            return self.windows[number]
+
+        return self._tail[number - len(self.windows)]
+
+    def __getitem__(self, number):
+        """Return the (offset, window) pair of the n-th window."""
+        if not isinstance(number, numbers.Integral):
+            message = 'Windows can only be indexed by integers. (type={})'
+            raise IndexError(message.format(type(number)))
+
+        length = self.len()
+        if not -length <= number < length:
+            message = 'Window index out of range. (index={}, len={})'
+            raise IndexError(message.format(number, length))
+
+        if number < 0:
+            number += length
+
+        return self._offset(number), self.window(number)
+
+    def _offset(self, number):
+        start = number * self.hop
+        if self.sample_rate:
+            return start / self.sample_rate
+
+        return start
+
+    def iter(self):
+        """Iterate over (offset, window) pairs."""
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Iterate over (offset, window) pairs, starting at a window."""
+        for number in range(start, self.len()):
+            yield self._offset(number), self.window(number)
+
+    def batches(self, batch_size):
+        """Iterate over batches of windows.
+
+        Yields (offsets, windows) pairs where windows is a strided view of
+        shape ``(batch_size, window_length, ...)`` into the recording, ready
+        for vectorized feature extraction. Only a batch that includes padded
+        windows is copied.
+        """
+        if batch_size < 1:
+            message = 'Batch size should be positive. (batch_size={})'
+            raise ValueError(message.format(batch_size))
+
+        offsets = self.offsets()
+        full = len(self.windows)
+        for start in range(0, self.len(), batch_size):
+            stop = min(start + batch_size, self.len())
+
+            if stop <= full:
+                windows = self.windows[start:stop]
+            else:
+                windows = np.concatenate([
+                    self.windows[start:full],
+                    self._tail[max(start - full, 0):stop - full]])
+
+            yield offsets[start:stop], windows
@@ -28,6 +28,14 @@ class DataType(ABC):
     def validate(self, other):
         """Check if object is of this datatype."""
 
+    def validate_many(self, others):
+        """Check which of several objects are of this datatype.
+
+        Returns a list of booleans. Rewrite if objects can be checked in
+        bulk faster than one by one.
+        """
+        return [self.validate(other) for other in others]
+
     def __eq__(self, other):
         """Check if two datatypes are the same."""
         return isinstance(other, type(self))
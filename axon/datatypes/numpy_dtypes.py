@@ -52,15 +52,48 @@ class NumpyArray(DataType):
             return False
 
         # Verify shape is correct
-        if not self.shape == other.shape:
+        if not tuple(self.shape) == other.shape:
             return False
 
-        # Verify all entries correspond to the correct DataType
-        aux = other.reshape(np.prod(other.shape))
-        for item in aux:
-            if not self.nparray_item_type.validate(item):
-                return False
-        return True
+        return self._validate_entries(other)
+
+    def _validate_entries(self, other):
+        """Check if all entries correspond to the correct DataType."""
+        if other.size == 0:
+            return True
+
+        # Entries of non object arrays share their type, so checking a
+        # single representative entry is enough
+        if other.dtype != np.object_:
+            return self.nparray_item_type.validate(other.flat[0].item())
+
+        return all(
+            self.nparray_item_type.validate(item)
+            for item in other.flat)
+
+    def validate_many(self, others):
+        """Check which of several objects are Numpy Arrays of this type.
+
+        Entry types are checked once per distinct array dtype.
+        """
+        shape = tuple(self.shape)
+        valid_dtypes = {}
+        results = []
+
+        for other in others:
+            if not isinstance(other, np.ndarray) or other.shape != shape:
+                results.append(False)
+                continue
+
+            if other.dtype == np.object_ or other.size == 0:
+                results.append(self._validate_entries(other))
+                continue
+
+            if other.dtype not in valid_dtypes:
+                valid_dtypes[other.dtype] = self._validate_entries(other)
+            results.append(valid_dtypes[other.dtype])
+
+        return results
 
     def __eq__(self, other):
         """Check if other is the same NumpyArray DataType."""
@@ -71,14 +104,16 @@ class NumpyArray(DataType):
         if not hasattr(other, 'nparray_item_type'):
             return False
 
-        if not self.shape == other.shape:
+        if not tuple(self.shape) == tuple(other.shape):
             return False
 
         return self.nparray_item_type == other.nparray_item_type
 
     def __repr__(self):
         """Get full representation."""
-        return 'NumpyArray({})'.format(repr(self.nparray_item_type))
+        return 'NumpyArray({}, {})'.format(
+            repr(self.nparray_item_type),
+            tuple(self.shape))
 
     def __str__(self):
         """Get string representation."""
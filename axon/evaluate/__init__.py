@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Evaluate module.
+
+This module contains the base classes of sharded, parallel model
+evaluations and streaming, mergeable metric accumulators.
+"""
+from .evaluator import Evaluator
+from .evaluator import MLFlowEvaluator
+from .metrics import BinnedCurve
+from .metrics import ConfusionMatrix
+from .metrics import EventMatcher
+from .metrics import Metric
+from .metrics import merge
+
+
+__all__ = [
+    'Evaluator',
+    'MLFlowEvaluator',
+    'BinnedCurve',
+    'ConfusionMatrix',
+    'EventMatcher',
+    'Metric',
+    'merge',
+]
@@ -1,6 +1,338 @@
+# -*- coding: utf-8 -*-
+"""Evaluator Module.
+
+This module defines the base class of model evaluations. Evaluations are
+run as a map-reduce: the dataset is split into shards of consecutive items,
+metric accumulators are updated with every shard, possibly on different
+workers, and the accumulators of all shards are merged into the final
+metrics.
+"""
 from abc import ABC
-from axon.process import Process
+from abc import abstractmethod
+from concurrent.futures import as_completed
+import glob
+import itertools
+import json
+import os
+import pickle
+
+import mlflow
+import numpy as np
+
+from axon.evaluate.metrics import merge
+from axon.fingerprint import combine
+from axon.processes import Process
+from axon.processes.mlflow_process import MLFlowMixin
+
+
+MANIFEST = 'evaluation.json'
+
+
+def shard_bounds(length, num_shards):
+    """Split positions into at most num_shards ranges of similar size.
+
+    Datasets of unknown length are a single shard that ends at None.
+    """
+    if length is None:
+        if num_shards > 1:
+            message = 'Sharded evaluation needs a dataset of known length.'
+            raise ValueError(message)
+
+        return [(0, None)]
+
+    edges = np.linspace(0, length, max(num_shards, 1) + 1).astype(int)
+    return [
+        (int(start), int(stop))
+        for start, stop in zip(edges[:-1], edges[1:])
+        if stop > start
+    ]
+
+
+def evaluate_shard(evaluator, dataset, start, stop):
+    """Accumulate the metrics of the items in a range of positions."""
+    if stop is None:
+        return evaluator.accumulate(dataset.iter_from(start))
+
+    items = itertools.islice(dataset.iter_from(start), stop - start)
+    return evaluator.accumulate(items)
+
+
+def to_json(value):
+    """Convert metric results to JSON serializable values."""
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+
+    return value
+
+
+def scalar_results(results):
+    """Get the scalar entries of metric results as 'metric/entry' values."""
+    scalars = {}
+    for name, result in results.items():
+        for key, value in result.items():
+            if np.ndim(value) == 0:
+                scalars['{}/{}'.format(name, key)] = float(value)
+    return scalars
+
+
+class ShardCheckpoint:
+    """Directory of the accumulators of the finished shards of an evaluation.
+
+    The directory is tied to a key describing the evaluation. If the key
+    changes (because the evaluator, the dataset or the shards changed) the
+    stored accumulators are discarded.
+    """
+
+    def __init__(self, path, key):
+        """Open a checkpoint directory."""
+        self.path = path
+        self.key = key
+
+        os.makedirs(path, exist_ok=True)
+        manifest = os.path.join(path, MANIFEST)
+
+        stored = None
+        if os.path.exists(manifest):
+            with open(manifest) as fileobj:
+                stored = json.load(fileobj)
+
+        if stored != key:
+            for shard in glob.glob(os.path.join(path, 'shard-*.pkl')):
+                os.remove(shard)
+
+            with open(manifest, 'w') as fileobj:
+                json.dump(key, fileobj)
+
+    def shard_path(self, index):
+        """Get the file of the accumulators of a shard."""
+        return os.path.join(self.path, 'shard-{:06d}.pkl'.format(index))
+
+    def load(self):
+        """Load the accumulators of the finished shards, by shard index."""
+        done = {}
+        for index in range(len(self.key['shards'])):
+            path = self.shard_path(index)
+            if os.path.exists(path):
+                with open(path, 'rb') as fileobj:
+                    done[index] = pickle.load(fileobj)
+        return done
+
+    def save(self, index, metrics):
+        """Store the accumulators of a finished shard."""
+        path = self.shard_path(index)
+        temporary = '{}.tmp'.format(path)
+        with open(temporary, 'wb') as fileobj:
+            pickle.dump(metrics, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
 
 
 class Evaluator(Process, ABC):
-    pass
+    """Evaluator base class.
+
+    An evaluator streams a dataset through a set of metric accumulators
+    (see :mod:`axon.evaluate.metrics`) and returns their results. Items are
+    never collected, so memory use does not depend on the size of the
+    dataset.
+
+    Every item is passed to :meth:`predict` and the prediction to
+    :meth:`update`. Evaluators are sent to workers pickled.
+
+    Examples
+    --------
+    .. code-block:: python
+        class ClassifierEvaluator(Evaluator):
+            name = 'Classifier Evaluator'
+
+            def metrics(self):
+                return {'confusion': ConfusionMatrix(num_classes=10)}
+
+            def predict(self, batch):
+                features, labels = batch
+                return labels, self.model(features)
+
+            def update(self, metrics, prediction):
+                labels, scores = prediction
+                metrics['confusion'].update(labels, scores)
+
+        with ProcessPoolExecutor(8) as executor:
+            results = ClassifierEvaluator().evaluate(
+                dataset,
+                num_shards=64,
+                executor=executor,
+                checkpoint_dir='evaluation')
+    """
+
+    # Methods that define the computation of an evaluation
+    evaluation_methods = ('metrics', 'predict', 'update', 'accumulate')
+
+    def fingerprint(self):
+        """Get a fingerprint of the evaluation.
+
+        Covers the process fingerprint and the code of the methods of the
+        evaluation, so changing the predictions or the metrics changes it.
+        """
+        cls = type(self)
+        methods = [getattr(cls, name) for name in self.evaluation_methods]
+        return combine(super().fingerprint(), methods)
+
+    @abstractmethod
+    def metrics(self):
+        """Create the empty metric accumulators of the evaluation.
+
+        Returns
+        -------
+        dict
+            Accumulators by name.
+        """
+
+    def predict(self, item):
+        """Get the prediction of an item. Returns the item by default."""
+        return item
+
+    @abstractmethod
+    def update(self, metrics, item):
+        """Update the accumulators with a prediction (usually a batch)."""
+
+    def accumulate(self, items, metrics=None):
+        """Update the accumulators with every item of an iterable."""
+        if metrics is None:
+            metrics = self.metrics()
+
+        for item in items:
+            self.update(metrics, self.predict(item))
+
+        return metrics
+
+    def reduce(self, partials):
+        """Merge the accumulators of several shards."""
+        partials = list(partials)
+        if not partials:
+            return self.metrics()
+
+        return {
+            name: merge(partial[name] for partial in partials)
+            for name in partials[0]
+        }
+
+    def evaluate(
+            self,
+            dataset,
+            num_shards=1,
+            executor=None,
+            checkpoint_dir=None,
+            run_key=None):
+        """Evaluate a dataset shard by shard.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Dataset to evaluate. Datasets of unknown length can only be
+            evaluated in a single shard.
+        num_shards : int
+            Number of shards of consecutive items.
+        executor : concurrent.futures.Executor, optional
+            Executor that evaluates the shards. Shards are evaluated one
+            after the other in the current process by default.
+        checkpoint_dir : str, optional
+            Directory where the accumulators of finished shards are stored.
+            An interrupted evaluation with the same evaluator, dataset
+            version and shards resumes from them. Datasets without a
+            version are assumed not to change.
+        run_key : str, optional
+            Key of the evaluator in checkpoints, used instead of its
+            fingerprint. Needed by evaluators with attributes that cannot be
+            fingerprinted, such as loaded models.
+
+        Returns
+        -------
+        dict
+            Results of every metric.
+        """
+        bounds = shard_bounds(dataset.len(), num_shards)
+
+        checkpoint = None
+        partials = {}
+        if checkpoint_dir is not None:
+            checkpoint = ShardCheckpoint(checkpoint_dir, {
+                'evaluator': run_key or self.fingerprint(),
+                'dataset': dataset.version(),
+                'shards': [list(bound) for bound in bounds],
+            })
+            partials = checkpoint.load()
+
+        pending = [
+            index for index in range(len(bounds)) if index not in partials]
+
+        for index, metrics in self._map_shards(
+                dataset, bounds, pending, executor):
+            partials[index] = metrics
+            if checkpoint is not None:
+                checkpoint.save(index, metrics)
+
+        metrics = self.reduce(partials[index] for index in range(len(bounds)))
+        return self.finish(metrics)
+
+    def _map_shards(self, dataset, bounds, indices, executor):
+        if executor is None:
+            for index in indices:
+                yield index, evaluate_shard(self, dataset, *bounds[index])
+            return
+
+        futures = {
+            executor.submit(evaluate_shard, self, dataset, *bounds[index]):
+            index
+            for index in indices
+        }
+
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def finish(self, metrics):
+        """Compute and log the results of the final accumulators."""
+        results = {name: metric.result() for name, metric in metrics.items()}
+        self.log_results(results)
+        return results
+
+    def log_results(self, results):
+        """Log the final results of an evaluation. Does nothing by default."""
+
+    def run(self, items):  # pylint: disable=arguments-differ
+        """Evaluate the items of any iterable in a single pass.
+
+        Use :meth:`evaluate` to evaluate a dataset in parallel shards.
+        """
+        return self.finish(self.accumulate(items))
+
+
+class MLFlowEvaluator(MLFlowMixin, Evaluator):
+    """Evaluator that logs its final results to mlflow once.
+
+    Scalar results are logged as ``<metric>/<entry>`` metrics, and all
+    results, including curves and matrices, as the
+    ``evaluation/results.json`` artifact.
+    """
+
+    # pylint: disable=abstract-method
+
+    def log_results(self, results):
+        """Log results in the current run, or in a new one."""
+        if self.mlflow_run is None:
+            with self.scope():
+                self._log_results(results)
+            return
+
+        self._log_results(results)
+
+    def _log_results(self, results):
+        self._write_metrics(scalar_results(results))
+        mlflow.log_dict(to_json(results), 'evaluation/results.json')
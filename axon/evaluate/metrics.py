@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+"""Metrics Module.
+
+This module defines streaming metric accumulators. Accumulators are updated
+with one batch of labels and predictions at a time and keep only fixed size
+counts, so evaluating any number of items needs constant memory. Counts of
+accumulators updated on different workers are combined with
+:meth:`Metric.merge`.
+
+Examples
+--------
+.. code-block:: python
+    matrix = ConfusionMatrix(num_classes=3)
+    for labels, scores in batches:
+        matrix.update(labels, scores)
+
+    matrix.result()['f1']
+"""
+from abc import ABC
+from abc import abstractmethod
+import copy
+
+import numpy as np
+
+
+DEFAULT_NUM_BINS = 1000
+
+
+def safe_divide(numerator, denominator):
+    """Divide arrays, returning zero where the denominator is zero."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    result = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def score_bins(scores, num_bins):
+    """Get the fixed-width bin of every score in the [0, 1] interval."""
+    bins = np.floor(np.clip(scores, 0, 1) * num_bins).astype(np.int64)
+    return np.minimum(bins, num_bins - 1)
+
+
+def cumulative_from_top(histogram):
+    """Count the entries at or above every bin, from the last axis."""
+    return np.flip(np.cumsum(np.flip(histogram, -1), axis=-1), -1)
+
+
+class Metric(ABC):
+    """Streaming metric accumulator base class.
+
+    Accumulators hold their counts in numpy arrays listed in ``counts``, so
+    they can be merged by adding them. Accumulators can be pickled to send
+    them between processes.
+    """
+
+    counts = ()
+
+    @abstractmethod
+    def update(self, *args, **kwargs):
+        """Add a batch of labels and predictions to the counts."""
+
+    @abstractmethod
+    def result(self):
+        """Compute the metrics from the counts accumulated so far."""
+
+    @property
+    def config(self):
+        """Parameters that must be equal to merge two accumulators."""
+        return {}
+
+    def reset(self):
+        """Set all counts to zero."""
+        for name in self.counts:
+            getattr(self, name)[...] = 0
+
+    def merge(self, other):
+        """Add the counts of another accumulator, in place.
+
+        Returns the accumulator, so merges can be chained.
+        """
+        if type(other) is not type(self) or other.config != self.config:
+            message = 'Cannot merge {!r} into {!r}.'
+            raise ValueError(message.format(other, self))
+
+        for name in self.counts:
+            getattr(self, name)[...] += getattr(other, name)
+
+        return self
+
+    def empty(self):
+        """Get an accumulator of the same kind with no counts."""
+        other = copy.deepcopy(self)
+        other.reset()
+        return other
+
+    def __repr__(self):
+        """Get full representation."""
+        arguments = ', '.join(
+            '{}={!r}'.format(key, value) for key, value in self.config.items())
+        return '{}({})'.format(type(self).__name__, arguments)
+
+
+def merge(metrics):
+    """Merge a sequence of accumulators into a new one."""
+    metrics = list(metrics)
+    if not metrics:
+        message = 'At least one accumulator is needed to merge.'
+        raise ValueError(message)
+
+    result = metrics[0].empty()
+    for metric in metrics:
+        result.merge(metric)
+    return result
+
+
+class ConfusionMatrix(Metric):
+    """Confusion matrix with per class precision, recall and F1 score.
+
+    Rows of the matrix are true classes and columns predicted classes.
+
+    Parameters
+    ----------
+    num_classes : int
+        Number of classes.
+    """
+
+    counts = ('matrix',)
+
+    def __init__(self, num_classes):
+        """Create an empty confusion matrix."""
+        if num_classes < 1:
+            message = 'Number of classes should be positive. (num_classes={})'
+            raise ValueError(message.format(num_classes))
+
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    @property
+    def config(self):
+        """Number of classes."""
+        return {'num_classes': self.num_classes}
+
+    def update(self, labels, predictions):
+        """Add a batch of labels and predictions.
+
+        Parameters
+        ----------
+        labels : array of int
+            True class of every item.
+        predictions : array
+            Predicted class of every item, or an array of shape
+            (items, num_classes) of class scores.
+        """
+        labels = np.asarray(labels, dtype=np.int64).ravel()
+        predictions = np.asarray(predictions)
+        if predictions.ndim == 2:
+            predictions = predictions.argmax(axis=1)
+        predictions = predictions.astype(np.int64).ravel()
+
+        if labels.shape != predictions.shape:
+            message = 'Labels and predictions differ in size. ({} != {})'
+            raise ValueError(message.format(labels.size, predictions.size))
+
+        for values in (labels, predictions):
+            if values.size and (
+                    values.min() < 0 or values.max() >= self.num_classes):
+                message = 'Classes should be in [0, {}).'
+                raise ValueError(message.format(self.num_classes))
+
+        self.matrix += np.bincount(
+            labels * self.num_classes + predictions,
+            minlength=self.num_classes ** 2,
+        ).reshape(self.num_classes, self.num_classes)
+
+    @property
+    def true_positives(self):
+        """Number of correct predictions of every class."""
+        return np.diag(self.matrix)
+
+    def precision(self):
+        """Precision of every class."""
+        return safe_divide(self.true_positives, self.matrix.sum(axis=0))
+
+    def recall(self):
+        """Recall of every class."""
+        return safe_divide(self.true_positives, self.matrix.sum(axis=1))
+
+    def f1(self):
+        """F1 score of every class."""
+        precision = self.precision()
+        recall = self.recall()
+        return safe_divide(2 * precision * recall, precision + recall)
+
+    def accuracy(self):
+        """Fraction of correct predictions."""
+        return float(safe_divide(self.true_positives.sum(), self.matrix.sum()))
+
+    def result(self):
+        """Get the matrix and per class and macro averaged scores."""
+        f1 = self.f1()
+        return {
+            'confusion_matrix': self.matrix.copy(),
+            'accuracy': self.accuracy(),
+            'precision': self.precision(),
+            'recall': self.recall(),
+            'f1': f1,
+            'macro_f1': float(f1.mean()),
+            'support': self.matrix.sum(axis=1),
+        }
+
+
+class BinnedCurve(Metric):
+    """ROC and precision-recall curves from fixed-bin score histograms.
+
+    Scores in [0, 1] are counted in num_bins histograms of positive and
+    negative items, and every bin edge is used as a decision threshold.
+    Curves are exact up to the bin width.
+
+    Parameters
+    ----------
+    num_classes : int, optional
+        Number of classes, for one-vs-rest curves of every class. A single
+        binary curve is computed by default.
+    num_bins : int
+        Number of score bins.
+    """
+
+    counts = ('positives', 'negatives')
+
+    def __init__(self, num_classes=None, num_bins=DEFAULT_NUM_BINS):
+        """Create empty score histograms."""
+        self.num_classes = num_classes
+        self.num_bins = num_bins
+
+        shape = (1 if num_classes is None else num_classes, num_bins)
+        self.positives = np.zeros(shape, dtype=np.int64)
+        self.negatives = np.zeros(shape, dtype=np.int64)
+
+    @property
+    def config(self):
+        """Number of classes and of bins."""
+        return {'num_classes': self.num_classes, 'num_bins': self.num_bins}
+
+    @property
+    def thresholds(self):
+        """Lower edge of every bin, used as decision threshold."""
+        return np.arange(self.num_bins) / self.num_bins
+
+    def update(self, labels, scores):
+        """Add a batch of labels and scores.
+
+        Parameters
+        ----------
+        labels : array
+            Binary label of every item. For one-vs-rest curves, either the
+            class of every item or a binary array of shape
+            (items, num_classes).
+        scores : array
+            Score of every item, or array of shape (items, num_classes) of
+            class scores for one-vs-rest curves.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        labels = np.asarray(labels)
+        if self.num_classes is None:
+            scores = scores.reshape(-1, 1)
+            labels = labels.reshape(-1, 1).astype(bool)
+        elif labels.ndim == 1:
+            labels = labels[:, None] == np.arange(self.num_classes)
+        else:
+            labels = labels.astype(bool)
+
+        if labels.shape != scores.shape:
+            message = 'Labels and scores differ in shape. ({} != {})'
+            raise ValueError(message.format(labels.shape, scores.shape))
+
+        # Histogram all classes at once by offsetting their bins
+        offsets = np.arange(scores.shape[1]) * self.num_bins
+        bins = score_bins(scores, self.num_bins) + offsets
+        size = self.positives.size
+        self.positives += np.bincount(
+            bins[labels], minlength=size).reshape(self.positives.shape)
+        self.negatives += np.bincount(
+            bins[~labels], minlength=size).reshape(self.negatives.shape)
+
+    def _cumulative(self):
+        true_positives = cumulative_from_top(self.positives)
+        false_positives = cumulative_from_top(self.negatives)
+        return true_positives, false_positives
+
+    def roc_curve(self):
+        """Get false and true positive rates at every threshold.
+
+        Returns arrays of shape (num_bins,) for binary curves and
+        (num_classes, num_bins) for one-vs-rest curves.
+        """
+        true_positives, false_positives = self._cumulative()
+        tpr = safe_divide(true_positives, true_positives[:, :1])
+        fpr = safe_divide(false_positives, false_positives[:, :1])
+        return self._squeeze(fpr), self._squeeze(tpr)
+
+    def pr_curve(self):
+        """Get precision and recall at every threshold."""
+        true_positives, false_positives = self._cumulative()
+        precision = safe_divide(
+            true_positives, true_positives + false_positives)
+        recall = safe_divide(true_positives, true_positives[:, :1])
+        return self._squeeze(precision), self._squeeze(recall)
+
+    def roc_auc(self):
+        """Area under the ROC curve, by the trapezoidal rule."""
+        fpr, tpr = self.roc_curve()
+        fpr = np.atleast_2d(fpr)
+        tpr = np.atleast_2d(tpr)
+
+        # Close the curves at the (0, 0) corner
+        fpr = np.concatenate([fpr, np.zeros((fpr.shape[0], 1))], axis=1)
+        tpr = np.concatenate([tpr, np.zeros((tpr.shape[0], 1))], axis=1)
+        widths = fpr[:, :-1] - fpr[:, 1:]
+        heights = (tpr[:, :-1] + tpr[:, 1:]) / 2
+        return self._squeeze((widths * heights).sum(axis=1))
+
+    def average_precision(self):
+        """Average precision, the step-wise area under the PR curve."""
+        precision, recall = self.pr_curve()
+        precision = np.atleast_2d(precision)
+        recall = np.atleast_2d(recall)
+
+        steps = recall - np.concatenate(
+            [recall[:, 1:], np.zeros((recall.shape[0], 1))], axis=1)
+        return self._squeeze((steps * precision).sum(axis=1))
+
+    def _squeeze(self, values):
+        if self.num_classes is None:
+            values = values[0]
+            return float(values) if np.ndim(values) == 0 else values
+        return values
+
+    def result(self):
+        """Get the curves and their areas."""
+        fpr, tpr = self.roc_curve()
+        precision, recall = self.pr_curve()
+        return {
+            'thresholds': self.thresholds,
+            'fpr': fpr,
+            'tpr': tpr,
+            'precision': precision,
+            'recall': recall,
+            'roc_auc': self.roc_auc(),
+            'average_precision': self.average_precision(),
+        }
+
+
+def interval_iou(first, second):
+    """Get the intersection over union of every pair of time intervals.
+
+    Parameters
+    ----------
+    first, second : array
+        Arrays of shape (n, 2) and (m, 2) of interval starts and ends.
+
+    Returns
+    -------
+    array
+        Array of shape (n, m).
+    """
+    first = np.asarray(first, dtype=np.float64).reshape(-1, 2)
+    second = np.asarray(second, dtype=np.float64).reshape(-1, 2)
+
+    starts = np.maximum(first[:, None, 0], second[None, :, 0])
+    ends = np.minimum(first[:, None, 1], second[None, :, 1])
+    intersection = np.clip(ends - starts, 0, None)
+
+    lengths = (first[:, 1] - first[:, 0])[:, None] + (
+        second[:, 1] - second[:, 0])[None, :]
+    return safe_divide(intersection, lengths - intersection)
+
+
+def match_events(true, predicted, scores=None, iou_threshold=0.5):
+    """Match predicted events to true events one to one.
+
+    Predictions are matched greedily in order of decreasing score to the
+    unmatched true event they overlap the most, if their intersection over
+    union reaches the threshold.
+
+    Returns
+    -------
+    array of bool
+        Whether every prediction matches a true event.
+    """
+    iou = interval_iou(true, predicted)
+    num_true, num_predicted = iou.shape
+    matched = np.zeros(num_predicted, dtype=bool)
+    if not num_true or not num_predicted:
+        return matched
+
+    if scores is None:
+        scores = np.ones(num_predicted)
+    order = np.argsort(-np.asarray(scores), kind='stable')
+
+    iou[iou < iou_threshold] = -1
+    for column in order:
+        row = iou[:, column].argmax()
+        if iou[row, column] < 0:
+            continue
+
+        matched[column] = True
+        # Matched true events are not available to other predictions
+        iou[row, :] = -1
+
+    return matched
+
+
+class EventMatcher(Metric):
+    """Detection metrics from matching predicted to true time intervals.
+
+    Every update holds the events of a single recording, so events of
+    different recordings never match. Scores of matched and unmatched
+    predictions are counted in fixed-bin histograms, so precision and
+    recall can be computed at every score threshold.
+
+    Parameters
+    ----------
+    iou_threshold : float
+        Minimum intersection over union of matching events.
+    num_bins : int
+        Number of score bins.
+    """
+
+    counts = ('matched', 'unmatched', 'num_true')
+
+    def __init__(self, iou_threshold=0.5, num_bins=DEFAULT_NUM_BINS):
+        """Create an empty event matcher."""
+        self.iou_threshold = iou_threshold
+        self.num_bins = num_bins
+        self.matched = np.zeros(num_bins, dtype=np.int64)
+        self.unmatched = np.zeros(num_bins, dtype=np.int64)
+        self.num_true = np.zeros((), dtype=np.int64)
+
+    @property
+    def config(self):
+        """Get the IoU threshold and the number of bins."""
+        return {'iou_threshold': self.iou_threshold, 'num_bins': self.num_bins}
+
+    @property
+    def thresholds(self):
+        """Lower edge of every bin, used as decision threshold."""
+        return np.arange(self.num_bins) / self.num_bins
+
+    def update(
+            self,
+            true,
+            predicted,
+            scores=None,
+            true_labels=None,
+            predicted_labels=None):
+        """Add the events of a recording.
+
+        Parameters
+        ----------
+        true, predicted : array
+            Arrays of shape (n, 2) of event starts and ends.
+        scores : array, optional
+            Score in [0, 1] of every prediction. All predictions have score
+            one by default.
+        true_labels, predicted_labels : array, optional
+            Class of every event. Events of different classes never match.
+        """
+        true = np.asarray(true, dtype=np.float64).reshape(-1, 2)
+        predicted = np.asarray(predicted, dtype=np.float64).reshape(-1, 2)
+        if scores is None:
+            scores = np.ones(len(predicted))
+        scores = np.asarray(scores, dtype=np.float64)
+
+        if true_labels is None:
+            matched = match_events(
+                true, predicted, scores, self.iou_threshold)
+        else:
+            true_labels = np.asarray(true_labels)
+            predicted_labels = np.asarray(predicted_labels)
+            matched = np.zeros(len(predicted), dtype=bool)
+            for label in np.unique(predicted_labels):
+                columns = predicted_labels == label
+                matched[columns] = match_events(
+                    true[true_labels == label],
+                    predicted[columns],
+                    scores[columns],
+                    self.iou_threshold)
+
+        bins = score_bins(scores, self.num_bins)
+        self.matched += np.bincount(bins[matched], minlength=self.num_bins)
+        self.unmatched += np.bincount(
+            bins[~matched], minlength=self.num_bins)
+        self.num_true += len(true)
+
+    def result(self):
+        """Get precision and recall at every threshold and at zero."""
+        true_positives = cumulative_from_top(self.matched)
+        false_positives = cumulative_from_top(self.unmatched)
+        precision = safe_divide(
+            true_positives, true_positives + false_positives)
+        recall = safe_divide(true_positives, self.num_true)
+        f1 = safe_divide(2 * precision * recall, precision + recall)
+
+        return {
+            'thresholds': self.thresholds,
+            'precision_curve': precision,
+            'recall_curve': recall,
+            'precision': float(precision[0]),
+            'recall': float(recall[0]),
+            'f1': float(f1[0]),
+            'true_positives': int(true_positives[0]),
+            'false_positives': int(false_positives[0]),
+            'false_negatives': int(self.num_true - true_positives[0]),
+        }
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Fingerprint Module.
+
+This module computes stable content fingerprints of processes, functions and
+their parameters. Fingerprints are used to key caches of derived data, so
+they must be equal across interpreter sessions for equal inputs and change
+whenever the computation changes.
+"""
+import functools
+import hashlib
+import types
+
+import numpy as np
+
+
+def _update(digest, value):
+    """Feed a value into a digest."""
+    if isinstance(value, type):
+        # Classes, such as the one bound by super() in methods, are fed by
+        # name
+        digest.update(b'class:')
+        digest.update(str(value.__module__).encode())
+        digest.update(value.__qualname__.encode())
+
+    elif hasattr(value, 'fingerprint'):
+        digest.update(b'fingerprint:')
+        digest.update(value.fingerprint().encode())
+
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest.update(b'array:')
+        digest.update(array.dtype.str.encode())
+        digest.update(repr(array.shape).encode())
+        digest.update(array.data)
+
+    elif isinstance(value, (list, tuple, dict, set, frozenset)):
+        _update_container(digest, value)
+
+    elif isinstance(value, types.CodeType):
+        _update_code(digest, value)
+
+    elif isinstance(value, functools.partial):
+        digest.update(b'partial:')
+        _update(digest, (value.func, value.args, value.keywords))
+
+    elif hasattr(value, '__code__'):
+        _update_function(digest, value)
+
+    elif type(value).__repr__ is object.__repr__:
+        # The default repr holds a memory address, which changes between
+        # sessions
+        message = (
+            'Cannot fingerprint {} objects. Define a fingerprint method or '
+            'exclude them from the fingerprint.')
+        raise TypeError(message.format(type(value).__qualname__))
+
+    else:
+        digest.update(repr(value).encode())
+
+
+def _update_container(digest, value):
+    """Feed the entries of a list, tuple, dict or set into a digest."""
+    if isinstance(value, (list, tuple)):
+        header = '{}:{}:'.format(type(value).__name__, len(value))
+        digest.update(header.encode())
+        for item in value:
+            _update(digest, item)
+
+    elif isinstance(value, dict):
+        digest.update('dict:{}:'.format(len(value)).encode())
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+
+    else:
+        # Set order depends on the hash seed of the session
+        header = '{}:{}:'.format(type(value).__name__, len(value))
+        digest.update(header.encode())
+        for item in sorted(fingerprint(item) for item in value):
+            digest.update(item.encode())
+
+
+def _update_function(digest, function):
+    """Feed the code and bound values of a function into a digest."""
+    digest.update(b'function:')
+    digest.update(str(function.__module__).encode())
+    digest.update(function.__qualname__.encode())
+    _update_code(digest, function.__code__)
+
+    for cell in function.__closure__ or ():
+        _update(digest, cell.cell_contents)
+
+
+def _update_code(digest, code):
+    """Feed bytecode, names and constants into a digest.
+
+    Nested code objects, such as those of comprehensions, lambdas and inner
+    functions, are fed recursively instead of by their repr, which holds a
+    memory address.
+    """
+    digest.update(b'code:')
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    digest.update('consts:{}:'.format(len(code.co_consts)).encode())
+    for const in code.co_consts:
+        _update(digest, const)
+
+
+def fingerprint(value):
+    """Compute the fingerprint of a value.
+
+    Objects with a ``fingerprint`` method (such as processes) are asked for
+    it. Functions are fingerprinted by their name, bytecode, names,
+    constants and closure values, numpy arrays by their content and
+    containers by their entries. Any other value is fingerprinted by its
+    repr.
+
+    Raises
+    ------
+    TypeError
+        If the value is an object without a fingerprint method whose repr
+        is the default one, which is not stable across sessions.
+
+    Returns
+    -------
+    str
+        A hexadecimal sha256 digest.
+    """
+    digest = hashlib.sha256()
+    _update(digest, value)
+    return digest.hexdigest()
+
+
+def combine(*parts):
+    """Combine several fingerprints or values into a single fingerprint.
+
+    Returns None if any of the parts is None, since the combination of an
+    unknown fingerprint is unknown.
+    """
+    if any(part is None for part in parts):
+        return None
+
+    return fingerprint(parts)
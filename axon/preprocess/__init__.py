@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Preprocess module.
+
+This module contains vectorized processes that extract features from
+batches of audio clips: framing, spectrograms, mel spectrograms, PCEN and
+resampling.
+"""
+from .base import BatchProcess
+from .filters import get_window
+from .filters import mel_filterbank
+from .resample import Resample
+from .spectrogram import Frame
+from .spectrogram import MelSpectrogram
+from .spectrogram import PCEN
+from .spectrogram import Spectrogram
+
+
+__all__ = [
+    'BatchProcess',
+    'Frame',
+    'MelSpectrogram',
+    'PCEN',
+    'Resample',
+    'Spectrogram',
+    'get_window',
+    'mel_filterbank',
+]
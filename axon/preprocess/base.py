@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Batch Process Module.
+
+This module defines the base class of vectorized preprocess processes.
+"""
+from abc import abstractmethod
+
+import numpy as np
+
+import axon.datatypes as dt
+from axon.processes import Process
+
+
+class BatchProcess(Process):
+    """Base class of processes that transform clips or batches of clips.
+
+    Processes compute over the last axes of their inputs, so a single clip
+    and a batch of clips of shape ``(batch_size,) + clip_shape`` are
+    transformed by the same vectorized code. Input and output DataTypes are
+    exact :class:`~axon.datatypes.NumpyArray` types derived from the process
+    parameters; they describe batches if batch_size is given and single
+    clips otherwise.
+
+    Batches are transformed in blocks of about block_bytes of input, written
+    to a single output array, so the intermediate arrays of a block stay in
+    the CPU cache. Whole large batches in one call are slower than a loop
+    over clips once they spill out of the cache. Subclasses implement
+    :meth:`transform` for a block.
+
+    Batches yielded by :meth:`axon.dataset.WindowedDataset.batches` are
+    transformed chunk by chunk with :meth:`stream`.
+    """
+
+    fusable = True
+
+    # Parameters that change the speed but not the outputs
+    fingerprint_ignore = Process.fingerprint_ignore + (
+        'workers', 'block_bytes')
+
+    def __init__(self, batch_size=None, dtype='float32', workers=1,
+                 block_bytes=2 ** 18):
+        """Create a batch process."""
+        super().__init__()
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype).name
+        self.workers = workers
+        self.block_bytes = block_bytes
+
+    @abstractmethod
+    def input_shape(self):
+        """Get the shape of an input clip."""
+
+    @abstractmethod
+    def output_shape(self):
+        """Get the shape of an output clip."""
+
+    def _batched(self, shape):
+        if self.batch_size is None:
+            return tuple(shape)
+        return (self.batch_size,) + tuple(shape)
+
+    def get_input_dtype(self):
+        """Get the exact NumpyArray type of the inputs."""
+        if self._input_dtype is not None:
+            return self._input_dtype
+        return dt.NumpyArray(dt.Float(), self._batched(self.input_shape()))
+
+    def get_output_dtype(self):
+        """Get the exact NumpyArray type of the outputs."""
+        if self._output_dtype is not None:
+            return self._output_dtype
+        return dt.NumpyArray(dt.Float(), self._batched(self.output_shape()))
+
+    def check(self, array):
+        """Convert an input to the process dtype and check its shape."""
+        array = np.asarray(array, dtype=self.dtype)
+        shape = tuple(self.input_shape())
+        if array.shape[array.ndim - len(shape):] != shape:
+            message = 'Input does not have clips of shape {}. (shape={})'
+            raise ValueError(message.format(shape, array.shape))
+        return array
+
+    @abstractmethod
+    def transform(self, block):
+        """Transform a block of clips of shape (clips,) + input_shape."""
+
+    def run(self, clips):  # pylint: disable=arguments-differ
+        """Transform a clip or a batch of clips."""
+        clips = self.check(clips)
+        input_shape = tuple(self.input_shape())
+        leading = clips.shape[:clips.ndim - len(input_shape)]
+        clips = clips.reshape((-1,) + input_shape)
+
+        outputs = np.empty(
+            (len(clips),) + tuple(self.output_shape()), dtype=self.dtype)
+        if not len(clips):
+            return outputs.reshape(leading + outputs.shape[1:])
+
+        block_size = max(self.block_bytes // clips[:1].nbytes, 1)
+        for start in range(0, len(clips), block_size):
+            stop = start + block_size
+            outputs[start:stop] = self.transform(clips[start:stop])
+
+        return outputs.reshape(leading + outputs.shape[1:])
+
+    def stream(self, batches):
+        """Transform a stream of (offsets, clips) batches.
+
+        Yields
+        ------
+        tuple
+            Offsets and transformed clips of every batch.
+        """
+        for offsets, clips in batches:
+            yield offsets, self.run(clips)
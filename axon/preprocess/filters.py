@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Filters Module.
+
+This module builds the windows and filterbanks used by the preprocess
+processes. They are cached by their parameters, so every call of a process
+reuses them, and returned read-only so cached values cannot be modified.
+"""
+import functools
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from scipy import signal
+
+
+def read_only(array):
+    """Mark an array as read-only and return it."""
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=None)
+def get_window(window, length, dtype='float32'):
+    """Get a periodic FFT window of the given length.
+
+    The window is any name or tuple accepted by
+    :func:`scipy.signal.get_window`.
+    """
+    values = signal.get_window(window, length, fftbins=True)
+    return read_only(values.astype(dtype))
+
+
+def hz_to_mel(frequencies):
+    """Convert frequencies in Hz to the HTK mel scale."""
+    return 2595.0 * np.log10(1.0 + np.asarray(frequencies) / 700.0)
+
+
+def mel_to_hz(mels):
+    """Convert HTK mel scale values to frequencies in Hz."""
+    return 700.0 * (10.0 ** (np.asarray(mels) / 2595.0) - 1.0)
+
+
+@functools.lru_cache(maxsize=None)
+def mel_filterbank(sample_rate, n_fft, n_mels, fmin=0.0, fmax=None,
+                   dtype='float32'):
+    """Get a triangular mel filterbank.
+
+    Filters are spaced evenly in the mel scale between fmin and fmax and
+    normalized to unit area.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(n_mels, n_fft // 2 + 1)``.
+    """
+    if fmax is None:
+        fmax = sample_rate / 2
+
+    if not 0 <= fmin < fmax <= sample_rate / 2:
+        message = (
+            'Invalid mel frequency range. '
+            '(fmin={}, fmax={}, sample_rate={})')
+        raise ValueError(message.format(fmin, fmax, sample_rate))
+
+    frequencies = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    edges = mel_to_hz(
+        np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2))
+
+    lower = edges[:-2, None]
+    center = edges[1:-1, None]
+    upper = edges[2:, None]
+    rising = (frequencies - lower) / (center - lower)
+    falling = (upper - frequencies) / (upper - center)
+    weights = np.maximum(0, np.minimum(rising, falling))
+    weights *= 2.0 / (upper - lower)
+    return read_only(weights.astype(dtype))
+
+
+@functools.lru_cache(maxsize=None)
+def resample_filter(up, down):
+    """Get the anti-aliasing FIR filter of a polyphase resampling.
+
+    This is the filter designed by :func:`scipy.signal.resample_poly`.
+    """
+    max_rate = max(up, down)
+    half_length = 10 * max_rate
+    values = signal.firwin(
+        2 * half_length + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    return read_only(values)
+
+
+def num_frames(num_samples, frame_length, hop_length):
+    """Get the number of full frames of a signal."""
+    if num_samples < frame_length:
+        return 0
+    return 1 + (num_samples - frame_length) // hop_length
+
+
+def frame(array, frame_length, hop_length):
+    """Get a read-only strided view of the frames of the last axis.
+
+    The view has shape ``array.shape[:-1] + (num_frames, frame_length)``,
+    so batches of signals are framed at once without copies.
+    """
+    array = np.asarray(array)
+    count = num_frames(array.shape[-1], frame_length, hop_length)
+    shape = array.shape[:-1] + (count, frame_length)
+    strides = array.strides[:-1] + (
+        array.strides[-1] * hop_length, array.strides[-1])
+    return as_strided(array, shape=shape, strides=strides, writeable=False)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Resample Module.
+
+This module defines a vectorized polyphase resampling process.
+"""
+import math
+
+from scipy import signal
+
+from axon.preprocess.base import BatchProcess
+from axon.preprocess.filters import resample_filter
+
+
+class Resample(BatchProcess):
+    """Change the sample rate of clips.
+
+    Clips are resampled with a polyphase filter along their last axis, as
+    :func:`scipy.signal.resample_poly` does, with the filter taken from
+    cache.
+
+    Parameters
+    ----------
+    num_samples : int
+        Number of samples of a clip.
+    sample_rate : int
+        Sample rate of the input clips.
+    target_rate : int
+        Sample rate of the output clips.
+    """
+
+    name = 'Resample'
+
+    def __init__(self, num_samples, sample_rate, target_rate, **kwargs):
+        """Create a resampling process."""
+        super().__init__(**kwargs)
+        self.num_samples = num_samples
+        self.sample_rate = sample_rate
+        self.target_rate = target_rate
+
+    def factors(self):
+        """Get the upsampling and downsampling factors."""
+        divisor = math.gcd(self.sample_rate, self.target_rate)
+        return self.target_rate // divisor, self.sample_rate // divisor
+
+    def input_shape(self):
+        """Get the shape of an input clip."""
+        return (self.num_samples,)
+
+    def output_shape(self):
+        """Get the shape of an output clip."""
+        up, down = self.factors()
+        return (-(-self.num_samples * up // down),)
+
+    def transform(self, block):
+        """Resample a block of clips."""
+        up, down = self.factors()
+        if up == down:
+            return block
+
+        return signal.resample_poly(
+            block, up, down, axis=-1, window=resample_filter(up, down))
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""Spectrogram Module.
+
+This module defines vectorized framing, spectrogram, mel spectrogram and
+PCEN processes. All of them transform batches of clips in single numpy and
+scipy calls, with windows and filterbanks taken from cache.
+"""
+import numpy as np
+from scipy import fft
+from scipy import signal
+
+from axon.preprocess.base import BatchProcess
+from axon.preprocess.filters import frame
+from axon.preprocess.filters import get_window
+from axon.preprocess.filters import mel_filterbank
+from axon.preprocess.filters import num_frames
+
+
+class Frame(BatchProcess):
+    """Split clips into overlapping frames.
+
+    The output is a read-only strided view of the input, of shape
+    ``(num_frames, frame_length)`` per clip.
+
+    Parameters
+    ----------
+    num_samples : int
+        Number of samples of a clip.
+    frame_length : int
+        Number of samples of a frame.
+    hop_length : int, optional
+        Number of samples between frames. Defaults to frame_length.
+    """
+
+    name = 'Frame'
+
+    def __init__(self, num_samples, frame_length, hop_length=None, **kwargs):
+        """Create a framing process."""
+        super().__init__(**kwargs)
+        self.num_samples = num_samples
+        self.frame_length = frame_length
+        self.hop_length = hop_length or frame_length
+
+    def input_shape(self):
+        """Get the shape of an input clip."""
+        return (self.num_samples,)
+
+    def output_shape(self):
+        """Get the shape of an output clip."""
+        count = num_frames(
+            self.num_samples, self.frame_length, self.hop_length)
+        return (count, self.frame_length)
+
+    def transform(self, block):
+        """Frame a block of clips."""
+        return frame(block, self.frame_length, self.hop_length)
+
+    def run(self, clips):  # pylint: disable=arguments-differ
+        """Frame a clip or a batch of clips without copies."""
+        return self.transform(self.check(clips))
+
+
+class Spectrogram(BatchProcess):
+    """Short-time Fourier transform magnitude of clips.
+
+    The output has shape ``(n_fft // 2 + 1, num_frames)`` per clip.
+
+    Parameters
+    ----------
+    num_samples : int
+        Number of samples of a clip.
+    n_fft : int
+        Length of the FFT window.
+    hop_length : int, optional
+        Number of samples between frames. Defaults to n_fft // 4.
+    window : str or tuple
+        Window function, as accepted by :func:`scipy.signal.get_window`.
+    center : bool
+        Whether to reflect-pad clips so frames are centered at multiples of
+        hop_length.
+    power : float
+        Exponent of the magnitude. 2 gives the power spectrogram.
+    workers : int
+        Number of threads of the FFT. Does not change the outputs.
+    """
+
+    name = 'Spectrogram'
+
+    def __init__(
+            self,
+            num_samples,
+            n_fft=1024,
+            hop_length=None,
+            window='hann',
+            center=True,
+            power=2.0,
+            **kwargs):
+        """Create a spectrogram process."""
+        super().__init__(**kwargs)
+        self.num_samples = num_samples
+        self.n_fft = n_fft
+        self.hop_length = hop_length or n_fft // 4
+        self.window = window
+        self.center = center
+        self.power = power
+
+        if center and num_samples <= n_fft // 2:
+            message = (
+                'Clips are too short to be centered. '
+                '(num_samples={}, n_fft={})')
+            raise ValueError(message.format(num_samples, n_fft))
+
+    def input_shape(self):
+        """Get the shape of an input clip."""
+        return (self.num_samples,)
+
+    def num_frames(self):
+        """Get the number of frames of a clip."""
+        length = self.num_samples
+        if self.center:
+            length += 2 * (self.n_fft // 2)
+        return num_frames(length, self.n_fft, self.hop_length)
+
+    def output_shape(self):
+        """Get the shape of an output clip."""
+        return (self.n_fft // 2 + 1, self.num_frames())
+
+    def power_spectrum(self, block):
+        """Get the spectrum of every frame, of shape (clips, frames, bins)."""
+        if self.center:
+            padding = (self.n_fft // 2, self.n_fft // 2)
+            block = np.pad(block, [(0, 0), padding], mode='reflect')
+
+        frames = frame(block, self.n_fft, self.hop_length)
+        frames = frames * get_window(self.window, self.n_fft, self.dtype)
+        spectrum = fft.rfft(
+            frames, axis=-1, overwrite_x=True, workers=self.workers)
+
+        if self.power == 2:
+            return spectrum.real ** 2 + spectrum.imag ** 2
+
+        magnitude = np.abs(spectrum)
+        if self.power != 1:
+            magnitude **= self.power
+        return magnitude
+
+    def transform(self, block):
+        """Compute the spectrograms of a block of clips."""
+        return np.swapaxes(self.power_spectrum(block), 1, 2)
+
+
+class MelSpectrogram(Spectrogram):
+    """Mel spectrogram of clips.
+
+    The output has shape ``(n_mels, num_frames)`` per clip. Takes the
+    parameters of :class:`Spectrogram` and those of the mel filterbank.
+
+    Parameters
+    ----------
+    sample_rate : int
+        Sample rate of the clips.
+    n_mels : int
+        Number of mel bands.
+    fmin, fmax : float, optional
+        Frequency range of the filterbank. Defaults to the full range.
+    """
+
+    name = 'Mel Spectrogram'
+
+    def __init__(self, num_samples, sample_rate, n_mels=128, fmin=0.0,
+                 fmax=None, **kwargs):
+        """Create a mel spectrogram process."""
+        super().__init__(num_samples, **kwargs)
+        self.sample_rate = sample_rate
+        self.n_mels = n_mels
+        self.fmin = fmin
+        self.fmax = fmax
+
+        # Fail on invalid frequency ranges at creation
+        self.filterbank()
+
+    def filterbank(self):
+        """Get the cached mel filterbank of the process."""
+        return mel_filterbank(
+            self.sample_rate, self.n_fft, self.n_mels, self.fmin, self.fmax,
+            self.dtype)
+
+    def output_shape(self):
+        """Get the shape of an output clip."""
+        return (self.n_mels, self.num_frames())
+
+    def transform(self, block):
+        """Compute the mel spectrograms of a block of clips."""
+        return np.matmul(self.filterbank(), np.swapaxes(
+            self.power_spectrum(block), 1, 2))
+
+
+class PCEN(BatchProcess):
+    """Per-channel energy normalization of spectrograms.
+
+    Every band is divided by a smoothed version of itself, computed with a
+    first order IIR filter along time, and compressed. The output has the
+    shape of the input.
+
+    Parameters
+    ----------
+    num_bands : int
+        Number of frequency bands of a spectrogram.
+    num_frames : int
+        Number of frames of a spectrogram.
+    sample_rate : int
+        Sample rate of the clips of the spectrograms.
+    hop_length : int
+        Number of samples between frames.
+    time_constant : float
+        Time constant of the smoothing filter, in seconds.
+    gain, bias, power, eps : float
+        Normalization gain, compression bias and exponent, and the floor of
+        the smoothed energy.
+    """
+
+    name = 'PCEN'
+
+    def __init__(
+            self,
+            num_bands,
+            num_frames,
+            sample_rate,
+            hop_length,
+            time_constant=0.4,
+            gain=0.98,
+            bias=2.0,
+            power=0.5,
+            eps=1e-6,
+            **kwargs):
+        """Create a PCEN process."""
+        super().__init__(**kwargs)
+        self.num_bands = num_bands
+        self.num_frames = num_frames
+        self.sample_rate = sample_rate
+        self.hop_length = hop_length
+        self.time_constant = time_constant
+        self.gain = gain
+        self.bias = bias
+        self.power = power
+        self.eps = eps
+
+    def input_shape(self):
+        """Get the shape of an input spectrogram."""
+        return (self.num_bands, self.num_frames)
+
+    def output_shape(self):
+        """Get the shape of an output spectrogram."""
+        return (self.num_bands, self.num_frames)
+
+    def smoothing_coefficient(self):
+        """Get the coefficient of the smoothing filter."""
+        frames = self.time_constant * self.sample_rate / self.hop_length
+        return (np.sqrt(1 + 4 * frames ** 2) - 1) / (2 * frames ** 2)
+
+    def transform(self, spectrograms):
+        """Normalize a block of spectrograms."""
+        coefficient = self.smoothing_coefficient()
+        numerator = [coefficient]
+        denominator = [1, coefficient - 1]
+
+        # Start the filter at the steady state of the first frame
+        initial = signal.lfilter_zi(numerator, denominator)
+        smooth, _ = signal.lfilter(
+            numerator, denominator, spectrograms, axis=-1,
+            zi=initial * spectrograms[..., :1])
+
+        normalization = np.exp(
+            -self.gain * (np.log(self.eps) + np.log1p(smooth / self.eps)))
+        output = (spectrograms * normalization + self.bias) ** self.power
+        output -= self.bias ** self.power
+        return output
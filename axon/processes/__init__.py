@@ -7,9 +7,13 @@ chunks of computation into a reusable function.
 """
 from .base import Process
 from .mlflow_process import MLFlowProcess
+from .pipeline import Pipeline
+from .pipeline import FusedProcess
 
 
 __all__ = [
     'Process',
-    'MLFlowProcess'
+    'MLFlowProcess',
+    'Pipeline',
+    'FusedProcess'
 ]
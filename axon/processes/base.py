@@ -5,8 +5,27 @@ This module defines the base class for all Processes.
 """
 from abc import ABC
 from abc import abstractmethod
+import inspect
 import logging
 
+from axon.fingerprint import fingerprint
+
+
+def _process_methods(cls):
+    # Functions defined by a process class and its process base classes
+    methods = []
+    for klass in cls.__mro__:
+        if klass is Process or not issubclass(klass, Process):
+            continue
+
+        for name, value in sorted(vars(klass).items()):
+            # Unwrap static and class methods
+            value = getattr(value, '__func__', value)
+            if inspect.isfunction(value):
+                methods.append((name, value))
+
+    return methods
+
 
 class Process(ABC):
     """Process base class.
@@ -17,6 +36,11 @@ class Process(ABC):
 
     All computation done by the process should be defined in the run method.
 
+    Lightweight processes that take a single datum, have no side effects and
+    do not need the :meth:`__call__` machinery can set ``fusable = True``.
+    Consecutive fusable processes in a :class:`Pipeline` are executed as a
+    single unit.
+
     Examples
     --------
     To create a process that generates spectrograms from the wav numpy array,
@@ -26,7 +50,7 @@ class Process(ABC):
         import numpy as np
         import librosa
 
-        from axon.process import Process
+        from axon.processes import Process
         import axon.datatypes as dtypes
 
 
@@ -43,6 +67,10 @@ class Process(ABC):
     name = None
     input_dtype = None
     output_dtype = None
+    fusable = False
+
+    # Instance attributes that do not affect the outputs of the process
+    fingerprint_ignore = ('logger',)
 
     def __init__(self, input_dtype=None, output_dtype=None):
         self.logger = logging.getLogger(self.name)
@@ -77,6 +105,32 @@ class Process(ABC):
         """
         return self._output_dtype
 
+    def fingerprint(self):
+        """Get a fingerprint of the computation done by this process.
+
+        The fingerprint covers the process class, the code of the methods
+        defined by it and its process base classes, its input and output
+        DataTypes and its instance attributes, so it changes when the
+        process or its parameters change. It is used to key caches of
+        process outputs. Changes to module level functions called by the
+        methods are not covered.
+
+        Rewrite if the process has parameters that are not instance
+        attributes. Attributes that do not affect its outputs should be
+        listed in ``fingerprint_ignore``.
+        """
+        cls = type(self)
+        attributes = {
+            key: value for key, value in vars(self).items()
+            if key not in self.fingerprint_ignore
+        }
+        return fingerprint((
+            '{}.{}'.format(cls.__module__, cls.__qualname__),
+            _process_methods(cls),
+            repr(self.get_input_dtype()),
+            repr(self.get_output_dtype()),
+            attributes))
+
     def info(self, *args, **kwargs):
         """Log message with info level."""
         self.logger.log(*args, **kwargs)
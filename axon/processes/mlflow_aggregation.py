@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+MLFlow Aggregation Module.
+
+This module contains client side metric aggregators. Instead of logging every
+value of a metric to the tracking server, values are summarized in memory and
+only the summary statistics are logged, either periodically or once at the
+end of a run.
+"""
+import math
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RunningSummary:
+    """Streaming summary statistics of a single metric.
+
+    Keeps the count, mean, standard deviation, minimum and maximum of all
+    values seen so far in constant memory.
+    """
+
+    def __init__(self):
+        """Create an empty summary."""
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sum_squares = 0.0
+
+    def update(self, value):
+        """Add a value to the summary."""
+        value = float(value)
+        self.count += 1
+
+        # Welford's online algorithm
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._sum_squares += delta * (value - self.mean)
+
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def std(self):
+        """Population standard deviation of the values."""
+        if self.count == 0:
+            return math.nan
+
+        return math.sqrt(self._sum_squares / self.count)
+
+    def to_dict(self):
+        """Return the summary statistics as a dictionary.
+
+        The statistics of an empty summary, other than its count, are NaN.
+        """
+        if self.count == 0:
+            return {
+                'count': 0,
+                'mean': math.nan,
+                'std': math.nan,
+                'min': math.nan,
+                'max': math.nan,
+            }
+
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch.
+
+    Values are counted in logarithmically spaced buckets, so that any
+    quantile can be estimated within the given relative accuracy using
+    memory proportional to the logarithm of the range of the values (see
+    Masson et al., DDSketch, 2019). The bucket counts also serve as a
+    histogram of the values.
+
+    NaN and infinite values are counted apart and are not part of the
+    quantiles or the histogram buckets.
+    """
+
+    min_value = 1e-12
+
+    def __init__(self, relative_accuracy=0.01):
+        """Create an empty sketch."""
+        if not 0 < relative_accuracy < 1:
+            message = (
+                'Relative accuracy should be between 0 and 1. '
+                '(relative_accuracy={})')
+            raise ValueError(message.format(relative_accuracy))
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.count = 0
+        self.zero_count = 0
+        self.nan_count = 0
+        self.inf_count = 0
+        self.positive = defaultdict(int)
+        self.negative = defaultdict(int)
+
+    def _index(self, magnitude):
+        return int(math.ceil(math.log(magnitude) / self._log_gamma))
+
+    def _value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def update(self, value):
+        """Add a value to the sketch."""
+        value = float(value)
+        if math.isnan(value):
+            self.nan_count += 1
+            return
+
+        if math.isinf(value):
+            self.inf_count += 1
+            return
+
+        self.count += 1
+        if value > self.min_value:
+            self.positive[self._index(value)] += 1
+        elif value < -self.min_value:
+            self.negative[self._index(-value)] += 1
+        else:
+            self.zero_count += 1
+
+    def update_many(self, values):
+        """Add an array of values to the sketch."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+
+        self.nan_count += int(np.count_nonzero(np.isnan(values)))
+        self.inf_count += int(np.count_nonzero(np.isinf(values)))
+        values = values[np.isfinite(values)]
+        self.count += values.size
+
+        for sign, store in ((1, self.positive), (-1, self.negative)):
+            magnitudes = sign * values
+            magnitudes = magnitudes[magnitudes > self.min_value]
+            indices = np.ceil(np.log(magnitudes) / self._log_gamma)
+            for index, count in zip(*np.unique(indices, return_counts=True)):
+                store[int(index)] += int(count)
+
+        self.zero_count += int(
+            np.count_nonzero(np.abs(values) <= self.min_value))
+
+    def merge(self, other):
+        """Add all values of another sketch with the same accuracy."""
+        if other.gamma != self.gamma:
+            message = 'Cannot merge sketches with different accuracy.'
+            raise ValueError(message)
+
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.nan_count += other.nan_count
+        self.inf_count += other.inf_count
+
+        for index, count in other.positive.items():
+            self.positive[index] += count
+
+        for index, count in other.negative.items():
+            self.negative[index] += count
+
+    def _buckets(self):
+        """Iterate over (value, count) pairs in increasing order."""
+        for index in sorted(self.negative, reverse=True):
+            yield -self._value(index), self.negative[index]
+
+        if self.zero_count:
+            yield 0.0, self.zero_count
+
+        for index in sorted(self.positive):
+            yield self._value(index), self.positive[index]
+
+    def quantile(self, quantile):
+        """Estimate a quantile of the finite values."""
+        if self.count == 0:
+            return math.nan
+
+        rank = quantile * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return value
+
+        return value  # pylint: disable=undefined-loop-variable
+
+    def histogram(self):
+        """Return the bucket values and counts, and non-finite counts."""
+        values = []
+        counts = []
+        for value, count in self._buckets():
+            values.append(value)
+            counts.append(count)
+
+        return {
+            'values': values,
+            'counts': counts,
+            'nan_count': self.nan_count,
+            'inf_count': self.inf_count,
+        }
+
+
+class MetricSummary(RunningSummary):
+    """Summary statistics and quantile sketch of a single metric.
+
+    NaN and infinite values are only counted, so they do not spoil the
+    moments and quantiles of the finite values.
+    """
+
+    def __init__(self, quantiles=DEFAULT_QUANTILES, relative_accuracy=0.01):
+        """Create an empty summary."""
+        super().__init__()
+        self.quantiles = quantiles
+        self.sketch = QuantileSketch(relative_accuracy=relative_accuracy)
+
+    def update(self, value):
+        """Add a value to the summary."""
+        value = float(value)
+        self.sketch.update(value)
+        if math.isfinite(value):
+            super().update(value)
+
+    def to_dict(self):
+        """Return the summary statistics and quantiles as a dictionary."""
+        summary = super().to_dict()
+        for quantile in self.quantiles:
+            name = 'p{:g}'.format(100 * quantile)
+            summary[name] = self.sketch.quantile(quantile)
+
+        if self.sketch.nan_count:
+            summary['nan_count'] = self.sketch.nan_count
+
+        if self.sketch.inf_count:
+            summary['inf_count'] = self.sketch.inf_count
+
+        return summary
+
+
+class RawMetricWriter:
+    """Write raw metric values to a local columnar file.
+
+    Values are buffered and written in chunks. A Parquet file is written if
+    pyarrow is installed, otherwise the columns are stored in a compressed
+    numpy ``.npz`` file. The file has the columns key, step, value and
+    timestamp.
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        """Create a writer for the given path (without extension)."""
+        try:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+            self._pyarrow = pyarrow
+            self.path = '{}.parquet'.format(path)
+        except ImportError:
+            self._pyarrow = None
+            self.path = '{}.npz'.format(path)
+
+        self.chunk_size = chunk_size
+        self._columns = {'key': [], 'step': [], 'value': [], 'timestamp': []}
+        self._chunks = []
+        self._writer = None
+
+    def write(self, key, value, step, timestamp):
+        """Buffer a single metric value."""
+        self._columns['key'].append(key)
+        self._columns['step'].append(step)
+        self._columns['value'].append(value)
+        self._columns['timestamp'].append(timestamp)
+
+        if len(self._columns['key']) >= self.chunk_size:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if not self._columns['key']:
+            return
+
+        chunk = {
+            'key': np.array(self._columns['key'], dtype=str),
+            'step': np.array(self._columns['step'], dtype=np.int64),
+            'value': np.array(self._columns['value'], dtype=np.float64),
+            'timestamp': np.array(
+                self._columns['timestamp'], dtype=np.int64),
+        }
+        for column in self._columns.values():
+            del column[:]
+
+        if self._pyarrow is None:
+            self._chunks.append(chunk)
+            return
+
+        table = self._pyarrow.table(chunk)
+        if self._writer is None:
+            self._writer = self._pyarrow.parquet.ParquetWriter(
+                self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        """Write all pending values and close the file.
+
+        Returns
+        -------
+        str or None
+            The path of the written file or None if nothing was written.
+        """
+        self._write_chunk()
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            return self.path
+
+        if self._chunks:
+            np.savez_compressed(self.path, **{
+                name: np.concatenate([chunk[name] for chunk in self._chunks])
+                for name in self._chunks[0]
+            })
+            self._chunks = []
+            return self.path
+
+        return None
+
+
+class MetricAggregator:
+    """Aggregate metric values before sending them to the tracking server.
+
+    Every metric key gets a :class:`MetricSummary` with its count, mean, std,
+    min, max and quantiles. Summaries are emitted through the log_metrics
+    callable as metrics named ``<metric>/<statistic>`` whenever every_n_steps
+    steps have been aggregated or every_seconds seconds have passed since the
+    last emission, and once more on :meth:`close`. Emissions only happen when
+    a new step starts, so the values of a step are never split. Summaries are
+    reset after each emission.
+
+    The sketches of emitted summaries are merged into a quantile sketch of
+    each metric for the whole run, which can be exported as a histogram. If
+    raw_path is given, every raw value is also written to a local columnar
+    file (see :class:`RawMetricWriter`).
+    """
+
+    def __init__(
+            self,
+            log_metrics,
+            every_n_steps=None,
+            every_seconds=None,
+            quantiles=DEFAULT_QUANTILES,
+            relative_accuracy=0.01,
+            raw_path=None):
+        """Create an empty aggregator."""
+        self.log_metrics = log_metrics
+        self.every_n_steps = every_n_steps
+        self.every_seconds = every_seconds
+        self.quantiles = quantiles
+        self.relative_accuracy = relative_accuracy
+
+        self.summaries = {}
+        self.sketches = {}
+        self.raw_writer = None
+        if raw_path is not None:
+            self.raw_writer = RawMetricWriter(raw_path)
+
+        self.emissions = 0
+        self._updates = 0
+        self._pending = 0
+        self._last_step = None
+        self._last_emission = time.monotonic()
+
+    def update(self, key, value, step=None):
+        """Add a metric value.
+
+        Values without a step are counted as steps of their own.
+        """
+        self.update_many({key: value}, step=step)
+
+    def update_many(self, metrics, step=None):
+        """Add a dictionary of metric values of the same step."""
+        if step is None:
+            step = self._updates
+        self._updates += 1
+
+        if step != self._last_step:
+            if self.due():
+                self.emit()
+            self._pending += 1
+            self._last_step = step
+
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            if key not in self.summaries:
+                self.summaries[key] = MetricSummary(
+                    quantiles=self.quantiles,
+                    relative_accuracy=self.relative_accuracy)
+            self.summaries[key].update(value)
+
+            if self.raw_writer is not None:
+                self.raw_writer.write(key, float(value), step, timestamp)
+
+    def due(self):
+        """Check whether the summaries of past steps should be emitted."""
+        if self.every_n_steps is not None:
+            if self._pending >= self.every_n_steps:
+                return True
+
+        if self.every_seconds is not None:
+            elapsed = time.monotonic() - self._last_emission
+            if elapsed >= self.every_seconds:
+                return True
+
+        return False
+
+    def to_metrics(self):
+        """Return the current summaries as a flat dictionary of metrics.
+
+        Statistics of metrics without finite values are NaN and are left
+        out, so only their counts are logged.
+        """
+        return {
+            '{}/{}'.format(key, statistic): value
+            for key, summary in self.summaries.items()
+            for statistic, value in summary.to_dict().items()
+            if not math.isnan(value)
+        }
+
+    def emit(self):
+        """Log the current summaries and reset them."""
+        if self.summaries:
+            self.log_metrics(self.to_metrics(), step=self._last_step)
+            self.emissions += 1
+
+        for key, summary in self.summaries.items():
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch(
+                    relative_accuracy=self.relative_accuracy)
+            self.sketches[key].merge(summary.sketch)
+
+        self.summaries = {}
+        self._pending = 0
+        self._last_emission = time.monotonic()
+
+    def histograms(self):
+        """Return the histogram of every metric over the whole run."""
+        histograms = {}
+        for key in {**self.sketches, **self.summaries}:
+            sketch = QuantileSketch(relative_accuracy=self.relative_accuracy)
+            if key in self.sketches:
+                sketch.merge(self.sketches[key])
+            if key in self.summaries:
+                sketch.merge(self.summaries[key].sketch)
+            histograms[key] = sketch.histogram()
+
+        return histograms
+
+    def close(self):
+        """Emit pending summaries and close the raw value file.
+
+        Returns
+        -------
+        str or None
+            The path of the raw value file, if any was written.
+        """
+        self.emit()
+
+        if self.raw_writer is None:
+            return None
+
+        path = self.raw_writer.close()
+        self.raw_writer = None
+        if path is not None and not os.path.exists(path):
+            return None
+
+        return path
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+MLFlow Artifacts Module.
+
+This module contains utilities to log numpy arrays and pandas dataframes as
+mlflow artifacts. Payloads are stored once in a content addressed blob store
+(a dedicated run of the experiment) and runs only hold references to them,
+so identical outputs are never uploaded twice.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+import numpy as np
+import pandas as pd
+from mlflow.artifacts import download_artifacts
+from mlflow.tracking import MlflowClient
+
+import axon.datatypes as dt
+
+
+BLOB_STORE_TAG = 'axon.blob_store'
+ARTIFACT_TAG_PREFIX = 'axon.artifact.'
+BLOB_DIRECTORY = 'blobs'
+
+ARRAY_FORMATS = ('npy', 'npz')
+DATAFRAME_FORMATS = ('parquet', 'feather')
+
+
+def get_format(value, datatype=None, compress=False, dataframe_format=None):
+    """Select the storage format of a value.
+
+    The format is chosen by DataType: :class:`NumpyArray` values are stored
+    as ``.npy`` files, or compressed ``.npz`` files if compress is True, and
+    :class:`DataFrame` values as Parquet files, or Feather files if requested.
+    If no DataType is given it is inferred from the type of the value.
+    """
+    if datatype is None:
+        is_array = isinstance(value, np.ndarray)
+        is_dataframe = isinstance(value, pd.DataFrame)
+    else:
+        is_array = isinstance(datatype, dt.NumpyArray)
+        is_dataframe = isinstance(datatype, dt.DataFrame)
+
+    if is_array:
+        return 'npz' if compress else 'npy'
+
+    if is_dataframe:
+        dataframe_format = dataframe_format or 'parquet'
+        if dataframe_format not in DATAFRAME_FORMATS:
+            message = 'Unknown dataframe format {}. Valid options are: {}'
+            message = message.format(
+                dataframe_format, ', '.join(DATAFRAME_FORMATS))
+            raise ValueError(message)
+        return dataframe_format
+
+    message = 'No artifact format for value. (type={}, datatype={})'
+    message = message.format(type(value), repr(datatype))
+    raise ValueError(message)
+
+
+def serialize(value, fmt):
+    """Serialize a value in the given format.
+
+    Returns
+    -------
+    bytes
+        The serialized value.
+    """
+    buffer = io.BytesIO()
+
+    if fmt == 'npy':
+        np.save(buffer, value, allow_pickle=False)
+    elif fmt == 'npz':
+        np.savez_compressed(buffer, value=value)
+    elif fmt == 'parquet':
+        value.to_parquet(buffer)
+    elif fmt == 'feather':
+        value.reset_index(drop=True).to_feather(buffer)
+    else:
+        raise ValueError('Unknown artifact format {}.'.format(fmt))
+
+    return buffer.getvalue()
+
+
+def deserialize(path, fmt):
+    """Load a value stored in the given format."""
+    if fmt == 'npy':
+        return np.load(path, allow_pickle=False)
+
+    if fmt == 'npz':
+        with np.load(path, allow_pickle=False) as archive:
+            return archive['value']
+
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+
+    if fmt == 'feather':
+        return pd.read_feather(path)
+
+    raise ValueError('Unknown artifact format {}.'.format(fmt))
+
+
+def content_hash(value, fmt, payload):
+    """Compute the content hash of a value.
+
+    Arrays are hashed over their dtype, shape and raw data, so the hash does
+    not depend on details of the file format (such as the timestamps of npz
+    archives). Other values are hashed over their serialized payload.
+    """
+    digest = hashlib.sha256(fmt.encode())
+
+    if fmt in ARRAY_FORMATS:
+        array = np.ascontiguousarray(value)
+        digest.update(array.dtype.str.encode())
+        digest.update(repr(array.shape).encode())
+        digest.update(array.data)
+    else:
+        digest.update(payload)
+
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Deduplicated, asynchronous artifact store for an mlflow experiment.
+
+    Payloads are uploaded to the ``blobs/`` directory of a dedicated blob
+    store run of the experiment, named by their content hash. Logging a value
+    to a run sets the tag ``axon.artifact.<name>`` of the run to the uri of
+    its blob. If a blob with the same content already exists it is not
+    uploaded again.
+
+    Serialization and hashing happen in the calling thread, so values may be
+    modified right after being logged. Uploads run in background threads;
+    call :meth:`wait` to block until all of them are done, or :meth:`close`
+    to also release the threads. Threads are started again by the next
+    upload.
+    """
+
+    def __init__(self, experiment_id, client=None, max_workers=2):
+        """Create an artifact store for the experiment."""
+        if client is None:
+            client = MlflowClient()
+
+        self.experiment_id = experiment_id
+        self.client = client
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._blob_run = None
+        self._blobs = None
+        self._uploads = {}
+        self._futures = []
+        self._executor = None
+
+    @property
+    def blob_run(self):
+        """The run that holds all blobs of the experiment."""
+        with self._lock:
+            if self._blob_run is None:
+                self._blob_run = self._get_blob_run()
+
+            return self._blob_run
+
+    def _get_blob_run(self):
+        runs = self.client.search_runs(
+            [self.experiment_id],
+            filter_string="tags.`{}` = 'true'".format(BLOB_STORE_TAG),
+            order_by=['attributes.start_time ASC'],
+            max_results=1)
+
+        if runs:
+            return runs[0]
+
+        run = self.client.create_run(
+            self.experiment_id,
+            tags={BLOB_STORE_TAG: 'true'},
+            run_name='axon-blob-store')
+        self.client.set_terminated(run.info.run_id)
+        return run
+
+    def _known_blobs(self, blob_run):
+        with self._lock:
+            if self._blobs is None:
+                self._blobs = {
+                    os.path.basename(artifact.path)
+                    for artifact in self.client.list_artifacts(
+                        blob_run.info.run_id, BLOB_DIRECTORY)
+                }
+
+            return self._blobs
+
+    def blob_uri(self, blob_name):
+        """Get the artifact uri of a blob."""
+        return '{}/{}/{}'.format(
+            self.blob_run.info.artifact_uri.rstrip('/'),
+            BLOB_DIRECTORY,
+            blob_name)
+
+    def log(
+            self,
+            run_id,
+            name,
+            value,
+            datatype=None,
+            compress=False,
+            dataframe_format=None):
+        """Log a value as an artifact of a run.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            A future that resolves to the blob uri once the upload is done.
+        """
+        fmt = get_format(
+            value,
+            datatype=datatype,
+            compress=compress,
+            dataframe_format=dataframe_format)
+        payload = serialize(value, fmt)
+        blob_name = '{}.{}'.format(content_hash(value, fmt, payload), fmt)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='mlflow-artifacts')
+
+            future = self._executor.submit(
+                self._log, run_id, name, blob_name, payload)
+            self._futures.append(future)
+
+        return future
+
+    def _log(self, run_id, name, blob_name, payload):
+        blob_run = self.blob_run
+
+        # Only one thread uploads each blob, the rest wait for it
+        with self._lock:
+            upload = self._uploads.get(blob_name)
+            owner = upload is None
+            if owner:
+                upload = self._uploads[blob_name] = threading.Event()
+
+        if owner:
+            try:
+                if blob_name not in self._known_blobs(blob_run):
+                    self._upload(blob_run, blob_name, payload)
+            finally:
+                with self._lock:
+                    del self._uploads[blob_name]
+                upload.set()
+        else:
+            upload.wait()
+            if blob_name not in self._known_blobs(blob_run):
+                message = 'Upload of blob {} failed.'.format(blob_name)
+                raise RuntimeError(message)
+
+        uri = self.blob_uri(blob_name)
+        self.client.set_tag(run_id, ARTIFACT_TAG_PREFIX + name, uri)
+        return uri
+
+    def _upload(self, blob_run, blob_name, payload):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, blob_name)
+            with open(path, 'wb') as blob:
+                blob.write(payload)
+
+            self.client.log_artifact(
+                blob_run.info.run_id,
+                path,
+                artifact_path=BLOB_DIRECTORY)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        with self._lock:
+            self._blobs.add(blob_name)
+
+    def load(self, run_id, name):
+        """Load a value logged to a run."""
+        tags = self.client.get_run(run_id).data.tags
+        key = ARTIFACT_TAG_PREFIX + name
+        if key not in tags:
+            message = 'Run has no artifact named {}. (run_id={})'
+            raise KeyError(message.format(name, run_id))
+
+        uri = tags[key]
+        fmt = uri.rsplit('.', 1)[-1]
+        directory = tempfile.mkdtemp()
+        try:
+            path = download_artifacts(artifact_uri=uri, dst_path=directory)
+            return deserialize(path, fmt)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def wait(self):
+        """Block until all logged values have been uploaded.
+
+        Raises the first error found in the background uploads, if any.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Wait for all uploads and release the background threads."""
+        try:
+            self.wait()
+        finally:
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+MLFlow Logging Module.
+
+This module contains a batched mlflow logger that buffers metrics, params and
+tags in memory and writes them to the tracking server from a background
+thread, so that logging does not block the caller on tracking server I/O.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+import weakref
+
+from mlflow.entities import Metric
+from mlflow.entities import Param
+from mlflow.entities import RunTag
+from mlflow.tracking import MlflowClient
+
+
+# Limits of a single MlflowClient.log_batch request.
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+
+_STOP = object()
+_OPEN_LOGGERS = weakref.WeakSet()
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _close_open_loggers():
+    """Flush and close all loggers that are still open at exit."""
+    for batch_logger in list(_OPEN_LOGGERS):
+        try:
+            batch_logger.close()
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception('Failed to flush mlflow logs at exit.')
+
+
+atexit.register(_close_open_loggers)
+
+
+def split_batches(metrics, params, tags):
+    """Split entities into chunks that fit in a single log_batch call.
+
+    Every chunk is within the limits of every entity type and of the total
+    number of entities.
+    """
+    while metrics or params or tags:
+        batch_params = params[:MAX_PARAMS_PER_BATCH]
+        batch_tags = tags[:MAX_TAGS_PER_BATCH]
+        room = MAX_ENTITIES_PER_BATCH - len(batch_params) - len(batch_tags)
+        batch_metrics = metrics[:min(room, MAX_METRICS_PER_BATCH)]
+        yield batch_metrics, batch_params, batch_tags
+
+        metrics = metrics[len(batch_metrics):]
+        params = params[len(batch_params):]
+        tags = tags[len(batch_tags):]
+
+
+class BatchLogger:
+    """Asynchronous batched logger for an mlflow run.
+
+    Logged values are put in a queue and returned immediately. A background
+    thread collects them and writes them with :meth:`MlflowClient.log_batch`
+    whenever max_batch_size values are pending or flush_interval seconds
+    have passed since the last write.
+
+    Metric timestamps are taken at logging time, not at write time. All
+    pending values are written on :meth:`flush`, on :meth:`close` and at
+    interpreter exit. Errors raised by the tracking server in the background
+    thread are raised again on the next call to flush or close.
+
+    Examples
+    --------
+    .. code-block:: python
+        with mlflow.start_run() as run:
+            batch_logger = BatchLogger(run.info.run_id)
+            for step in range(steps):
+                batch_logger.log_metric('loss', loss, step=step)
+            batch_logger.close()
+    """
+
+    def __init__(
+            self,
+            run_id,
+            client=None,
+            max_batch_size=MAX_METRICS_PER_BATCH,
+            flush_interval=5.0):
+        """Create a batched logger and start its background thread."""
+        if max_batch_size < 1:
+            message = 'Batch size should be positive. (max_batch_size={})'
+            message = message.format(max_batch_size)
+            raise ValueError(message)
+
+        if client is None:
+            client = MlflowClient()
+
+        self.run_id = run_id
+        self.client = client
+        self.max_batch_size = min(max_batch_size, MAX_ENTITIES_PER_BATCH)
+        self.flush_interval = flush_interval
+
+        self.closed = False
+        self._error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._work,
+            name='mlflow-batch-logger-{}'.format(run_id),
+            daemon=True)
+        self._thread.start()
+
+        _OPEN_LOGGERS.add(self)
+
+    def log_metric(self, key, value, step=None, timestamp=None):
+        """Queue a metric to be logged."""
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+
+        self._put(Metric(key, value, timestamp, step or 0))
+
+    def log_metrics(self, metrics, step=None):
+        """Queue a dictionary of metrics to be logged."""
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(key, value, step=step, timestamp=timestamp)
+
+    def log_param(self, key, value):
+        """Queue a parameter to be logged."""
+        self._put(Param(key, str(value)))
+
+    def log_params(self, params):
+        """Queue a dictionary of parameters to be logged."""
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def set_tag(self, key, value):
+        """Queue a tag to be set."""
+        self._put(RunTag(key, str(value)))
+
+    def set_tags(self, tags):
+        """Queue a dictionary of tags to be set."""
+        for key, value in tags.items():
+            self.set_tag(key, value)
+
+    def flush(self):
+        """Block until all values queued so far have been written."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+        self._raise_error()
+
+    def close(self):
+        """Write all pending values and stop the background thread."""
+        if not self.closed:
+            self.closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            _OPEN_LOGGERS.discard(self)
+
+        self._raise_error()
+
+    def _put(self, entity):
+        if self.closed:
+            message = 'Cannot log to a closed BatchLogger. (run_id={})'
+            raise ValueError(message.format(self.run_id))
+
+        self._queue.put(entity)
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _work(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(pending)
+                return
+
+            if isinstance(item, threading.Event):
+                self._write(pending)
+                item.set()
+                deadline = time.monotonic() + self.flush_interval
+                continue
+
+            if item is not None:
+                pending.append(item)
+
+            full = len(pending) >= self.max_batch_size
+            if full or time.monotonic() >= deadline:
+                self._write(pending)
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, pending):
+        if not pending:
+            return
+
+        metrics = [item for item in pending if isinstance(item, Metric)]
+        params = [item for item in pending if isinstance(item, Param)]
+        tags = [item for item in pending if isinstance(item, RunTag)]
+        del pending[:]
+
+        try:
+            for batch in split_batches(metrics, params, tags):
+                self.client.log_batch(
+                    self.run_id,
+                    metrics=batch[0],
+                    params=batch[1],
+                    tags=batch[2])
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.exception('Failed to write mlflow logs.')
+            self._error = error
@@ -5,8 +5,57 @@ MLFlow Process Module.
 This modules contains the base definition of a process that utilizes mlflow to
 log run information, and associated mlflow utilities.
 """
+import atexit
+import contextlib
+import os
+import shutil
+import tempfile
+import weakref
+
 import mlflow
+from mlflow.tracking import MlflowClient
+
 from axon.processes.base import Process
+from axon.processes.mlflow_aggregation import MetricAggregator
+from axon.processes.mlflow_artifacts import ArtifactStore
+from axon.processes.mlflow_logging import BatchLogger
+
+
+RUN_SCOPES = ('call', 'batch', 'session')
+
+_EXPERIMENT_IDS = {}
+_OPEN_SESSIONS = weakref.WeakSet()
+
+
+def _end_open_sessions():
+    """End all process sessions that are still open at exit."""
+    for process in list(_OPEN_SESSIONS):
+        process.end_session()
+
+
+atexit.register(_end_open_sessions)
+
+
+def get_experiment_id(name):
+    """Get the id of an mlflow experiment by name.
+
+    The experiment is created if it does not exist. Results are cached per
+    tracking uri so the tracking server is queried only once per experiment.
+    """
+    key = (mlflow.get_tracking_uri(), name)
+
+    if key not in _EXPERIMENT_IDS:
+        client = MlflowClient()
+        experiment = client.get_experiment_by_name(name)
+
+        if experiment is None:
+            experiment_id = client.create_experiment(name)
+        else:
+            experiment_id = experiment.experiment_id
+
+        _EXPERIMENT_IDS[key] = experiment_id
+
+    return _EXPERIMENT_IDS[key]
 
 
 class MLFlowMixin:
@@ -14,53 +63,328 @@ class MLFlowMixin:
 
     This mixin will provides functionally to record all
     of the process runs using mlflow.
+
+    If async_logging is True, metrics, params and tags logged during a run are
+    buffered and written in batches from a background thread (see
+    :class:`BatchLogger`). Batches are written every flush_interval seconds
+    or whenever max_batch_size values are pending, and all values are written
+    before the run ends.
+
+    The run_scope option controls how process calls are grouped into mlflow
+    runs:
+
+    * ``'call'`` (default): every call opens its own run.
+    * ``'batch'``: all calls made within :meth:`map` share a single run.
+    * ``'session'``: all calls share a single run, opened on the first call
+      (or by :meth:`start_session`) and ended by :meth:`end_session` or at
+      exit.
+
+    Within a shared run, metrics logged without a step are logged with the
+    index of the call as step.
+
+    If aggregate is True, metrics are not sent to mlflow one by one. Instead
+    their count, mean, std, min, max and quantiles are logged as
+    ``<metric>/<statistic>`` every aggregate_every values, every
+    aggregate_interval seconds and when the run ends (see
+    :class:`MetricAggregator`). A histogram of every metric is logged as the
+    ``metrics/histograms.json`` artifact, and if log_raw_metrics is True all
+    raw values are written to a local columnar file that is logged as a single
+    artifact under ``metrics/``.
+
+    Numpy arrays and pandas dataframes can be logged as artifacts with
+    :meth:`log_array` and :meth:`log_dataframe`. They are uploaded in the
+    background to a content addressed blob store shared by all runs of the
+    experiment (see :class:`ArtifactStore`), so identical outputs are only
+    uploaded once. All uploads finish before the run ends.
+
+    The state of the current mlflow run is not part of the process
+    fingerprint and is dropped when the process is pickled.
     """
 
+    # Attributes that hold the state of the current mlflow run
+    run_state = (
+        'mlflow_run',
+        'batch_logger',
+        'aggregator',
+        'call_index',
+        'artifact_stores',
+        '_session',
+    )
+
+    fingerprint_ignore = Process.fingerprint_ignore + run_state
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        self.experiment = kwargs.pop('experiment', None)
+        self.run_name = kwargs.pop('run_name', None)
+        self.run_id = kwargs.pop('run_id', None)
+        self.experiment_id = kwargs.pop('experiment_id', None)
+        self.nested = kwargs.pop('nested', None)
+
+        self.async_logging = kwargs.pop('async_logging', False)
+        self.flush_interval = kwargs.pop('flush_interval', 5.0)
+        self.max_batch_size = kwargs.pop('max_batch_size', 1000)
 
-        self.experiment = kwargs.get('experiment', None)
-        self.run_name = kwargs.get('run_name', None)
-        self.run_id = kwargs.get('run_id', None)
-        self.experiment_id = kwargs.get('experiment_id', None)
-        self.nested = kwargs.get('nested', None)
+        self.run_scope = kwargs.pop('run_scope', 'call')
+        self.aggregate = kwargs.pop('aggregate', False)
+        self.aggregate_every = kwargs.pop('aggregate_every', None)
+        self.aggregate_interval = kwargs.pop('aggregate_interval', None)
+        self.log_raw_metrics = kwargs.pop('log_raw_metrics', False)
+
+        if self.run_scope not in RUN_SCOPES:
+            message = 'Unknown run scope {}. Valid options are: {}'
+            message = message.format(self.run_scope, ', '.join(RUN_SCOPES))
+            raise ValueError(message)
+
+        tracking_uri = kwargs.pop('tracking_uri', None)
+
+        super().__init__(*args, **kwargs)
 
         self.mlflow_run = None
+        self.batch_logger = None
+        self.aggregator = None
+        self.call_index = None
+        self.artifact_stores = {}
+        self._session = None
+
+        if tracking_uri is not None:
+            mlflow.set_tracking_uri(tracking_uri)
 
-        if 'tracking_uri' in kwargs:
-            mlflow.set_tracking_uri(kwargs['tracking_uri'])
+    def __getstate__(self):
+        """Drop the state of the current mlflow run when pickling."""
+        state = self.__dict__.copy()
+        for name in self.run_state:
+            state[name] = {} if name == 'artifact_stores' else None
+        return state
 
     def start_run(self):
         """Start an mlflow run.
 
         Uses the configurations passed at intialization.
         """
+        experiment_id = self.experiment_id
+        if experiment_id is None and self.experiment is not None:
+            experiment_id = get_experiment_id(self.experiment)
+
         return mlflow.start_run(
             run_id=self.run_id,
-            experiment_id=self.experiment_id,
+            experiment_id=experiment_id,
             run_name=self.run_name,
             nested=self.nested)
 
-    @staticmethod
-    def log_param(key, value):
+    @contextlib.contextmanager
+    def scope(self):
+        """Open an mlflow run shared by all calls made within the context.
+
+        While the context is active, process calls do not open new runs. At
+        exit all pending logs and aggregated metrics are written and the run
+        is ended.
+        """
+        with self.start_run() as mlflow_run:
+            # Bind mlflow run to self for use in run
+            self.mlflow_run = mlflow_run
+            self.call_index = 0
+
+            if self.async_logging:
+                self.batch_logger = BatchLogger(
+                    mlflow_run.info.run_id,
+                    max_batch_size=self.max_batch_size,
+                    flush_interval=self.flush_interval)
+
+            if self.aggregate:
+                self.start_aggregation()
+
+            try:
+                yield mlflow_run
+
+            finally:
+                # Every step runs even if a previous one raises
+                try:
+                    try:
+                        self.end_aggregation()
+                    finally:
+                        self._close_artifact_store(
+                            mlflow_run.info.experiment_id)
+                finally:
+                    # Write pending logs and unbind mlflow run
+                    try:
+                        self._close_batch_logger()
+                    finally:
+                        self._unbind_run()
+
+    def _close_artifact_store(self, experiment_id):
+        # Wait for pending uploads and release the upload threads
+        if experiment_id in self.artifact_stores:
+            self.artifact_stores[experiment_id].close()
+
+    def _close_batch_logger(self):
+        batch_logger, self.batch_logger = self.batch_logger, None
+        if batch_logger is not None:
+            batch_logger.close()
+
+    def _unbind_run(self):
+        self.mlflow_run = None
+        self.call_index = None
+
+    def start_aggregation(self):
+        """Start aggregating the metrics logged in the current run."""
+        raw_path = None
+        if self.log_raw_metrics:
+            raw_path = os.path.join(tempfile.mkdtemp(), 'raw_metrics')
+
+        self.aggregator = MetricAggregator(
+            self._write_metrics,
+            every_n_steps=self.aggregate_every,
+            every_seconds=self.aggregate_interval,
+            raw_path=raw_path)
+
+    def end_aggregation(self):
+        """Log the remaining aggregated metrics and their artifacts."""
+        if self.aggregator is None:
+            return
+
+        aggregator, self.aggregator = self.aggregator, None
+        raw_path = aggregator.close()
+
+        if aggregator.sketches:
+            mlflow.log_dict(
+                aggregator.histograms(),
+                'metrics/histograms.json')
+
+        if raw_path is not None:
+            mlflow.log_artifact(raw_path, artifact_path='metrics')
+            shutil.rmtree(os.path.dirname(raw_path), ignore_errors=True)
+
+    def start_session(self):
+        """Open the run shared by all calls of a session.
+
+        Does nothing if a session is already open.
+        """
+        if self._session is not None:
+            return
+
+        self._session = contextlib.ExitStack()
+        self._session.enter_context(self.scope())
+        _OPEN_SESSIONS.add(self)
+
+    def end_session(self):
+        """Write all session logs and end the session run."""
+        if self._session is None:
+            return
+
+        session, self._session = self._session, None
+        _OPEN_SESSIONS.discard(self)
+        session.close()
+
+    def map(self, data):
+        """Run the process on every datum of an iterable.
+
+        With the 'batch' run scope all calls share a single mlflow run.
+
+        Returns
+        -------
+        list
+            The outputs in the same order as the inputs.
+        """
+        if self.run_scope != 'batch' or self.mlflow_run is not None:
+            return [self(datum) for datum in data]
+
+        with self.scope():
+            return [self(datum) for datum in data]
+
+    def log_param(self, key, value):
         """Log parameter using mlflow logging utilities."""
+        if self.batch_logger is not None:
+            self.batch_logger.log_param(key, value)
+            return
+
         mlflow.log_param(key, value)
 
-    @staticmethod
-    def log_params(params):
+    def log_params(self, params):
         """Log parameters using mlflow logging utilities."""
+        if self.batch_logger is not None:
+            self.batch_logger.log_params(params)
+            return
+
         mlflow.log_params(params)
 
-    @staticmethod
-    def log_metric(key, value, step=None):
+    def log_metric(self, key, value, step=None):
         """Log a metric using mlflow logging utilities."""
-        mlflow.log_metric(key, value, step=step)
+        self.log_metrics({key: value}, step=step)
 
-    @staticmethod
-    def log_metrics(metrics, step=None):
+    def log_metrics(self, metrics, step=None):
         """Log metrics using mlflow logging utilities."""
+        if step is None and self.run_scope != 'call':
+            step = self.call_index
+
+        if self.aggregator is not None:
+            self.aggregator.update_many(metrics, step=step)
+            return
+
+        self._write_metrics(metrics, step=step)
+
+    def _write_metrics(self, metrics, step=None):
+        if self.batch_logger is not None:
+            self.batch_logger.log_metrics(metrics, step=step)
+            return
+
         mlflow.log_metrics(metrics, step=step)
 
+    def get_artifact_store(self):
+        """Get the artifact store of the experiment of the current run."""
+        if self.mlflow_run is None:
+            message = 'Artifacts can only be logged within an mlflow run.'
+            raise ValueError(message)
+
+        experiment_id = self.mlflow_run.info.experiment_id
+        if experiment_id not in self.artifact_stores:
+            self.artifact_stores[experiment_id] = ArtifactStore(experiment_id)
+
+        return self.artifact_stores[experiment_id]
+
+    def log_array(self, name, array, datatype=None, compress=False):
+        """Log a numpy array as an artifact of the current run.
+
+        The array is stored as a ``.npy`` file, or as a compressed ``.npz``
+        file if compress is True.
+        """
+        store = self.get_artifact_store()
+        return store.log(
+            self.mlflow_run.info.run_id,
+            name,
+            array,
+            datatype=datatype,
+            compress=compress)
+
+    def log_dataframe(self, name, frame, datatype=None, fmt='parquet'):
+        """Log a pandas dataframe as an artifact of the current run.
+
+        The dataframe is stored as a Parquet file, or as a Feather file if
+        fmt is 'feather'.
+        """
+        store = self.get_artifact_store()
+        return store.log(
+            self.mlflow_run.info.run_id,
+            name,
+            frame,
+            datatype=datatype,
+            dataframe_format=fmt)
+
+    def set_tag(self, key, value):
+        """Set a run tag using mlflow logging utilities."""
+        if self.batch_logger is not None:
+            self.batch_logger.set_tag(key, value)
+            return
+
+        mlflow.set_tag(key, value)
+
+    def set_tags(self, tags):
+        """Set run tags using mlflow logging utilities."""
+        if self.batch_logger is not None:
+            self.batch_logger.set_tags(tags)
+            return
+
+        mlflow.set_tags(tags)
+
     def __call__(self, *args, **kwargs):
         """Run the process.
 
@@ -68,22 +392,21 @@ class MLFlowMixin:
         the output for the given inputs. All computation is wrapped
         within an mlflow run to store any run metrics, logs etc.
         """
-        if self.experiment is not None:
-            mlflow.set_experiment(self.experiment)
-
-        with self.start_run() as mlflow_run:
-            # Bind mlflow run to self for use in run
-            self.mlflow_run = mlflow_run
+        if self.mlflow_run is None and self.run_scope == 'session':
+            self.start_session()
 
-            output = self.run(*args, **kwargs)
+        if self.mlflow_run is None:
+            with self.scope():
+                return self.run(*args, **kwargs)
 
-            # Unbind mlflow run
-            self.mlflow_run = None
+        try:
+            return self.run(*args, **kwargs)
 
-            return output
+        finally:
+            self.call_index += 1
 
 
-class MLFlowProcess(Process, MLFlowMixin):  # pylint: disable=abstract-method
+class MLFlowProcess(MLFlowMixin, Process):  # pylint: disable=abstract-method
     """MLFlow Process.
 
     This processes generate an mlflow run and thus can log and store
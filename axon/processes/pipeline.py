@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Pipeline Module.
+
+This module defines pipelines: chains of processes applied one after the
+other. Consecutive processes that declare themselves as fusable are grouped
+into a single :class:`FusedProcess` so that the whole chain is called and
+validated only once.
+"""
+import functools
+
+from axon.processes.base import Process
+
+
+def check_compatible(first, second):
+    """Check that the output of a process can be fed to the next one.
+
+    Processes that do not declare their data types are assumed to be
+    compatible.
+
+    Raises
+    ------
+    ValueError
+        If both data types are declared and they differ.
+    """
+    output_dtype = first.get_output_dtype()
+    input_dtype = second.get_input_dtype()
+
+    if output_dtype is None or input_dtype is None:
+        return
+
+    if output_dtype != input_dtype:
+        message = (
+            'Output of process {} does not match input of process {}. '
+            '(output={}, input={})')
+        message = message.format(
+            first.name,
+            second.name,
+            repr(output_dtype),
+            repr(input_dtype))
+        raise ValueError(message)
+
+
+def validate_datum(dtype, datum):
+    """Check that a datum is of the given DataType.
+
+    Raises
+    ------
+    ValueError
+        If the datum does not validate against the DataType.
+    """
+    if dtype is None:
+        return
+
+    if not dtype.validate(datum):
+        message = 'Datum is not of the expected DataType. (dtype={})'
+        message = message.format(repr(dtype))
+        raise ValueError(message)
+
+
+def is_trusted(data, dtype):
+    """Check whether data was validated in bulk against a DataType."""
+    if dtype is None or not hasattr(data, 'is_validated'):
+        return False
+
+    return data.datum_datatype == dtype and data.is_validated()
+
+
+def run_unit(unit, datum, validate=False, trusted=False):
+    """Call a pipeline unit on a datum.
+
+    If validate is True the datum is checked against the input DataType of
+    the unit and the result against its output DataType. Trusted data is
+    not checked against the input DataType.
+    """
+    if validate and not trusted:
+        validate_datum(unit.get_input_dtype(), datum)
+
+    output = unit(datum)
+
+    if validate:
+        validate_datum(unit.get_output_dtype(), output)
+
+    return output
+
+
+def run_units(units, datum, validate=False, trusted=False):
+    """Call a chain of pipeline units on a datum.
+
+    Trusted data is not checked against the input DataType of the first
+    unit.
+    """
+    for number, unit in enumerate(units):
+        datum = run_unit(
+            unit,
+            datum,
+            validate=validate,
+            trusted=trusted and number == 0)
+
+    return datum
+
+
+class FusedProcess(Process):
+    """Fused chain of processes.
+
+    A fused process runs a chain of fusable processes as a single process.
+    Intermediate results are passed directly from the run method of one
+    process to the next, bypassing their :meth:`__call__` entrypoints. Its
+    input and output DataTypes are those at the boundaries of the chain.
+    """
+
+    fusable = True
+
+    def __init__(self, processes):
+        """Create a fused process from a list of processes."""
+        processes = tuple(processes)
+
+        if not processes:
+            message = 'Cannot fuse an empty chain of processes.'
+            raise ValueError(message)
+
+        for process in processes:
+            if not process.fusable:
+                message = 'Process {} is not fusable.'.format(process.name)
+                raise ValueError(message)
+
+        for first, second in zip(processes, processes[1:]):
+            check_compatible(first, second)
+
+        self.processes = processes
+        self.name = ' > '.join(str(process.name) for process in processes)
+
+        super().__init__(
+            input_dtype=processes[0].get_input_dtype(),
+            output_dtype=processes[-1].get_output_dtype())
+
+    def run(self, datum):  # pylint: disable=arguments-differ
+        """Run all processes in the chain."""
+        for process in self.processes:
+            datum = process.run(datum)
+
+        return datum
+
+
+def fuse_processes(processes):
+    """Group consecutive fusable processes.
+
+    Returns a list of pipeline units in which every maximal run of two or
+    more consecutive fusable processes is replaced by a
+    :class:`FusedProcess`. Non fusable processes are left untouched.
+    """
+    units = []
+    chain = []
+
+    def close_chain():
+        if len(chain) == 1:
+            units.append(chain[0])
+        elif chain:
+            units.append(FusedProcess(chain))
+        del chain[:]
+
+    for process in processes:
+        if process.fusable:
+            chain.append(process)
+            continue
+
+        close_chain()
+        units.append(process)
+
+    close_chain()
+    return units
+
+
+class Pipeline(Process):
+    """Pipeline of processes.
+
+    A pipeline applies a list of processes in order to a single datum. The
+    data types of consecutive processes are checked for compatibility at
+    construction.
+
+    If fuse is True (the default) consecutive fusable processes are executed
+    as a single :class:`FusedProcess`. If validate is True every datum is
+    validated at the boundaries of each pipeline unit, hence fused chains are
+    only validated once.
+
+    Examples
+    --------
+    .. code-block:: python
+        pipeline = Pipeline([Normalize(), Frame(), LogCompress()])
+        spectrogram = pipeline(wav)
+
+        with ProcessPoolExecutor() as executor:
+            spectrograms = pipeline.map(wavs, executor=executor)
+    """
+
+    name = 'Pipeline'
+
+    def __init__(self, processes, fuse=True, validate=False):
+        """Create a pipeline from a list of processes."""
+        processes = list(processes)
+
+        if not processes:
+            message = 'A pipeline must have at least one process.'
+            raise ValueError(message)
+
+        for first, second in zip(processes, processes[1:]):
+            check_compatible(first, second)
+
+        self.processes = processes
+        self.validate = validate
+
+        if fuse:
+            self.units = fuse_processes(processes)
+        else:
+            self.units = list(processes)
+
+        super().__init__(
+            input_dtype=processes[0].get_input_dtype(),
+            output_dtype=processes[-1].get_output_dtype())
+
+    def run(self, datum):  # pylint: disable=arguments-differ
+        """Run all processes of the pipeline on a single datum."""
+        return run_units(self.units, datum, validate=self.validate)
+
+    def imap(self, data, executor=None, chunksize=1):
+        """Run the pipeline lazily over an iterable of data.
+
+        Every datum goes through all the pipeline units before the next one
+        starts, so intermediate results are never collected. If an executor
+        (such as a :class:`concurrent.futures.ProcessPoolExecutor`) is
+        given, the data are submitted to it in chunks of chunksize data, and
+        every chunk runs the whole pipeline in a single task.
+
+        If data is a dataset validated in bulk (see
+        :meth:`Dataset.validate`) against the input DataType of the
+        pipeline, its items are not validated again.
+
+        Returns
+        -------
+        iterator
+            The pipeline outputs in the same order as the inputs.
+        """
+        trusted = self.validate and is_trusted(data, self.get_input_dtype())
+        func = functools.partial(
+            run_units,
+            self.units,
+            validate=self.validate,
+            trusted=trusted)
+
+        if executor is None:
+            return map(func, data)
+
+        return executor.map(func, data, chunksize=chunksize)
+
+    def map(self, data, executor=None, chunksize=1):
+        """Run the pipeline over an iterable of data.
+
+        See :meth:`imap`.
+
+        Returns
+        -------
+        list
+            The pipeline outputs in the same order as the inputs.
+        """
+        return list(self.imap(data, executor=executor, chunksize=chunksize))
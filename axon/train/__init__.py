@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""Train module.
+
+This module contains the base class of model trainers, their
+non-blocking checkpoints and parallel hyperparameter sweeps.
+"""
+from .checkpoint import CheckpointManager
+from .sweep import ASHAScheduler
+from .sweep import Sweep
+from .trainer import Trainer
+
+
+__all__ = [
+    'ASHAScheduler',
+    'CheckpointManager',
+    'Sweep',
+    'Trainer',
+]
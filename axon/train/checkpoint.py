@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""Checkpoint Module.
+
+This module saves training state without stalling the training loop. The
+state is copied into memory in the calling thread, which is fast, and
+written to disk from a background thread. Every file is written to a
+temporary path and renamed, so a checkpoint on disk is always complete, and
+an index of checksums lets readers skip checkpoints that were corrupted
+afterwards.
+"""
+import copy
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mlflow
+from mlflow.tracking import MlflowClient
+
+
+INDEX = 'checkpoints.json'
+MODES = ('min', 'max')
+
+
+def atomic_write(path, payload):
+    """Write bytes to a file through a temporary file and a rename."""
+    temporary = '{}.tmp'.format(path)
+    with open(temporary, 'wb') as fileobj:
+        fileobj.write(payload)
+        fileobj.flush()
+        os.fsync(fileobj.fileno())
+    os.replace(temporary, path)
+
+
+def snapshot(state):
+    """Copy a training state so later updates do not change it."""
+    return copy.deepcopy(state)
+
+
+class CheckpointManager:
+    """Background writer and reader of training checkpoints.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the checkpoint files.
+    keep_last : int, optional
+        Number of most recent checkpoints to keep. All are kept if None.
+    keep_best : int, optional
+        Number of checkpoints with the best monitored metric to keep, on top
+        of the most recent ones.
+    monitor : str, optional
+        Name of the metric that ranks checkpoints. Needed by keep_best.
+    mode : str
+        Whether lower ('min') or higher ('max') metric values are better.
+    log_artifacts : bool
+        Whether to log written checkpoints as artifacts of the mlflow run
+        that is active when :meth:`save` is called.
+    artifact_path : str
+        Artifact directory of logged checkpoints.
+    max_pending : int
+        Number of snapshots waiting to be written before :meth:`save`
+        blocks, which bounds the memory held by snapshots.
+
+    Examples
+    --------
+    .. code-block:: python
+        manager = CheckpointManager('checkpoints', keep_last=2, keep_best=1,
+                                    monitor='loss')
+        for step in range(start, steps):
+            ...
+            if step % 1000 == 0:
+                manager.save(step, {'weights': weights}, {'loss': loss})
+        manager.close()
+    """
+
+    def __init__(
+            self,
+            directory,
+            keep_last=3,
+            keep_best=None,
+            monitor=None,
+            mode='min',
+            log_artifacts=False,
+            artifact_path='checkpoints',
+            max_pending=1):
+        """Create a checkpoint manager."""
+        if mode not in MODES:
+            message = 'Unknown mode {}. Valid options are: {}'
+            raise ValueError(message.format(mode, ', '.join(MODES)))
+
+        if keep_best and monitor is None:
+            message = 'A monitored metric is needed to keep the best.'
+            raise ValueError(message)
+
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.monitor = monitor
+        self.mode = mode
+        self.log_artifacts = log_artifacts
+        self.artifact_path = artifact_path
+
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._read_index()
+
+        # Remove files of writes interrupted before their rename
+        for path in glob.glob(os.path.join(directory, '*.tmp')):
+            os.remove(path)
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def _read_index(self):
+        path = os.path.join(self.directory, INDEX)
+        if not os.path.exists(path):
+            return []
+
+        with open(path) as fileobj:
+            return json.load(fileobj)
+
+    def _write_index(self, entries):
+        payload = json.dumps(entries, indent=2).encode()
+        atomic_write(os.path.join(self.directory, INDEX), payload)
+
+    def _entries(self):
+        # The writer thread replaces the entry list, it never changes it
+        with self._lock:
+            return self.entries
+
+    def path(self, step):
+        """Get the file of the checkpoint of a step."""
+        return os.path.join(self.directory, 'ckpt-{:09d}.pkl'.format(step))
+
+    def save(self, step, state, metrics=None):
+        """Snapshot a training state and write it in the background.
+
+        Only the in-memory copy of the state happens in the calling thread.
+        Errors of previous writes are raised here.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of the written file path.
+        """
+        self._collect(wait=False)
+        run_id = None
+        if self.log_artifacts:
+            run = mlflow.active_run()
+            run_id = run.info.run_id if run is not None else None
+
+        state = snapshot(state)
+        metrics = {
+            key: float(value) for key, value in (metrics or {}).items()}
+
+        self._pending.acquire()
+        future = self._executor.submit(
+            self._write, step, state, metrics, run_id)
+        future.add_done_callback(lambda _: self._pending.release())
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def _collect(self, wait):
+        """Forget finished writes and raise the first of their errors."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+
+        error = None
+        for future in futures:
+            if not wait and not future.done():
+                with self._lock:
+                    self._futures.append(future)
+                continue
+
+            if error is None:
+                error = future.exception()
+
+        if error is not None:
+            raise error
+
+    def _write(self, step, state, metrics, run_id):
+        payload = pickle.dumps(
+            {'step': step, 'state': state, 'metrics': metrics},
+            protocol=pickle.HIGHEST_PROTOCOL)
+        path = self.path(step)
+        atomic_write(path, payload)
+
+        entry = {
+            'step': step,
+            'file': os.path.basename(path),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'metrics': metrics,
+        }
+        with self._lock:
+            entries = [
+                other for other in self.entries if other['step'] != step]
+            entries.append(entry)
+            entries.sort(key=lambda other: other['step'])
+            self.entries, removed = self._apply_retention(entries)
+            entries = self.entries
+
+        self._write_index(entries)
+        for other in removed:
+            self._remove(other)
+
+        if run_id is not None:
+            MlflowClient().log_artifact(
+                run_id, path, artifact_path=self.artifact_path)
+
+        return path
+
+    def _ranked(self, entries):
+        """Entries with the monitored metric, best first."""
+        ranked = [
+            entry for entry in entries
+            if self.monitor in entry['metrics']]
+        return sorted(
+            ranked,
+            key=lambda entry: entry['metrics'][self.monitor],
+            reverse=self.mode == 'max')
+
+    def _apply_retention(self, entries):
+        # Split entries into the kept and the removed ones
+        if self.keep_last is None:
+            return entries, []
+
+        recent = entries[-self.keep_last:] if self.keep_last else []
+        keep = {entry['step'] for entry in recent}
+        if self.keep_best:
+            keep.update(
+                entry['step']
+                for entry in self._ranked(entries)[:self.keep_best])
+
+        kept = [entry for entry in entries if entry['step'] in keep]
+        removed = [entry for entry in entries if entry['step'] not in keep]
+        return kept, removed
+
+    def _remove(self, entry):
+        path = os.path.join(self.directory, entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def steps(self):
+        """Steps of the checkpoints on disk, in order."""
+        return [entry['step'] for entry in self._entries()]
+
+    def _load_entry(self, entry):
+        path = os.path.join(self.directory, entry['file'])
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as fileobj:
+            payload = fileobj.read()
+
+        if hashlib.sha256(payload).hexdigest() != entry['sha256']:
+            return None
+
+        return pickle.loads(payload)
+
+    def load(self, step):
+        """Load the checkpoint of a step.
+
+        Returns
+        -------
+        dict
+            The step, state and metrics of the checkpoint, or None if it is
+            missing or corrupted.
+        """
+        self.wait()
+        for entry in self._entries():
+            if entry['step'] == step:
+                return self._load_entry(entry)
+        return None
+
+    def latest(self):
+        """Load the most recent valid checkpoint, or None if there is none.
+
+        Corrupted or missing checkpoints are skipped.
+        """
+        self.wait()
+        for entry in reversed(self._entries()):
+            checkpoint = self._load_entry(entry)
+            if checkpoint is not None:
+                return checkpoint
+        return None
+
+    def best(self):
+        """Load the valid checkpoint with the best monitored metric."""
+        self.wait()
+        for entry in self._ranked(self._entries()):
+            checkpoint = self._load_entry(entry)
+            if checkpoint is not None:
+                return checkpoint
+        return None
+
+    def wait(self):
+        """Wait for all pending writes and raise their errors."""
+        self._collect(wait=True)
+
+    def close(self):
+        """Write all pending checkpoints and stop the writer thread."""
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
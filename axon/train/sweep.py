@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""Sweep Module.
+
+This module runs hyperparameter sweeps of trainers in a local process pool.
+Configurations are scheduled with asynchronous successive halving (ASHA):
+every configuration is first trained with a small budget, and only the best
+of every rung of budgets is promoted to train further. Workers never wait
+for a rung to complete, so cores freed by stopped configurations are reused
+right away.
+
+Promoted configurations resume from their own checkpoints (see
+:class:`axon.train.CheckpointManager`) instead of training from scratch.
+"""
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+import math
+import os
+import time
+
+import mlflow
+from mlflow.entities import Metric
+from mlflow.entities import Param
+from mlflow.tracking import MlflowClient
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+from mlflow.utils.mlflow_tags import MLFLOW_RUN_NAME
+from threadpoolctl import threadpool_limits
+
+from axon.train.checkpoint import CheckpointManager
+
+
+MODES = ('min', 'max')
+
+THREAD_VARIABLES = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def limit_threads(num_threads):
+    """Limit the threads of numerical libraries in a worker process.
+
+    Thread pools of libraries already loaded in the worker (forked workers
+    inherit the ones of the parent) are limited with threadpoolctl, and the
+    environment variables limit libraries loaded later.
+    """
+    for variable in THREAD_VARIABLES:
+        os.environ[variable] = str(num_threads)
+
+    threadpool_limits(limits=num_threads)
+
+
+def run_trial(trainer_class, config, budget, directory):
+    """Train a configuration up to a budget, resuming from checkpoints.
+
+    Returns
+    -------
+    dict
+        Metrics returned by the trainer.
+    """
+    trainer = trainer_class(
+        checkpoints=CheckpointManager(directory, keep_last=1),
+        **config)
+
+    try:
+        metrics = trainer(budget)
+    finally:
+        trainer.checkpoints.close()
+
+    return {key: float(value) for key, value in metrics.items()}
+
+
+class ASHAScheduler:
+    """Asynchronous successive halving scheduler.
+
+    Budgets of rung k are ``min_resource * eta ** k``, up to max_resource.
+    A configuration is promoted from a rung when it is among the best
+    1 / eta of the configurations reported on that rung.
+
+    Parameters
+    ----------
+    num_trials : int
+        Number of configurations.
+    min_resource : int
+        Budget of the first rung.
+    max_resource : int
+        Largest budget.
+    eta : int
+        Reduction factor between rungs.
+    mode : str
+        Whether lower ('min') or higher ('max') metric values are better.
+    """
+
+    def __init__(self, num_trials, min_resource, max_resource, eta=3,
+                 mode='min'):
+        """Create a scheduler."""
+        if mode not in MODES:
+            message = 'Unknown mode {}. Valid options are: {}'
+            raise ValueError(message.format(mode, ', '.join(MODES)))
+
+        if eta < 2 or min_resource > max_resource:
+            message = (
+                'Invalid successive halving parameters. '
+                '(eta={}, min_resource={}, max_resource={})')
+            raise ValueError(
+                message.format(eta, min_resource, max_resource))
+
+        self.num_trials = num_trials
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.eta = eta
+        self.mode = mode
+
+        self.num_rungs = 1 + int(math.floor(
+            math.log(max_resource / min_resource, eta) + 1e-9))
+        self.rungs = [{} for _ in range(self.num_rungs)]
+        self.promoted = [set() for _ in range(self.num_rungs)]
+        self.started = 0
+
+    def budget(self, rung):
+        """Get the budget of a rung."""
+        return min(self.min_resource * self.eta ** rung, self.max_resource)
+
+    def _sorted(self, rung):
+        results = self.rungs[rung]
+        return sorted(
+            results,
+            key=results.get,
+            reverse=self.mode == 'max')
+
+    def next_job(self):
+        """Get the next (trial, rung) to train, or None if there is none.
+
+        Promotions from the highest rungs come first, then new trials.
+        """
+        for rung in reversed(range(self.num_rungs - 1)):
+            top = self._sorted(rung)[:len(self.rungs[rung]) // self.eta]
+            for trial in top:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    return trial, rung + 1
+
+        if self.started < self.num_trials:
+            self.started += 1
+            return self.started - 1, 0
+
+        return None
+
+    def report(self, trial, rung, value):
+        """Record the metric of a trial on a rung."""
+        if value is None or math.isnan(value):
+            value = math.inf if self.mode == 'min' else -math.inf
+        self.rungs[rung][trial] = value
+
+    def best(self):
+        """Get the best trial of the highest rung with results."""
+        for rung in reversed(range(self.num_rungs)):
+            if self.rungs[rung]:
+                return self._sorted(rung)[0]
+        return None
+
+
+class Trial:
+    """State of a configuration of a sweep."""
+
+    def __init__(self, index, config):
+        """Create a trial that has not started."""
+        self.index = index
+        self.config = config
+        self.status = 'pending'
+        self.budget = 0
+        self.metrics = {}
+        self.run_id = None
+        self.error = None
+
+    def __repr__(self):
+        """Get full representation."""
+        return 'Trial(index={}, config={!r}, status={!r}, budget={})'.format(
+            self.index, self.config, self.status, self.budget)
+
+
+class Sweep:
+    """Parallel hyperparameter sweep of a trainer with ASHA early stopping.
+
+    Every trial is logged as an mlflow run nested in the run of the sweep,
+    with its configuration as parameters and its metrics at every rung,
+    using the budget as step.
+
+    Parameters
+    ----------
+    trainer_class : type
+        Subclass of :class:`axon.train.Trainer`. It is created with the
+        keyword arguments of a configuration and a ``checkpoints`` manager,
+        and called with the budget (for instance the number of steps) to
+        train up to. The call must return a dictionary of metrics.
+    configs : list of dict
+        Configurations to try.
+    metric : str
+        Name of the metric that ranks configurations.
+    directory : str
+        Directory of the checkpoints of every trial.
+    min_resource, max_resource : int
+        Smallest and largest budgets.
+    eta : int
+        Reduction factor of successive halving.
+    mode : str
+        Whether lower ('min') or higher ('max') metric values are better.
+    max_cpus : int, optional
+        Number of cores of the sweep. Defaults to all cores.
+    cpus_per_trial : int
+        Cores used by a trial. Numerical libraries of the workers are
+        limited to this number of threads.
+    experiment_id : str, optional
+        Mlflow experiment of the sweep runs. Runs are not logged if
+        log_runs is False.
+    """
+
+    def __init__(
+            self,
+            trainer_class,
+            configs,
+            metric,
+            directory,
+            min_resource=1,
+            max_resource=27,
+            eta=3,
+            mode='min',
+            max_cpus=None,
+            cpus_per_trial=1,
+            experiment_id=None,
+            run_name='sweep',
+            log_runs=True):
+        """Create a sweep."""
+        self.trainer_class = trainer_class
+        self.trials = [
+            Trial(index, dict(config)) for index, config in enumerate(configs)]
+        self.metric = metric
+        self.directory = directory
+        self.scheduler = ASHAScheduler(
+            len(self.trials), min_resource, max_resource, eta=eta, mode=mode)
+
+        max_cpus = max_cpus or os.cpu_count() or 1
+        self.cpus_per_trial = cpus_per_trial
+        self.num_workers = max(max_cpus // cpus_per_trial, 1)
+
+        self.experiment_id = experiment_id
+        self.run_name = run_name
+        self.log_runs = log_runs
+        self.run_id = None
+        self._client = None
+
+    def trial_directory(self, trial):
+        """Get the checkpoint directory of a trial."""
+        return os.path.join(
+            self.directory, 'trial-{:04d}'.format(trial.index))
+
+    def run(self):
+        """Run the sweep.
+
+        Returns
+        -------
+        list of Trial
+            Trials, with the best first.
+        """
+        if not self.log_runs:
+            self._schedule()
+            return self.ranked()
+
+        self._client = MlflowClient()
+        with mlflow.start_run(
+                experiment_id=self.experiment_id,
+                run_name=self.run_name,
+                nested=mlflow.active_run() is not None) as run:
+            self.run_id = run.info.run_id
+            mlflow.log_params({
+                'metric': self.metric,
+                'num_trials': len(self.trials),
+                'eta': self.scheduler.eta,
+                'min_resource': self.scheduler.min_resource,
+                'max_resource': self.scheduler.max_resource,
+            })
+
+            try:
+                self._schedule()
+            finally:
+                self._end_trial_runs()
+
+            best = self.ranked()[0] if self.trials else None
+            if best is not None and self.metric in best.metrics:
+                mlflow.log_metric(
+                    'best/{}'.format(self.metric), best.metrics[self.metric])
+                mlflow.set_tag('best_run_id', best.run_id)
+
+        return self.ranked()
+
+    def _schedule(self):
+        with ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=limit_threads,
+                initargs=(self.cpus_per_trial,)) as executor:
+            running = {}
+            while True:
+                while len(running) < self.num_workers:
+                    job = self.scheduler.next_job()
+                    if job is None:
+                        break
+                    running[self._submit(executor, *job)] = job
+
+                if not running:
+                    return
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(*running.pop(future), future)
+
+    def _submit(self, executor, index, rung):
+        trial = self.trials[index]
+        trial.status = 'running'
+        self._start_trial_run(trial)
+        return executor.submit(
+            run_trial,
+            self.trainer_class,
+            trial.config,
+            self.scheduler.budget(rung),
+            self.trial_directory(trial))
+
+    def _finish(self, index, rung, future):
+        trial = self.trials[index]
+        try:
+            metrics = future.result()
+        except Exception as error:  # pylint: disable=broad-except
+            trial.status = 'failed'
+            trial.error = error
+            self.scheduler.report(index, rung, None)
+            return
+
+        budget = self.scheduler.budget(rung)
+        trial.budget = budget
+        trial.metrics = metrics
+        trial.status = 'paused'
+        if rung == self.scheduler.num_rungs - 1:
+            trial.status = 'completed'
+
+        self.scheduler.report(index, rung, metrics.get(self.metric))
+        if trial.run_id is not None:
+            timestamp = int(time.time() * 1000)
+            self._client.log_batch(trial.run_id, metrics=[
+                Metric(key, value, timestamp, budget)
+                for key, value in metrics.items()])
+
+    def _start_trial_run(self, trial):
+        if not self.log_runs or trial.run_id is not None:
+            return
+
+        run = self._client.create_run(
+            experiment_id=mlflow.get_run(self.run_id).info.experiment_id,
+            tags={
+                MLFLOW_PARENT_RUN_ID: self.run_id,
+                MLFLOW_RUN_NAME: 'trial-{:04d}'.format(trial.index),
+            })
+        trial.run_id = run.info.run_id
+        self._client.log_batch(trial.run_id, params=[
+            Param(key, str(value))
+            for key, value in trial.config.items()])
+
+    def _end_trial_runs(self):
+        statuses = {'completed': 'FINISHED', 'failed': 'FAILED'}
+        for trial in self.trials:
+            if trial.run_id is None:
+                continue
+
+            if trial.status == 'paused':
+                trial.status = 'stopped'
+
+            self._client.set_tag(
+                trial.run_id, 'axon.sweep.status', trial.status)
+            self._client.set_terminated(
+                trial.run_id, statuses.get(trial.status, 'KILLED'))
+
+    def ranked(self):
+        """Get the trials sorted by budget reached and metric, best first."""
+        sign = 1 if self.scheduler.mode == 'min' else -1
+
+        def key(trial):
+            value = trial.metrics.get(self.metric)
+            if value is None or math.isnan(value):
+                return (-trial.budget, math.inf)
+            return (-trial.budget, sign * value)
+
+        return sorted(self.trials, key=key)
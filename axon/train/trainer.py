@@ -1,6 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Trainer Module.
+
+This module defines the base class of model trainers.
+"""
 from abc import ABC
-from axon.process import Process
+
+from axon.processes import Process
 
 
 class Trainer(Process, ABC):
-    pass
+    """Trainer base class.
+
+    Trainers with a :class:`~axon.train.checkpoint.CheckpointManager`
+    resume from the latest valid checkpoint when called. The restored step
+    is available as ``start_step`` within :meth:`run`, and new checkpoints
+    are saved without blocking with :meth:`checkpoint`. All checkpoints are
+    written before the call returns.
+
+    Subclasses that use checkpoints must implement :meth:`get_state` and
+    :meth:`set_state`.
+
+    Examples
+    --------
+    .. code-block:: python
+        class LinearTrainer(Trainer):
+            name = 'Linear Trainer'
+
+            def get_state(self):
+                return {'weights': self.weights}
+
+            def set_state(self, state):
+                self.weights = state['weights']
+
+            def run(self, dataset, steps):
+                for step in range(self.start_step, steps):
+                    loss = self.train_step(dataset)
+                    if step % 100 == 0:
+                        self.checkpoint(step + 1, {'loss': loss})
+
+        trainer = LinearTrainer(
+            checkpoints=CheckpointManager('checkpoints', keep_best=1,
+                                          monitor='loss'))
+        trainer(dataset, steps=10000)
+    """
+
+    fingerprint_ignore = Process.fingerprint_ignore + (
+        'checkpoints', 'start_step')
+
+    def __init__(self, *args, checkpoints=None, resume=True, **kwargs):
+        """Create a trainer, optionally with a checkpoint manager."""
+        super().__init__(*args, **kwargs)
+        self.checkpoints = checkpoints
+        self.resume = resume
+        self.start_step = 0
+
+    def get_state(self):
+        """Get the training state to checkpoint."""
+        message = '{} does not support checkpoints.'
+        raise NotImplementedError(message.format(type(self).__name__))
+
+    def set_state(self, state):
+        """Restore a checkpointed training state."""
+        message = '{} does not support checkpoints.'
+        raise NotImplementedError(message.format(type(self).__name__))
+
+    def checkpoint(self, step, metrics=None):
+        """Save the training state in the background.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of the written file path.
+        """
+        if self.checkpoints is None:
+            message = 'Trainer has no checkpoint manager.'
+            raise ValueError(message)
+
+        return self.checkpoints.save(step, self.get_state(), metrics)
+
+    def restore(self):
+        """Restore the state of the latest valid checkpoint.
+
+        Returns
+        -------
+        int
+            Step of the restored checkpoint, or zero if there is none.
+        """
+        self.start_step = 0
+        if self.checkpoints is None:
+            return self.start_step
+
+        checkpoint = self.checkpoints.latest()
+        if checkpoint is not None:
+            self.set_state(checkpoint['state'])
+            self.start_step = checkpoint['step']
+            self.logger.info('Resumed from step %s', self.start_step)
+
+        return self.start_step
+
+    def __call__(self, *args, **kwargs):
+        """Restore the latest checkpoint, train and write all checkpoints."""
+        if self.resume:
+            self.restore()
+
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            if self.checkpoints is not None:
+                self.checkpoints.wait()
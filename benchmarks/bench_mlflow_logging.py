@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Benchmark synchronous against batched asynchronous mlflow logging.
+
+Logs one metric per training step into a local sqlite tracking store and
+reports the time the training loop spends per logging call.
+
+Usage::
+
+    python benchmarks/bench_mlflow_logging.py [--steps N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import mlflow
+
+from axon.processes import MLFlowProcess
+
+
+class Loop(MLFlowProcess):
+    name = 'Training Loop'
+
+    def run(self, steps):  # pylint: disable=arguments-differ
+        start = time.perf_counter()
+        for step in range(steps):
+            self.log_metric('loss', 1.0 / (step + 1), step=step)
+        return (time.perf_counter() - start) / steps
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        mlflow.set_tracking_uri('sqlite:///{}'.format(directory / 'db'))
+        experiment_id = mlflow.create_experiment(
+            'benchmark',
+            artifact_location=(directory / 'artifacts').as_uri())
+
+        for async_logging in (False, True):
+            process = Loop(
+                experiment_id=experiment_id,
+                async_logging=async_logging)
+
+            start = time.perf_counter()
+            per_step = process(args.steps)
+            total = time.perf_counter() - start
+
+            print('{:<6} {:>10.1f} us/step in loop, {:>7.2f} s total'.format(
+                'async' if async_logging else 'sync',
+                per_step * 1e6,
+                total))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Benchmark fused against unfused pipelines.
+
+Runs a five stage audio chain (normalize, pre-emphasis, framing, windowing
+and log compression) over a batch of one second clips, sequentially and
+under a process pool, and reports the throughput in clips per second.
+
+Usage::
+
+    python benchmarks/bench_pipeline.py [--clips N] [--workers N]
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import axon.datatypes as dt
+from axon.processes import Process
+from axon.processes import Pipeline
+
+
+SAMPLERATE = 16000
+FRAME_LENGTH = 512
+HOP_LENGTH = 256
+N_FRAMES = 1 + (SAMPLERATE - FRAME_LENGTH) // HOP_LENGTH
+
+WAV = dt.NumpyArray(dt.Float(), (SAMPLERATE,))
+FRAMES = dt.NumpyArray(dt.Float(), (N_FRAMES, FRAME_LENGTH))
+
+
+class Normalize(Process):
+    name = 'Normalize'
+    fusable = True
+    input_dtype = WAV
+    output_dtype = WAV
+
+    def run(self, wav):  # pylint: disable=arguments-differ
+        return wav / max(np.abs(wav).max(), 1e-8)
+
+
+class PreEmphasis(Process):
+    name = 'Pre-emphasis'
+    fusable = True
+    input_dtype = WAV
+    output_dtype = WAV
+
+    def run(self, wav):  # pylint: disable=arguments-differ
+        return np.append(wav[:1], wav[1:] - 0.97 * wav[:-1])
+
+
+class Frame(Process):
+    name = 'Frame'
+    fusable = True
+    input_dtype = WAV
+    output_dtype = FRAMES
+
+    def run(self, wav):  # pylint: disable=arguments-differ
+        stride = wav.strides[0]
+        return np.lib.stride_tricks.as_strided(
+            wav,
+            shape=(N_FRAMES, FRAME_LENGTH),
+            strides=(HOP_LENGTH * stride, stride),
+            writeable=False)
+
+
+class Window(Process):
+    name = 'Window'
+    fusable = True
+    input_dtype = FRAMES
+    output_dtype = FRAMES
+    window = np.hanning(FRAME_LENGTH)
+
+    def run(self, frames):  # pylint: disable=arguments-differ
+        return frames * self.window
+
+
+class LogCompress(Process):
+    name = 'Log Compress'
+    fusable = True
+    input_dtype = FRAMES
+    output_dtype = FRAMES
+
+    def run(self, frames):  # pylint: disable=arguments-differ
+        return np.log1p(np.abs(frames))
+
+
+def chain():
+    """Build the five stage chain."""
+    return [Normalize(), PreEmphasis(), Frame(), Window(), LogCompress()]
+
+
+def throughput(pipeline, clips, executor=None):
+    """Return clips per second processed by the pipeline."""
+    start = time.perf_counter()
+    pipeline.map(clips, executor=executor, chunksize=16)
+    return len(clips) / (time.perf_counter() - start)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clips', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    random = np.random.RandomState(0)
+    clips = [random.randn(SAMPLERATE) for _ in range(args.clips)]
+    few_clips = clips[:max(args.clips // 20, 1)]
+
+    rows = []
+    for fuse in (False, True):
+        label = 'fused' if fuse else 'unfused'
+        pipeline = Pipeline(chain(), fuse=fuse)
+        rows.append((label, 'sequential', throughput(pipeline, clips)))
+
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            rows.append(
+                (label, 'pool', throughput(pipeline, clips, executor)))
+
+        pipeline = Pipeline(chain(), fuse=fuse, validate=True)
+        rows.append(
+            (label, 'validated', throughput(pipeline, few_clips)))
+
+    for label, mode, value in rows:
+        print('{:<8} {:<11} {:>10.1f} clips/s'.format(label, mode, value))
+
+
+if __name__ == '__main__':
+    main()
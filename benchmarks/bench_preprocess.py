@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Benchmark batched feature extraction against per-clip loops.
+
+Runs every preprocess process on a batch of clips, by default the quarter
+second windows of a detector at 16 kHz, once on the whole batch and once
+clip by clip, and reports the throughput of both.
+
+Usage::
+
+    python benchmarks/bench_preprocess.py [--batch-size N] [--num-samples N]
+        [--repeat N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from axon.preprocess import Frame
+from axon.preprocess import MelSpectrogram
+from axon.preprocess import PCEN
+from axon.preprocess import Resample
+from axon.preprocess import Spectrogram
+
+
+SAMPLE_RATE = 16000
+
+
+def best_time(function, repeat):
+    """Return the best time of several calls to a function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def processes(num_samples):
+    """Build the processes to benchmark with a function of their inputs."""
+    mel = MelSpectrogram(
+        num_samples, SAMPLE_RATE, n_fft=512, hop_length=160, n_mels=64)
+    pcen = PCEN(64, mel.num_frames(), SAMPLE_RATE, 160)
+    return [
+        (Frame(num_samples, 400, 160), None),
+        (Spectrogram(num_samples, n_fft=512, hop_length=160), None),
+        (mel, None),
+        (pcen, mel.run),
+        (Resample(num_samples, SAMPLE_RATE, 22050), None),
+    ]
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--num-samples', type=int, default=4000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random = np.random.RandomState(0)
+    clips = random.randn(args.batch_size, args.num_samples)
+    clips = clips.astype(np.float32)
+
+    for process, prepare in processes(args.num_samples):
+        inputs = clips if prepare is None else prepare(clips)
+
+        batched = best_time(lambda: process.run(inputs), args.repeat)
+        looped = best_time(
+            lambda: [process.run(clip) for clip in inputs], args.repeat)
+
+        print('{:<16} {:>10.1f} clips/s batched {:>10.1f} clips/s looped '
+              '{:>6.2f}x'.format(
+                  process.name,
+                  len(inputs) / batched,
+                  len(inputs) / looped,
+                  looped / batched))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the DataType-driven serializers against pickle.
+
+Saves and loads a spectrogram, an annotation table and an annotation record
+through a filesystem backend, once with the serializer registered for their
+DataType and once pickled, and reports the payload sizes, the round trip
+times and the time to load the value from an in-memory payload.
+
+Usage::
+
+    python benchmarks/bench_serialization.py [--repeat N]
+"""
+import argparse
+import functools
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import axon.datatypes as dt
+from axon.data import serializers
+
+
+def values():
+    """Build the values to benchmark with their DataTypes."""
+    random = np.random.RandomState(0)
+    spectrogram = random.rand(513, 2000).astype(np.float32)
+    table = pd.DataFrame({
+        'start': random.rand(50000),
+        'end': random.rand(50000),
+        'label': ['species-{}'.format(i % 100) for i in range(50000)],
+    })
+    record = {
+        'bounds': (0.5, 2.0),
+        'labels': ['species-1', 'call-1'],
+        'score': 0.5,
+    }
+
+    return [
+        ('spectrogram', spectrogram, dt.NumpyArray(dt.Float(), (513, 2000))),
+        ('table', table, dt.DataFrame({
+            'start': dt.Float(),
+            'end': dt.Float(),
+            'label': dt.String()}, (50000, 3))),
+        ('record', record, dt.Dict({
+            'bounds': dt.Tuple([dt.Float(), dt.Float()]),
+            'labels': dt.List(dt.String()),
+            'score': dt.Float()})),
+    ]
+
+
+def best_time(function, repeat):
+    """Return the best time of several calls to a function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pickler = serializers.SERIALIZERS['pickle']
+    with tempfile.TemporaryDirectory() as directory:
+        for name, value, datatype in values():
+            registered = serializers.get_serializer(datatype, value)
+
+            for serializer in (registered, pickler):
+                path = os.path.join(directory, name + '.' + serializer.name)
+                dump_time = best_time(
+                    functools.partial(serializer.dump, value, path, datatype),
+                    args.repeat)
+                load_time = best_time(
+                    functools.partial(serializer.load, path, datatype),
+                    args.repeat)
+                size = os.path.getsize(path)
+
+                payload = serializer.dumps(value, datatype)
+                loads_time = best_time(
+                    functools.partial(serializer.loads, payload, datatype),
+                    args.repeat)
+
+                print('{:<12} {:<8} {:>12} bytes {:>9.3f} ms dump '
+                      '{:>9.3f} ms load {:>9.3f} ms loads'.format(
+                          name, serializer.name, size,
+                          dump_time * 1000, load_time * 1000,
+                          loads_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
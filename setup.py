@@ -22,6 +22,8 @@ setup(
         'mlflow',
         'luigi',
         'dvc',
+        'scipy>=1.4',
+        'threadpoolctl',
     ],
     classifiers=[
         'Programming Language :: Python :: 3.6',
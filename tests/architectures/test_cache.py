@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Test module for the LRU model cache."""
+import gc
+import os
+import threading
+import time
+
+import mlflow
+import numpy as np
+import pytest
+
+from axon.architectures import ArchitectureBase
+from axon.architectures import ModelCache
+from axon.data.cache import sizeof
+
+
+class Linear(ArchitectureBase):
+    """Architecture of linear models stored as npy files."""
+
+    name = 'Linear'
+    artifact_path = 'model/weights.npy'
+
+    # Shared by all instances, as process attributes change fingerprints
+    loads = []
+
+    def load(self, path):
+        Linear.loads.append(path)
+        return np.load(path, mmap_mode='r')
+
+    def run(self, model, features):  # pylint: disable=arguments-differ
+        return features @ model
+
+
+class Listed(Linear):
+    """Architecture of linear models loaded as lists of weights."""
+
+    name = 'Listed'
+
+    def load(self, path):
+        return list(super().load(path))
+
+
+@pytest.fixture(autouse=True)
+def reset_architecture():
+    """Clear the shared state of the test architecture."""
+    Linear.loads = []
+
+
+def test_model_size():
+    """Check arrays are counted by buffer and shared arrays once."""
+    weights = np.zeros(1000)
+    assert sizeof(weights) == 8000
+
+    model = {'a': weights, 'b': weights, 'c': weights[:10]}
+    assert 8000 < sizeof(model) < 9000
+
+
+def test_lru_eviction():
+    """Check least recently used models are evicted past the byte budget."""
+    cache = ModelCache(max_bytes=100, size_of=len)
+
+    cache.get('a', lambda: 'a' * 40)
+    cache.get('b', lambda: 'b' * 40)
+    cache.get('a', lambda: pytest.fail('Cached model was loaded'))
+    cache.get('c', lambda: 'c' * 40)
+
+    assert cache.keys() == ['a', 'c']
+    assert cache.nbytes == 80
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['hits'] == 1
+
+    # Models larger than the budget are not cached
+    assert cache.get('d', lambda: 'd' * 200) == 'd' * 200
+    assert 'd' not in cache
+    assert len(cache) == 2
+
+    cache.evict('a')
+    assert cache.keys() == ['c'] and cache.nbytes == 40
+
+    with pytest.raises(ValueError):
+        ModelCache(max_bytes=0)
+
+
+def test_single_flight_loading():
+    """Check concurrent requests of a model share a single load."""
+    cache = ModelCache(max_bytes=2 ** 20)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return np.ones(10)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            cache.get('model', loader)))
+        for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(result is results[0] for result in results)
+    assert cache.stats['misses'] == 1
+    assert cache.stats['waits'] + cache.stats['hits'] == 7
+
+
+def test_load_errors_are_not_cached():
+    """Check failed loads reach all waiting requests and can be retried."""
+    cache = ModelCache(max_bytes=2 ** 20)
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise IOError('Unreachable')
+
+    def waiter():
+        started.wait()
+        try:
+            cache.get('model', lambda: 'other')
+        except IOError as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    with pytest.raises(IOError):
+        cache.get('model', failing)
+    thread.join()
+
+    assert len(errors) == 1
+    assert 'model' not in cache
+    assert cache.get('model', lambda: 'retried') == 'retried'
+
+
+def test_load_from_mlflow(tmp_path, experiment):
+    """Check models of runs are downloaded once and preloaded."""
+    _, experiment_id = experiment
+    run_ids = []
+    for value in (1, 2):
+        directory = tmp_path / str(value)
+        directory.mkdir()
+        path = str(directory / 'weights.npy')
+        np.save(path, np.full(4, value, dtype=float))
+        with mlflow.start_run(experiment_id=experiment_id) as run:
+            mlflow.log_artifact(path, artifact_path='model')
+        run_ids.append(run.info.run_id)
+
+    architecture = Linear()
+    cache = ModelCache(max_bytes=2 ** 20)
+
+    model = cache.load(architecture, run_ids[0])
+    assert architecture(model, np.ones(4)) == 4
+    assert cache.load(Linear(), run_ids[0]) is model
+    assert len(Linear.loads) == 1
+
+    future = cache.preload(architecture, run_ids[1])
+    assert future.result()[0] == 2
+    assert architecture.cache_key(run_ids[1]) in cache
+    assert len(Linear.loads) == 2
+    cache.close()
+
+    # Downloads are kept while their memory mapped models are referenced
+    assert all(os.path.exists(path) for path in Linear.loads)
+    cache.evict(architecture.cache_key(run_ids[0]))
+    assert os.path.exists(Linear.loads[0])
+    assert architecture(model, np.ones(4)) == 4
+    del model
+    gc.collect()
+    assert not os.path.exists(Linear.loads[0])
+    assert os.path.exists(Linear.loads[1])
+    cache.clear()
+    del future
+    gc.collect()
+    assert not os.path.exists(Linear.loads[1])
+
+    # Models loaded without a cache are read before the download is removed
+    assert architecture.load_model(run_ids[0])[0] == 1
+    assert not os.path.exists(Linear.loads[2])
+
+    # Artifacts of models that cannot be weakly referenced are kept until
+    # the cache is closed
+    assert cache.load(Listed(), run_ids[0])[0] == 1
+    cache.clear()
+    gc.collect()
+    assert os.path.exists(Linear.loads[3])
+    cache.close()
+    assert not os.path.exists(Linear.loads[3])
+
+
+def test_cache_key_is_memoized(monkeypatch):
+    """Check the architecture fingerprint is computed once per instance."""
+    architecture = Linear()
+    key = architecture.cache_key('run')
+    monkeypatch.setattr(
+        Linear, 'fingerprint', lambda self: pytest.fail('Not memoized'))
+    assert architecture.cache_key('other') == (key[0], 'other')
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Shared fixtures for Axon tests."""
+import uuid
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def tracking_uri(tmp_path_factory):
+    """Point mlflow to a local sqlite tracking store."""
+    mlflow = pytest.importorskip('mlflow')
+    directory = tmp_path_factory.mktemp('mlflow')
+    uri = 'sqlite:///{}'.format(directory / 'mlflow.db')
+    mlflow.set_tracking_uri(uri)
+    return uri
+
+
+@pytest.fixture
+def experiment(tracking_uri, tmp_path):
+    """Create a fresh mlflow experiment with a local artifact store."""
+    # pylint: disable=redefined-outer-name,unused-argument
+    import mlflow
+
+    name = 'test-{}'.format(uuid.uuid4().hex)
+    artifact_location = (tmp_path / 'artifacts').as_uri()
+    experiment_id = mlflow.create_experiment(
+        name, artifact_location=artifact_location)
+    return name, experiment_id
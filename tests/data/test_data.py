@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Test module for lazy data objects and storage backends."""
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.data import ByteLRUCache
+from axon.data import Data
+from axon.data import FileSystemBackend
+from axon.data import SQLiteBackend
+
+
+@pytest.fixture(params=['filesystem', 'sqlite'])
+def backend(request, tmp_path):
+    """A storage backend of each kind."""
+    if request.param == 'filesystem':
+        return FileSystemBackend(str(tmp_path / 'store'))
+
+    return SQLiteBackend(str(tmp_path / 'store.sqlite'))
+
+
+class CountingBackend:
+    """Wrapper of a backend that counts loads."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.uri = backend.uri
+        self.loads = 0
+
+    def load(self, locator, datatype=None):
+        self.loads += 1
+        return self.backend.load(locator, datatype)
+
+
+def test_save_and_lazy_load(backend):
+    """Check values are saved and only loaded when touched."""
+    datatype = dt.NumpyArray(dt.Float(), (3,))
+    cache = ByteLRUCache()
+    Data.from_value(np.ones(3), datatype, cache=cache).save('a/one', backend)
+    assert backend.exists('a/one')
+
+    counting = CountingBackend(backend)
+    data = Data(datatype, 'a/one', counting, cache=ByteLRUCache())
+    assert not data.loaded
+    assert counting.loads == 0
+
+    np.testing.assert_array_equal(data.value, np.ones(3))
+    np.testing.assert_array_equal(data.value, np.ones(3))
+    assert counting.loads == 1
+    assert data.loaded
+
+    data.unload()
+    assert not data.loaded
+    data.value  # pylint: disable=pointless-statement
+    assert counting.loads == 2
+
+    backend.delete('a/one')
+    assert not backend.exists('a/one')
+
+
+def test_pickled_handles_are_cheap(backend):
+    """Check pickled stored data does not carry its value."""
+    data = Data.from_value(np.zeros(10000), cache=ByteLRUCache())
+    data.save('big', backend)
+
+    payload = pickle.dumps(data)
+    assert len(payload) < 10000
+
+    restored = pickle.loads(payload)
+    assert not restored.loaded
+    assert restored.value.shape == (10000,)
+
+
+def test_pickled_unsaved_changes(backend):
+    """Check values that are not saved yet survive pickling."""
+    data = Data.from_value(np.zeros(3), cache=ByteLRUCache())
+    data.save('small', backend)
+    assert not data.dirty
+
+    data.set(np.ones(3))
+    assert data.dirty
+    restored = pickle.loads(pickle.dumps(data))
+    assert restored.dirty
+    np.testing.assert_array_equal(restored.value, np.ones(3))
+
+    restored.unload()
+    np.testing.assert_array_equal(restored.value, np.zeros(3))
+
+    unsaved = Data(value=np.ones(2), locator='unsaved', backend=backend)
+    restored = pickle.loads(pickle.dumps(unsaved))
+    np.testing.assert_array_equal(restored.value, np.ones(2))
+
+
+def test_validation_on_load(backend):
+    """Check values are validated against the DataType if requested."""
+    backend.save('text', 'not an array')
+    data = Data(dt.NumpyArray(dt.Float(), (3,)), 'text', backend,
+                validate=True, cache=ByteLRUCache())
+
+    with pytest.raises(ValueError):
+        data.value  # pylint: disable=pointless-statement
+
+    with pytest.raises(ValueError):
+        Data()
+
+
+def test_cache_evicts_by_bytes():
+    """Check the cache evicts least recently used values over the limit."""
+    removed = []
+    cache = ByteLRUCache(
+        max_bytes=3000, on_remove=lambda key, value: removed.append(key))
+    cache.put('a', np.zeros(100))
+    cache.put('b', np.zeros(100))
+    cache.put('c', np.zeros(100))
+    assert cache.nbytes == 2400
+
+    cache.get('a')
+    cache.put('d', np.zeros(100))
+    assert 'b' not in cache
+    assert 'a' in cache
+    assert cache.nbytes == 2400
+    assert cache.stats.evictions == 1
+
+    assert not cache.put('huge', np.zeros(1000))
+    assert 'huge' not in cache
+
+    cache.resize(1000)
+    assert len(cache) == 1
+    assert cache.keys() == ['d']
+    assert removed == ['b', 'c', 'a']
+
+
+def test_cache_is_thread_safe():
+    """Check concurrent use keeps the byte count consistent."""
+    cache = ByteLRUCache(max_bytes=8000)
+
+    def work(offset):
+        for number in range(200):
+            cache.put((offset, number % 20), np.zeros(50))
+            cache.get((offset, (number * 7) % 20))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.nbytes <= 8000
+    assert cache.nbytes == 400 * len(cache)
+
+
+def test_filesystem_locators_stay_in_root(tmp_path):
+    """Check locators can not escape the backend root."""
+    backend = FileSystemBackend(str(tmp_path / 'store'))
+    with pytest.raises(ValueError):
+        backend.save('../outside', 1)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Test module for the connection pool and the database backend."""
+import functools
+import pickle
+import sqlite3
+import threading
+
+import pytest
+
+import axon.datatypes as dt
+from axon.data import ByteLRUCache
+from axon.data import ConnectionPool
+from axon.data import Data
+from axon.data import DatabaseBackend
+
+
+ROW = dt.Dict({'label': dt.String(), 'score': dt.Float()})
+
+
+def traced_connect(path, statements):
+    """Open a sqlite connection that records its statements."""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.set_trace_callback(statements.append)
+    return connection
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Path of a database with a table of 1200 annotations."""
+    path = str(tmp_path / 'annotations.sqlite')
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            'CREATE TABLE annotations '
+            '(id INTEGER PRIMARY KEY, label TEXT, score REAL)')
+        connection.executemany(
+            'INSERT INTO annotations VALUES (?, ?, ?)',
+            [(i, 'label-{}'.format(i % 7), i / 10) for i in range(1200)])
+    return path
+
+
+def test_pool_reuses_connections(database):
+    """Check connections are reused and bounded by the pool size."""
+    pool = ConnectionPool.sqlite(database, size=2, timeout=0.1)
+
+    with pool.connection():
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+
+    barrier = threading.Barrier(4)
+
+    def work():
+        barrier.wait()
+        for _ in range(20):
+            with pool.connection() as connection:
+                connection.execute('SELECT COUNT(*) FROM annotations')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.opened == 2
+
+    copy = pickle.loads(pickle.dumps(pool))
+    assert copy.uri == pool.uri
+    assert copy.opened == 0
+    pool.close()
+
+
+def test_pool_rolls_back_on_errors(database):
+    """Check changes are only committed if the block succeeds."""
+    pool = ConnectionPool.sqlite(database, size=1)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connection:
+            connection.execute('DELETE FROM annotations')
+            raise RuntimeError
+
+    with pool.connection() as connection:
+        count = connection.execute(
+            'SELECT COUNT(*) FROM annotations').fetchone()[0]
+    assert count == 1200
+
+
+def test_backend_round_trip(database):
+    """Check rows are saved, loaded and deleted by key."""
+    backend = DatabaseBackend(
+        ConnectionPool.sqlite(database), 'annotations',
+        columns=['label', 'score'])
+
+    assert backend.load(3) == {'label': 'label-3', 'score': 0.3}
+
+    backend.save(5000, {'label': 'new', 'score': 1.0})
+    assert backend.exists(5000)
+    assert backend.load(5000) == {'label': 'new', 'score': 1.0}
+
+    backend.delete(5000)
+    assert not backend.exists(5000)
+    with pytest.raises(KeyError):
+        backend.load(5000)
+
+    with pytest.raises(ValueError):
+        DatabaseBackend(ConnectionPool.sqlite(database), 'bad; name')
+
+
+def test_prefetch_amortizes_queries(database):
+    """Check prefetching many data objects only issues batched queries."""
+    statements = []
+    pool = ConnectionPool(
+        functools.partial(traced_connect, database, statements),
+        uri='sqlite://annotations')
+    backend = DatabaseBackend(pool, 'annotations', columns=['label', 'score'])
+
+    cache = ByteLRUCache()
+    data = [
+        Data(ROW, key, backend, cache=cache, validate=True)
+        for key in range(1200)]
+    Data.prefetch(data)
+
+    selects = [
+        statement for statement in statements
+        if statement.startswith('SELECT')]
+    assert len(selects) == 3
+
+    assert all(item.loaded for item in data)
+    assert data[42].value == {'label': 'label-0', 'score': 4.2}
+
+    # Values are served from the cache afterwards
+    Data.prefetch(data)
+    assert len([
+        statement for statement in statements
+        if statement.startswith('SELECT')]) == 3
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Test module for the DataType-driven serializers."""
+import io
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import axon.datatypes as dt
+from axon.data import FileSystemBackend
+from axon.data import SQLiteBackend
+from axon.data import serializers
+
+
+SPECTROGRAM = dt.NumpyArray(dt.Float(), (256, 1024))
+TABLE = dt.DataFrame({'start': dt.Float(), 'label': dt.String()}, (2, 2))
+ANNOTATION = dt.Dict({
+    'bounds': dt.Tuple([dt.Float(), dt.Float()]),
+    'labels': dt.List(dt.String()),
+    'score': dt.Float(),
+})
+
+
+def annotation(index=0):
+    return {
+        'bounds': (index * 0.5, index * 0.5 + 1.5),
+        'labels': ['species-{}'.format(index), 'call-{}'.format(index)],
+        'score': 1 / (index + 1),
+    }
+
+
+def test_serializer_selection():
+    """Check every DataType is stored in its own format."""
+    frame = pd.DataFrame({'start': [0.0], 'label': ['a']})
+
+    assert serializers.get_serializer(SPECTROGRAM).name == 'npy'
+    assert serializers.get_serializer(TABLE, frame).name == 'feather'
+    assert serializers.get_serializer(
+        ANNOTATION, annotation()).name == 'msgpack'
+
+    # Containers of non primitive values fall back to pickle
+    value = {'bounds': np.zeros(2), 'labels': [], 'score': 0.0}
+    assert serializers.get_serializer(ANNOTATION, value).name == 'pickle'
+
+    # Tuples are only restored when the DataType is known
+    assert serializers.get_serializer(None, (1, 2)).name == 'pickle'
+    assert serializers.get_serializer(None, [1, 2]).name == 'msgpack'
+
+
+def test_round_trips():
+    """Check values survive a round trip through their serializer."""
+    array = np.random.RandomState(0).rand(256, 1024)
+    loaded = serializers.loads(serializers.dumps(array, SPECTROGRAM))
+    np.testing.assert_array_equal(loaded, array)
+    assert not loaded.flags.writeable
+
+    fortran = np.asfortranarray(array[:, :10])
+    np.testing.assert_array_equal(
+        serializers.loads(serializers.dumps(fortran)), fortran)
+
+    frame = pd.DataFrame({'start': [0.5, 1.5], 'label': ['a', 'b']})
+    pd.testing.assert_frame_equal(
+        serializers.loads(serializers.dumps(frame, TABLE)), frame)
+
+    value = annotation()
+    assert serializers.loads(
+        serializers.dumps(value, ANNOTATION), ANNOTATION) == value
+
+    assert serializers.loads(serializers.dumps({1: None})) == {1: None}
+
+
+def test_file_loads_are_memory_mapped(tmp_path):
+    """Check arrays and dataframes are memory mapped from files."""
+    backend = FileSystemBackend(str(tmp_path))
+    array = np.arange(1024, dtype=np.float32).reshape(32, 32)
+    backend.save('spectrogram', array, SPECTROGRAM)
+
+    loaded = backend.load('spectrogram', SPECTROGRAM)
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, array)
+
+    with open(backend.path('spectrogram'), 'rb') as fileobj:
+        assert fileobj.read(6) == serializers.NpySerializer.magic
+
+    frame = pd.DataFrame({'start': [0.5], 'label': ['a']})
+    backend.save('table', frame, TABLE)
+    pd.testing.assert_frame_equal(backend.load('table', TABLE), frame)
+
+
+def test_legacy_pickle_payloads(tmp_path):
+    """Check payloads pickled before the registry existed still load."""
+    backend = SQLiteBackend(str(tmp_path / 'store.sqlite'))
+    with backend.connection:
+        backend.connection.execute(
+            'INSERT INTO data VALUES (?, ?)',
+            ('old', pickle.dumps({'a': 1})))
+
+    assert backend.load('old') == {'a': 1}
+
+    with pytest.raises(ValueError):
+        serializers.loads(b'not a payload')
+
+
+def test_register_serializer():
+    """Check registered serializers take precedence."""
+    frame = pd.DataFrame({'start': [0.5], 'label': ['a']})
+    registry = {
+        key: list(names) for key, names in serializers.REGISTRY.items()}
+
+    try:
+        serializers.register(dt.DataFrame, 'parquet')
+        serializer = serializers.get_serializer(TABLE, frame)
+        assert serializer.name == 'parquet'
+        pd.testing.assert_frame_equal(
+            serializers.loads(serializer.dumps(frame)), frame)
+
+        with pytest.raises(ValueError):
+            serializers.register(dt.DataFrame, 'unknown')
+    finally:
+        serializers.REGISTRY.clear()
+        serializers.REGISTRY.update(registry)
+
+
+def test_serializers_without_magic():
+    """Check serializers without magic bytes are skipped on detection."""
+    class Text(serializers.Serializer):
+        name = 'text'
+
+        def dumps(self, value, datatype=None):
+            return value.encode()
+
+        def loads(self, payload, datatype=None):
+            return payload.decode()
+
+    serializers.SERIALIZERS['text'] = Text()
+    try:
+        assert serializers.loads(pickle.dumps([1])) == [1]
+        with pytest.raises(ValueError):
+            serializers.loads(b'plain text')
+    finally:
+        del serializers.SERIALIZERS['text']
+
+
+@pytest.mark.filterwarnings('ignore:Stored array in format 3.0')
+def test_npy_header_versions():
+    """Check payloads of every .npy format version are loaded."""
+    array = np.arange(6, dtype=np.float32).reshape(2, 3)
+    for version in ((1, 0), (2, 0), (3, 0)):
+        buffer = io.BytesIO()
+        np.lib.format.write_array(buffer, array, version=version)
+        loaded = serializers.loads(buffer.getvalue())
+        np.testing.assert_array_equal(loaded, array)
+        assert not loaded.flags.writeable
+
+    # Version 3.0 headers are UTF-8
+    records = np.zeros(2, dtype=[('\u03c0', np.float64)])
+    payload = serializers.dumps(records)
+    assert np.lib.format.read_magic(io.BytesIO(payload)) == (3, 0)
+    np.testing.assert_array_equal(serializers.loads(payload), records)
+
+    with pytest.raises(ValueError):
+        serializers.loads(b'\x93NUMPY\x09\x00' + payload[8:])
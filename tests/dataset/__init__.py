@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Test module for Axon Datasets."""
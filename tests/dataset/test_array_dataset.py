@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Test module for array backed datasets."""
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.dataset import ArrayDataset
+
+
+def make_clips():
+    """Create a few clips of different lengths."""
+    return [np.arange(length, dtype=np.float32) + length
+            for length in (3, 5, 2, 4)]
+
+
+def test_fixed_shape_items():
+    """Check fixed shape items are views of the buffer."""
+    data = np.arange(20).reshape(10, 2)
+    dataset = ArrayDataset(data)
+
+    assert len(dataset) == 10
+    assert np.shares_memory(dataset[3], data)
+    assert np.array_equal(dataset[-1], [18, 19])
+
+    subset = dataset[2:8:2]
+    assert len(subset) == 3
+    assert np.shares_memory(subset.data, data)
+    assert np.array_equal(subset[1], [8, 9])
+
+    with pytest.raises(IndexError):
+        dataset[10]  # pylint: disable=pointless-statement
+
+
+def test_variable_length_items():
+    """Check variable length items are sliced by offsets."""
+    clips = make_clips()
+    dataset = ArrayDataset.from_arrays(clips)
+
+    assert len(dataset) == 4
+    assert list(dataset.lengths()) == [3, 5, 2, 4]
+    for clip, item in zip(clips, dataset):
+        assert np.array_equal(clip, item)
+        assert np.shares_memory(item, dataset.data)
+
+    subset = dataset[1:3]
+    assert subset.index is None
+    assert np.shares_memory(subset.offsets, dataset.offsets)
+    assert np.array_equal(subset[0], clips[1])
+    assert np.array_equal(subset[-1], clips[2])
+
+
+def test_fancy_indexing_returns_views():
+    """Check index arrays and masks return datasets sharing the buffer."""
+    clips = make_clips()
+    dataset = ArrayDataset.from_arrays(clips)
+
+    subset = dataset[[3, 0, 0]]
+    assert subset.data is dataset.data
+    assert [len(item) for item in subset] == [4, 3, 3]
+    assert np.array_equal(subset[0], clips[3])
+
+    nested = subset[np.array([True, False, True])]
+    assert np.array_equal(nested.positions(), [3, 0])
+    assert list(nested.lengths()) == [4, 3]
+
+    reverse = dataset[::-1]
+    assert np.array_equal(reverse[0], clips[-1])
+
+    with pytest.raises(IndexError):
+        dataset[np.array([True])]  # pylint: disable=pointless-statement
+
+
+def test_datum_datatype_is_kept():
+    """Check dataset views keep the item DataType."""
+    datatype = dt.NumpyArray(dt.Float(), (2,))
+    dataset = ArrayDataset(np.zeros((4, 2)), datum_datatype=datatype)
+    assert dataset[1:].datum_datatype == datatype
+    assert dataset[[0]].datum_datatype == datatype
+
+
+def test_invalid_offsets():
+    """Check malformed offsets are rejected."""
+    with pytest.raises(ValueError):
+        ArrayDataset(np.zeros(5), offsets=[0, 3, 2])
+
+    with pytest.raises(ValueError):
+        ArrayDataset(np.zeros(5), offsets=[0, 6])
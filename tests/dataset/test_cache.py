@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Test module for persisted dataset caches."""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from axon.dataset import ArrayDataset
+from axon.dataset import CachedDataset
+from axon.dataset import Dataset
+from axon.processes import Process
+
+
+class Squares(Process):
+    """Process whose run method has nested code objects."""
+
+    name = 'Squares'
+
+    def __init__(self):
+        super().__init__()
+        self.exponents = {2, 3}
+
+    def run(self, values):  # pylint: disable=arguments-differ
+        return [value ** 2 for value in values]
+
+
+class Scale(Process):
+    """Process that scales arrays and counts its calls."""
+
+    name = 'Scale'
+    calls = 0
+
+    def __init__(self, factor):
+        super().__init__()
+        self.factor = factor
+
+    def run(self, array):  # pylint: disable=arguments-differ
+        Scale.calls += 1
+        return array * self.factor
+
+
+@pytest.fixture
+def clips():
+    """Variable length float clips."""
+    Scale.calls = 0
+    random = np.random.default_rng(0)
+    arrays = [random.normal(size=length) for length in range(1, 21)]
+    return ArrayDataset.from_arrays(arrays)
+
+
+def test_cache_is_reused(clips, tmp_path):
+    """Check the second pass reads memory mapped items from disk."""
+    scale = Scale(2.0)
+    cached = clips.map(scale).cache(str(tmp_path))
+    assert not cached.complete
+
+    first = [item.copy() for item in cached]
+    assert Scale.calls == 20
+    assert cached.complete
+
+    again = clips.map(scale).cache(str(tmp_path))
+    second = list(again)
+    assert Scale.calls == 20
+    assert isinstance(second[0], np.memmap)
+    assert len(again) == 20
+
+    for expected, item, clip in zip(first, second, clips):
+        np.testing.assert_array_equal(expected, item)
+        np.testing.assert_array_equal(item, clip * 2)
+
+
+def test_cache_key(clips, tmp_path):
+    """Check keys change with process parameters and source data."""
+    key = clips.map(Scale(2.0)).version()
+    assert key == clips.map(Scale(2.0)).version()
+    assert key != clips.map(Scale(3.0)).version()
+    assert key != clips[1:].map(Scale(2.0)).version()
+
+    assert Scale(1.0).fingerprint() != Scale(2.0).fingerprint()
+    assert clips.map(lambda x: x + 1).version() is not None
+
+
+def test_process_fingerprint():
+    """Check default process fingerprints depend on the attributes."""
+    class Offset(Process):
+        def __init__(self, offset):
+            super().__init__()
+            self.offset = offset
+
+        def run(self, value):  # pylint: disable=arguments-differ
+            return value + self.offset
+
+    assert Offset(1).fingerprint() == Offset(1).fingerprint()
+    assert Offset(1).fingerprint() != Offset(2).fingerprint()
+    ones = Offset(np.ones(3)).fingerprint()
+    assert ones != Offset(np.zeros(3)).fingerprint()
+
+
+def test_process_fingerprint_covers_helper_methods():
+    """Check changes to methods called by run change the fingerprint."""
+    class Helped(Process):
+        def run(self, value):  # pylint: disable=arguments-differ
+            return self.transform(value)
+
+        def transform(self, value):  # pylint: disable=no-self-use
+            return value + 1
+
+    class Changed(Process):
+        def run(self, value):  # pylint: disable=arguments-differ
+            return self.transform(value)
+
+        def transform(self, value):  # pylint: disable=no-self-use
+            return value + 2
+
+    # Compare the same qualified name with different helper code
+    Changed.__qualname__ = Helped.__qualname__
+    Changed.transform.__qualname__ = Helped.transform.__qualname__
+    Changed.run.__qualname__ = Helped.run.__qualname__
+    assert Helped().fingerprint() != Changed().fingerprint()
+
+
+def test_fingerprint_is_stable_across_sessions():
+    """Check fingerprints do not change between interpreter sessions."""
+    script = (
+        'from tests.dataset.test_cache import Squares; '
+        'print(Squares().fingerprint())')
+    root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+    fingerprints = set()
+    for seed in ('1', '2'):
+        environment = dict(os.environ, PYTHONHASHSEED=seed)
+        output = subprocess.run(
+            [sys.executable, '-c', script], cwd=root, env=environment,
+            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        fingerprints.add(output.stdout.strip())
+
+    assert fingerprints == {Squares().fingerprint()}
+
+
+def test_unstable_values_are_rejected():
+    """Check objects with a default repr cannot be fingerprinted."""
+    class Model:
+        pass
+
+    class Predict(Process):
+        def __init__(self):
+            super().__init__()
+            self.model = Model()
+
+        def run(self, value):  # pylint: disable=arguments-differ
+            return value
+
+    with pytest.raises(TypeError):
+        Predict().fingerprint()
+
+
+def test_cache_resumes(clips, tmp_path):
+    """Check an interrupted pass resumes from the complete shards."""
+    scale = Scale(2.0)
+    cached = clips.map(scale).cache(str(tmp_path), shard_items=4)
+
+    for number, _ in enumerate(cached):
+        if number == 9:
+            break
+    assert Scale.calls == 10
+    assert not cached.complete
+
+    items = list(cached)
+    assert Scale.calls == 20
+    assert cached.complete
+    assert len(items) == 20
+
+    for item, clip in zip(cached, clips):
+        np.testing.assert_array_equal(item, clip * 2)
+
+
+def test_cache_eviction(clips, tmp_path):
+    """Check least recently used entries are evicted over the budget."""
+    old = clips.map(Scale(2.0)).cache(str(tmp_path))
+    old.materialize()
+    os.utime(old.entry, (0, 0))
+
+    new = clips.map(Scale(3.0)).cache(str(tmp_path), max_bytes=1)
+    new.materialize()
+
+    assert not os.path.exists(old.entry)
+    assert new.complete
+
+
+def test_cache_needs_version(tmp_path):
+    """Check datasets without a version can not be cached."""
+    class Stream(Dataset):
+        def iter(self):
+            return iter([np.zeros(1)])
+
+        def len(self):
+            return 1
+
+    with pytest.raises(ValueError):
+        CachedDataset(Stream(), str(tmp_path))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Test module for batch collation."""
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.dataset import ArrayDataset
+from axon.dataset import Collator
+from axon.dataset import DataLoader
+from axon.dataset.collate import bucket_counts
+
+
+@pytest.fixture
+def clips():
+    """Clips of lengths 1 to 40 in shuffled order."""
+    random = np.random.default_rng(1)
+    lengths = random.permutation(np.arange(1, 41))
+    return ArrayDataset.from_arrays(
+        [np.full(length, length, dtype=np.float32) for length in lengths])
+
+
+def test_collate_pads_and_masks():
+    """Check padded data, lengths and masks of a batch."""
+    collator = Collator(pad_value=-1, pad_multiple=4)
+    batch = collator([np.ones(3), 2 * np.ones(5)])
+
+    assert batch.data.shape == (2, 8)
+    assert batch.data.flags['C_CONTIGUOUS']
+    assert batch.lengths.tolist() == [3, 5]
+    np.testing.assert_array_equal(batch.data[0], [1, 1, 1] + [-1] * 5)
+    np.testing.assert_array_equal(batch.mask.sum(axis=1), [3, 5])
+
+    assert collator.stats.padding == 8
+    assert collator.stats.padding_ratio == 0.5
+
+    assert batch.datatype == dt.Tuple([
+        dt.NumpyArray(dt.Float(), (2, 8)),
+        dt.NumpyArray(dt.Int(), (2,)),
+        dt.NumpyArray(dt.Bool(), (2, 8)),
+    ])
+
+
+def test_collate_trailing_dimensions_and_truncation():
+    """Check items with feature dimensions are truncated to max_length."""
+    collator = Collator(max_length=4)
+    items = [np.ones((6, 3)), np.ones((2, 3))]
+    batch = collator(items)
+
+    assert batch.data.shape == (2, 4, 3)
+    assert batch.lengths.tolist() == [4, 2]
+    assert batch.data[1, 2:].sum() == 0
+
+
+def test_buffers_are_reused():
+    """Check buffers are allocated once the largest batch has been seen."""
+    collator = Collator(num_buffers=2)
+    for length in [10, 10, 5, 8, 3, 10]:
+        collator([np.ones(length)] * 4)
+
+    assert collator.stats.allocations == 2
+    assert collator.stats.batches == 6
+
+    first = collator([np.ones(2)])
+    second = collator([np.ones(2)])
+    third = collator([np.ones(2)])
+    assert np.shares_memory(first.data, third.data)
+    assert not np.shares_memory(first.data, second.data)
+
+
+def test_batches_are_not_overwritten(clips):
+    """Check batches held by a loader are not reused by default."""
+    collator = Collator()
+    first = collator([np.ones(2)])
+    second = collator([np.zeros(2)])
+    assert not np.shares_memory(first.data, second.data)
+    assert first.data.sum() == 2
+
+    loader = DataLoader(clips.batch(4).map(collator), workers=4, prefetch=8)
+    batches = list(loader)
+    assert collator.stats.allocations == 12
+    lengths = sorted(
+        length for batch in batches for length in batch.lengths.tolist())
+    assert lengths == list(range(1, 41))
+    for batch in batches:
+        for row, length in zip(batch.data, batch.lengths):
+            np.testing.assert_array_equal(row[:length], length)
+
+
+def test_fixed_batch_datatype():
+    """Check fixed shape batches match the output DataType."""
+    collator = Collator(
+        max_length=6,
+        pad_to_max_length=True,
+        batch_size=3,
+        dtype='float32',
+        item_shape=(2,))
+    datatype = collator.get_output_dtype()
+    assert datatype == dt.Tuple([
+        dt.NumpyArray(dt.Float(), (3, 6, 2)),
+        dt.NumpyArray(dt.Int(), (3,)),
+        dt.NumpyArray(dt.Bool(), (3, 6)),
+    ])
+
+    batch = collator([np.ones((4, 2)), np.ones((8, 2))])
+    assert batch.datatype == datatype
+    assert batch.lengths.tolist() == [4, 6, 0]
+    assert not batch.mask[2].any()
+
+    assert Collator().get_output_dtype() is None
+    with pytest.raises(ValueError):
+        collator([np.ones((1, 2))] * 4)
+    with pytest.raises(ValueError):
+        Collator(pad_to_max_length=True)
+
+
+def test_bucketing_reduces_padding(clips):
+    """Check bucketing by length wastes less padding than plain batches."""
+    plain = Collator()
+    for batch in clips.batch(8).map(plain):
+        assert batch.data.shape[0] <= 8
+
+    bucketed = Collator()
+    batches = clips.bucket_by_length([10, 20, 30], 8).map(bucketed)
+    seen = []
+    for batch in batches:
+        seen.extend(batch.lengths.tolist())
+        bucket = np.searchsorted([10, 20, 30], batch.lengths)
+        assert len(set(bucket.tolist())) == 1
+
+    assert sorted(seen) == list(range(1, 41))
+    assert bucketed.stats.items == plain.stats.items == 40
+    assert bucketed.stats.padding_ratio < plain.stats.padding_ratio
+
+    counts = bucket_counts(clips.lengths(), [10, 20, 30])
+    assert counts.tolist() == [10, 10, 10, 10]
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Test module for the database dataset."""
+import sqlite3
+
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.data import ByteLRUCache
+from axon.data import ConnectionPool
+from axon.data import Data
+from axon.dataset import DatabaseDataset
+from axon.dataset import MetadataIndex
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Pool of connections to a database of 250 annotations."""
+    path = str(tmp_path / 'annotations.sqlite')
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            'CREATE TABLE annotations '
+            '(id INTEGER PRIMARY KEY, site TEXT, start REAL, flagged BOOL)')
+        connection.executemany(
+            'INSERT INTO annotations VALUES (?, ?, ?, ?)',
+            [(i * 2, 'site-{}'.format(i % 2), i / 4, i % 3 == 0)
+             for i in range(250)])
+    return ConnectionPool.sqlite(path, size=2)
+
+
+def test_keyset_pages(pool):
+    """Check rows are read in key order in pages."""
+    dataset = DatabaseDataset(pool, 'annotations', page_size=100)
+
+    assert len(dataset) == 250
+    assert [len(page) for page in dataset.pages()] == [100, 100, 50]
+
+    rows = list(dataset)
+    assert [row['id'] for row in rows] == [i * 2 for i in range(250)]
+    assert list(rows[0]) == ['id', 'site', 'start', 'flagged']
+
+    assert [row['id'] for row in dataset.iter_from(150)][:2] == [300, 302]
+    assert list(dataset.iter_from(250)) == []
+    assert dataset[-1]['id'] == 498
+
+
+def test_filtered_dataset(pool):
+    """Check where conditions and column selection."""
+    dataset = DatabaseDataset(
+        pool, 'annotations',
+        columns=['start'],
+        where='site = ?',
+        parameters=('site-1',),
+        page_size=30)
+
+    assert len(dataset) == 125
+    rows = list(dataset)
+    assert len(rows) == 125
+    assert rows[0] == {'start': 0.25}
+    assert dataset.keys()[:3] == [2, 6, 10]
+
+
+def test_get_many_and_data(pool):
+    """Check rows are fetched in bulk in the order of the keys."""
+    dataset = DatabaseDataset(pool, 'annotations', columns=['site'])
+    assert dataset.get_many([4, 2, 4]) == [
+        {'site': 'site-0'}, {'site': 'site-1'}, {'site': 'site-0'}]
+
+    with pytest.raises(KeyError):
+        dataset.get_many([1])
+
+    cache = ByteLRUCache()
+    data = dataset.data()
+    for item in data:
+        item._cache = cache  # pylint: disable=protected-access
+    Data.prefetch(data)
+    assert len(cache) == 250
+    assert data[1].value == {'site': 'site-1'}
+
+
+def test_positional_access(pool, tmp_path):
+    """Check rows are read by position, slice, positions and mask."""
+    dataset = DatabaseDataset(pool, 'annotations', columns=['id'])
+
+    assert dataset[3] == {'id': 6}
+    assert dataset[-2] == {'id': 496}
+    with pytest.raises(IndexError):
+        dataset[250]  # pylint: disable=pointless-statement
+
+    assert list(dataset[[3, 1]]) == [{'id': 6}, {'id': 2}]
+    assert list(dataset[np.array([0, -1])]) == [{'id': 0}, {'id': 498}]
+    assert dataset[10:20:5].keys() == [20, 30]
+    assert list(dataset[240:][-2:]) == [{'id': 496}, {'id': 498}]
+
+    mask = np.arange(250) % 100 == 0
+    subset = dataset[mask]
+    assert len(subset) == 3
+    assert subset.keys() == [0, 200, 400]
+    assert subset[1] == {'id': 200}
+
+    with pytest.raises(IndexError):
+        dataset[mask[:10]]  # pylint: disable=pointless-statement
+
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+    index.update(dataset, lambda row: {'large': row['id'] > 490})
+    assert list(index.subset(dataset, large=True)) == [
+        {'id': 492}, {'id': 494}, {'id': 496}, {'id': 498}]
+
+
+def test_length_is_cached(pool):
+    """Check the length is counted once until the dataset is refreshed."""
+    dataset = DatabaseDataset(pool, 'annotations')
+    assert len(dataset) == 250
+    assert dataset[-1]['id'] == 498
+
+    with pool.connection() as connection:
+        connection.execute(
+            "INSERT INTO annotations VALUES (1000, 'site-0', 0, 0)")
+
+    assert len(dataset) == 250
+    assert dataset[-1]['id'] == 498
+
+    dataset.refresh()
+    assert len(dataset) == 251
+    assert dataset[-1]['id'] == 1000
+
+
+def test_item_reads_do_not_copy_keys(pool, monkeypatch):
+    """Check positional reads use the cached keys without copying them."""
+    dataset = DatabaseDataset(pool, 'annotations', columns=['id'])
+    assert len(dataset.keys()) == 250
+
+    monkeypatch.setattr(
+        DatabaseDataset, 'keys',
+        lambda self: pytest.fail('Keys were copied'))
+    assert dataset[7] == {'id': 14}
+    assert len(dataset[:3]) == 3
+
+
+def test_chunks_match_datatype(pool):
+    """Check chunks stream as dataframes of the given DataType."""
+    datatype = dt.DataFrame(
+        {'start': dt.Float(), 'flagged': dt.Bool(), 'site': dt.String()},
+        (100, 3))
+    dataset = DatabaseDataset(pool, 'annotations')
+
+    chunks = list(dataset.chunks(datatype))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert list(chunks[0].columns) == ['start', 'flagged', 'site']
+    assert chunks[0]['flagged'].dtype == bool
+    assert datatype.validate(chunks[0])
+
+    chunks = list(dataset.chunks(chunksize=200))
+    assert [len(chunk) for chunk in chunks] == [200, 50]
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Test module for DVC backed datasets."""
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from axon.dataset import DVCDataset
+
+pytest.importorskip('dvc')
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'axon',
+    'GIT_AUTHOR_EMAIL': 'axon@example.com',
+    'GIT_COMMITTER_NAME': 'axon',
+    'GIT_COMMITTER_EMAIL': 'axon@example.com',
+}
+
+
+def run(repo, *command):
+    """Run a command in the repository."""
+    env = dict(os.environ, **GIT_ENV)
+    subprocess.run(command, cwd=repo, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def dvc(repo, *args):
+    """Run a dvc command in the repository."""
+    run(repo, sys.executable, '-m', 'dvc', *args)
+
+
+def write_clips(repo, count, offset=0):
+    """Write and version count clips, then drop the local copies."""
+    clips = os.path.join(repo, 'data', 'clips')
+    os.makedirs(clips, exist_ok=True)
+    for number in range(count):
+        np.save(
+            os.path.join(clips, 'clip{:02d}.npy'.format(number)),
+            np.arange(number + 1) + offset)
+
+    dvc(repo, 'add', 'data/clips')
+    run(repo, 'git', 'add', '-A')
+    run(repo, 'git', 'commit', '-q', '-m', 'clips {}'.format(offset))
+    dvc(repo, 'push')
+
+
+@pytest.fixture(scope='module')
+def repo(tmp_path_factory):
+    """A DVC repository with two versions of a dataset on a local remote."""
+    path = str(tmp_path_factory.mktemp('repo'))
+    remote = str(tmp_path_factory.mktemp('remote'))
+
+    run(path, 'git', 'init', '-q')
+    dvc(path, 'init', '-q')
+    dvc(path, 'remote', 'add', '-d', 'local', remote)
+
+    write_clips(path, 5)
+    run(path, 'git', 'tag', 'v1')
+    write_clips(path, 6, offset=100)
+
+    # Only the remote has the data
+    shutil.rmtree(os.path.join(path, '.dvc', 'cache'))
+    shutil.rmtree(os.path.join(path, 'data', 'clips'))
+    return path
+
+
+def test_lazy_fetch(repo, tmp_path):
+    """Check only the accessed files are fetched."""
+    cache = str(tmp_path / 'cache')
+    clips = DVCDataset('data/clips', repo=repo, rev='v1', cache_dir=cache)
+
+    assert len(clips) == 5
+    assert not os.path.exists(cache)
+
+    item = clips[3]
+    np.testing.assert_array_equal(item, np.arange(4))
+    assert isinstance(item, np.memmap)
+    assert [clips.is_fetched(n) for n in range(5)] == [
+        False, False, False, True, False]
+
+    subset = clips[[0, 1]]
+    assert [item.tolist() for item in subset] == [[0], [0, 1]]
+    assert sum(clips.is_fetched(n) for n in range(5)) == 3
+
+
+def test_versions(repo, tmp_path):
+    """Check versions resolve to different content hashes."""
+    cache = str(tmp_path / 'cache')
+    old = DVCDataset('data/clips', repo=repo, rev='v1', cache_dir=cache)
+    new = DVCDataset('data/clips', repo=repo, rev='HEAD', cache_dir=cache)
+
+    assert len(new) == 6
+    assert old.version() != new.version()
+    assert old.version() == DVCDataset(
+        'data/clips', repo=repo, rev='v1', cache_dir=cache).version()
+    assert old[:2].version() != old.version()
+
+    paths = new.prefetch(workers=2)
+    assert all(os.path.exists(path) for path in paths)
+    np.testing.assert_array_equal(new[5], np.arange(6) + 100)
+
+    # Downstream caches are keyed by the version
+    assert old.map(np.sum).version() != new.map(np.sum).version()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Test module for the prefetching data loader."""
+import time
+
+import numpy as np
+import pytest
+
+from axon.dataset import ArrayDataset
+from axon.dataset import DataLoader
+from axon.dataset import Dataset
+from axon.processes import Process
+
+
+class Square(Process):
+    """Process that squares its input."""
+
+    name = 'Square'
+
+    def run(self, array):  # pylint: disable=arguments-differ
+        return array ** 2
+
+
+class Stream(Dataset):
+    """Streaming dataset without random access."""
+
+    def __init__(self, size, delay=0.0, fail_at=None):
+        self.size = size
+        self.delay = delay
+        self.fail_at = fail_at
+
+    def iter(self):
+        for number in range(self.size):
+            if number == self.fail_at:
+                raise RuntimeError('Broken recording')
+            time.sleep(self.delay)
+            yield np.array([number])
+
+    def len(self):
+        return self.size
+
+
+def test_ordered_random_access():
+    """Check items are delivered in order with the transform applied."""
+    dataset = ArrayDataset(np.arange(100).reshape(50, 2))
+    loader = DataLoader(dataset, workers=4, prefetch=8, transform=Square())
+
+    items = list(loader)
+    assert len(items) == 50
+    for position, item in enumerate(items):
+        assert np.array_equal(item, dataset[position] ** 2)
+
+    assert loader.stats.items == 50
+    assert loader.stats.max_queue_depth <= 8
+
+
+def test_unknown_length():
+    """Check loaders of datasets of unknown length raise a clear error."""
+    loader = DataLoader(Stream(10).filter(lambda item: item[0] % 2 == 0))
+    assert loader.len() is None
+    with pytest.raises(TypeError, match='unknown'):
+        len(loader)
+
+    assert len(list(loader)) == 5
+
+
+def test_unordered_stream():
+    """Check every item of a streaming dataset is delivered once."""
+    loader = DataLoader(Stream(40), workers=3, ordered=False)
+    numbers = sorted(int(item[0]) for item in loader)
+    assert numbers == list(range(40))
+
+
+def test_process_workers():
+    """Check items can be loaded by process workers."""
+    dataset = ArrayDataset(np.arange(20))
+    loader = DataLoader(
+        dataset,
+        workers=2,
+        transform=Square(),
+        use_processes=True)
+    assert [int(item) for item in loader] == [
+        number ** 2 for number in range(20)]
+
+
+def test_starvation_stats():
+    """Check slow reads are reported as consumer starvation."""
+    loader = DataLoader(Stream(10, delay=0.01), workers=2, prefetch=4)
+    list(loader)
+    assert loader.stats.starved > 0
+    assert loader.stats.wait_time > 0
+
+
+def test_errors_and_early_stop():
+    """Check reading errors are raised and early stops clean up."""
+    with pytest.raises(RuntimeError):
+        list(DataLoader(Stream(10, fail_at=5)))
+
+    loader = DataLoader(Stream(1000), prefetch=2)
+    for number, _ in enumerate(loader):
+        if number == 3:
+            break
+    assert loader.stats.items == 4
+
+    with pytest.raises(ValueError):
+        DataLoader(Stream(1), workers=0)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Test module for dataset metadata indices."""
+import numpy as np
+import pytest
+
+from axon.dataset import Dataset
+from axon.dataset import MetadataIndex
+from axon.dataset import ShardedDataset
+from axon.dataset import ShardWriter
+
+
+SITES = ['X', 'Y', 'Z']
+
+
+def write_clips(path, count):
+    """Write clips with metadata, four per shard."""
+    with ShardWriter(path, shard_items=4) as writer:
+        for number in range(count):
+            metadata = {
+                'site': SITES[number % 3],
+                'year': 2018 + number % 2,
+                'duration': float(number),
+            }
+            writer.write(np.full(number + 1, number), metadata=metadata)
+
+
+class Recordings(Dataset):
+    """Streaming dataset that counts the items read."""
+
+    def __init__(self, length):
+        self.length = length
+        self.reads = 0
+
+    def iter(self):
+        for number in range(self.length):
+            self.reads += 1
+            yield np.full(3, number)
+
+    def len(self):
+        return self.length
+
+
+def test_filter_sharded(tmp_path):
+    """Check filters select the matching items of a sharded dataset."""
+    path = str(tmp_path / 'clips')
+    write_clips(path, 20)
+    clips = ShardedDataset(path)
+
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+    assert index.update(clips) == 20
+    assert index.update(clips) == 0
+
+    subset = index.subset(
+        clips,
+        where='duration > ?',
+        params=[5],
+        site='X',
+        year=[2018, 2019])
+    expected = [number for number in range(6, 20) if number % 3 == 0]
+    assert [int(item[0]) for item in subset] == expected
+
+    frame = index.to_frame(site='Y')
+    assert len(frame) == 7
+    assert set(frame['site']) == {'Y'}
+
+
+def test_incremental_update(tmp_path):
+    """Check only new or changed shards are indexed again."""
+    path = str(tmp_path / 'clips')
+    write_clips(path, 8)
+
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+    assert index.update(ShardedDataset(path)) == 8
+
+    # Append a shard and re-open the dataset
+    with ShardWriter(path, shard_items=4, resume=True) as writer:
+        metadata = {'site': 'W', 'year': 2020}
+        writer.write(np.zeros(1, dtype=np.int64), metadata=metadata)
+
+    clips = ShardedDataset(path)
+    assert index.update(clips) == 1
+    assert index.positions(clips, site='W').tolist() == [8]
+
+
+def test_streaming_dataset(tmp_path):
+    """Check streaming datasets are indexed incrementally."""
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+
+    calls = []
+
+    def metadata(item):
+        calls.append(item)
+        return {'even': int(item[0]) % 2 == 0}
+
+    assert index.update(Recordings(6), metadata) == 6
+    recordings = Recordings(10)
+    assert index.update(recordings, metadata) == 4
+    assert len(calls) == 10
+
+    subset = index.subset(recordings, even=True)
+    assert len(subset) == 5
+    assert [int(item[0]) for item in subset] == [0, 2, 4, 6, 8]
+
+    with pytest.raises(ValueError):
+        index.update(recordings)
+
+
+def test_sharded_dataset_with_metadata_function(tmp_path):
+    """Check items of sharded datasets can be indexed with a function."""
+    path = str(tmp_path / 'clips')
+    write_clips(path, 10)
+    clips = ShardedDataset(path)
+
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+    assert index.update(clips) == 10
+
+    def metadata(item):
+        return {'n': int(item[0])}
+
+    assert index.update(clips, metadata) == 10
+    assert index.positions(clips, where='n > 5').tolist() == [6, 7, 8, 9]
+    assert [int(item[0]) for item in index.subset(clips, where='n > 7')] == [
+        8, 9]
+
+    # Rows of the shard metadata are replaced, not duplicated
+    assert len(index.to_frame()) == 10
+
+
+def test_invalid_columns(tmp_path):
+    """Check unsafe column names are rejected."""
+    index = MetadataIndex(str(tmp_path / 'index.sqlite'))
+
+    with pytest.raises(ValueError):
+        index.update(Recordings(1), lambda item: {'a"; DROP': 1})
+
+    with pytest.raises(ValueError):
+        index.positions(Recordings(1), **{'_source': ''})
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Test module for deterministic shuffling and sharding."""
+import numpy as np
+import pytest
+
+from axon.dataset import ArrayDataset
+from axon.dataset import DataLoader
+from axon.dataset import EpochSampler
+from axon.dataset import Permutation
+from axon.dataset import ShuffledStream
+from axon.dataset.sampling import get_rank
+from axon.dataset.sampling import shuffle_stream
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 3, 17, 1000, 12345])
+def test_permutation_is_bijection(length):
+    """Check permutations visit every position once."""
+    permutation = Permutation(length, seed=3)
+    values = list(permutation)
+    assert sorted(values) == list(range(length))
+    if length > 0:
+        assert permutation[-1] == values[-1]
+
+
+def test_permutation_is_seeded():
+    """Check permutations depend only on the seed."""
+    first = list(Permutation(1000, seed=1))
+    assert first == list(Permutation(1000, seed=1))
+    assert first != list(Permutation(1000, seed=2))
+    assert first != list(range(1000))
+
+
+def test_sampler_exactly_once():
+    """Check all ranks together read every position once per epoch."""
+    nodes, workers = 2, 3
+    world_size = nodes * workers
+    epochs = []
+
+    for epoch in range(2):
+        positions = []
+        for node in range(nodes):
+            for worker in range(workers):
+                sampler = EpochSampler(
+                    1001,
+                    seed=5,
+                    rank=get_rank(node, worker, workers),
+                    world_size=world_size,
+                    chunk_size=50)
+                sampler.set_epoch(epoch)
+                rank_positions = list(sampler)
+                assert len(rank_positions) == len(sampler)
+                positions.extend(rank_positions)
+
+        assert sorted(positions) == list(range(1001))
+        epochs.append(positions)
+
+    assert epochs[0] != epochs[1]
+
+    sampler = EpochSampler(10, shuffle=False, rank=1, world_size=4)
+    assert list(sampler) == [1, 5, 9]
+
+    with pytest.raises(ValueError):
+        EpochSampler(10, rank=4, world_size=4)
+
+
+def test_loader_with_sampler():
+    """Check the data loader follows the sampler order."""
+    dataset = ArrayDataset(np.arange(30))
+    sampler = EpochSampler(30, seed=2, rank=0, world_size=2)
+    loader = DataLoader(dataset, workers=2, sampler=sampler)
+    assert [int(item) for item in loader] == list(sampler)
+    assert len(loader) == 15
+
+
+def test_shuffle_buffer():
+    """Check streams are shuffled reproducibly without losing items."""
+    first = list(shuffle_stream(range(100), 10, seed=1))
+    assert sorted(first) == list(range(100))
+    assert first == list(shuffle_stream(range(100), 10, seed=1))
+    assert first != list(shuffle_stream(range(100), 10, seed=1, epoch=1))
+
+
+def test_shuffled_stream():
+    """Check streaming ranks read disjoint shuffled shards."""
+    dataset = ArrayDataset(np.arange(50))
+    items = []
+    for rank in range(3):
+        stream = ShuffledStream(
+            dataset,
+            buffer_size=4,
+            seed=0,
+            rank=rank,
+            world_size=3)
+        rank_items = [int(item) for item in stream]
+        assert len(rank_items) == len(stream)
+        items.extend(rank_items)
+
+    assert sorted(items) == list(range(50))
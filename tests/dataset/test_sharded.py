@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Test module for sharded on-disk datasets."""
+import os
+
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.dataset import ArrayDataset
+from axon.dataset import ShardedDataset
+from axon.dataset import ShardWriter
+from axon.dataset import write_dataset
+
+
+def make_dataset():
+    """Create a dataset of variable length clips."""
+    random = np.random.RandomState(0)
+    clips = [
+        random.randn(length).astype(np.float32)
+        for length in random.randint(10, 100, size=50)]
+    return ArrayDataset.from_arrays(
+        clips,
+        datum_datatype=dt.NumpyArray(dt.Float(), (100,)))
+
+
+def test_write_and_read(tmp_path):
+    """Check a dataset round trips through shards."""
+    dataset = make_dataset()
+    path = str(tmp_path / 'clips')
+    sharded = write_dataset(
+        dataset,
+        path,
+        metadata=lambda item: {'length': len(item)},
+        shard_bytes=1024)
+
+    assert sharded.num_shards > 1
+    assert len(sharded) == len(dataset)
+    assert sharded.datum_datatype == dataset.datum_datatype
+
+    for original, item in zip(dataset, sharded):
+        assert np.array_equal(original, item)
+
+    for position in (0, 17, 49):
+        item = sharded[position]
+        assert np.array_equal(item, dataset[position])
+        assert isinstance(item, np.memmap)
+        assert sharded.metadata(position) == {'length': len(item)}
+
+    assert np.array_equal(sharded[-1], dataset[-1])
+    with pytest.raises(IndexError):
+        sharded[50]  # pylint: disable=pointless-statement
+
+
+def test_shards_open_lazily(tmp_path):
+    """Check shards are only opened when accessed."""
+    path = str(tmp_path / 'clips')
+    write_dataset(make_dataset(), path, shard_items=10)
+
+    sharded = ShardedDataset(path)
+    assert sharded.num_shards == 5
+    assert not sharded._shards  # pylint: disable=protected-access
+
+    sharded[25]  # pylint: disable=pointless-statement
+    assert list(sharded._shards) == [2]  # pylint: disable=protected-access
+
+
+def test_subsets(tmp_path):
+    """Check slicing and fancy indexing return dataset views."""
+    dataset = make_dataset()
+    path = str(tmp_path / 'clips')
+    sharded = write_dataset(dataset, path, shard_items=7)
+
+    subset = sharded[[40, 3, 3]]
+    assert len(subset) == 3
+    assert np.array_equal(subset[0], dataset[40])
+    assert np.array_equal(list(subset)[2], dataset[3])
+
+    subset = sharded[10:20:5]
+    assert np.array_equal(subset.positions(), [10, 15])
+    assert np.array_equal(subset[-1], dataset[15])
+
+
+def test_item_reads_do_not_build_positions(tmp_path, monkeypatch):
+    """Check integer reads and metadata do not scan the whole dataset."""
+    path = str(tmp_path / 'clips')
+    sharded = write_dataset(
+        make_dataset(), path,
+        metadata=lambda item: {'length': len(item)},
+        shard_items=10)
+
+    monkeypatch.setattr(
+        ShardedDataset, 'positions',
+        lambda self: pytest.fail('Positions were built'))
+    assert len(sharded[-1]) == sharded.metadata(49)['length']
+
+    # Metadata files are read once per shard
+    monkeypatch.setattr(
+        'builtins.open',
+        lambda *args, **kwargs: pytest.fail('Metadata was read again'))
+    assert sharded.metadata(48)['length'] == len(sharded[48])
+
+
+def test_incomplete_dataset(tmp_path):
+    """Check datasets without manifest are rejected."""
+    path = str(tmp_path / 'clips')
+    writer = ShardWriter(path, shard_items=2)
+    for _ in range(3):
+        writer.write(np.zeros(3))
+
+    assert os.path.exists(os.path.join(path, 'shard-00000.npy'))
+    with pytest.raises(ValueError):
+        ShardedDataset(path)
+
+    with pytest.raises(ValueError):
+        writer.write(np.zeros(3, dtype=np.int32))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Test module for lazy dataset transformations."""
+import itertools
+
+import pytest
+
+import axon.datatypes as dt
+from axon.dataset import Dataset
+from axon.processes import Process
+
+
+class Numbers(Dataset):
+    """Dataset of consecutive integers, possibly endless."""
+
+    datum_datatype = dt.Int()
+
+    def __init__(self, length=None):
+        self.length = length
+        self.reads = 0
+
+    def iter(self):
+        if self.length is None:
+            numbers = itertools.count()
+        else:
+            numbers = range(self.length)
+
+        for number in numbers:
+            self.reads += 1
+            yield number
+
+    def len(self):
+        return self.length
+
+
+class ToString(Process):
+    """Process that converts to string."""
+
+    name = 'To String'
+    input_dtype = dt.Int()
+    output_dtype = dt.String()
+
+    def run(self, number):  # pylint: disable=arguments-differ
+        return str(number)
+
+
+def test_transformations_are_lazy():
+    """Check transformations read items only when iterated."""
+    numbers = Numbers()
+    plan = (
+        numbers
+        .map(lambda number: number * 2)
+        .filter(lambda number: number % 3 == 0)
+        .batch(2)
+        .take(3))
+
+    assert numbers.reads == 0
+    assert list(plan) == [[0, 6], [12, 18], [24, 30]]
+    assert numbers.reads == 16
+    assert plan.len() is None
+
+
+def test_map_infers_datatype():
+    """Check mapped datasets take the output DataType of the process."""
+    numbers = Numbers(5)
+
+    strings = numbers.map(ToString())
+    assert strings.datum_datatype == dt.String()
+    assert list(strings) == ['0', '1', '2', '3', '4']
+    assert len(strings) == 5
+
+    assert numbers.map(abs).datum_datatype is None
+
+
+def test_consecutive_maps_are_merged():
+    """Check a chain of maps is run as a single step."""
+    numbers = Numbers(4)
+    chained = numbers.map(lambda x: x + 1).map(lambda x: x * 10)
+
+    assert chained.dataset is numbers
+    assert len(chained.processes) == 2
+    assert list(chained) == [10, 20, 30, 40]
+
+
+@pytest.mark.parametrize('drop_remainder, length', [(False, 4), (True, 3)])
+def test_batch_and_unbatch(drop_remainder, length):
+    """Check batches, their length and DataType, and unbatching."""
+    batches = Numbers(10).batch(3, drop_remainder=drop_remainder)
+
+    assert len(batches) == length
+    assert len(list(batches)) == length
+    assert batches.datum_datatype == dt.List(dt.Int())
+
+    entries = batches.unbatch()
+    assert entries.datum_datatype == dt.Int()
+    assert list(entries) == list(range(3 * length if drop_remainder else 10))
+
+    with pytest.raises(ValueError):
+        Numbers(10).batch(0)
+
+
+def test_take_length():
+    """Check taken datasets know their length when the parent does."""
+    assert len(Numbers(10).take(3)) == 3
+    assert len(Numbers(2).take(3)) == 2
+    assert Numbers().take(3).len() is None
+    assert list(Numbers().take(3)) == [0, 1, 2]
+
+
+def test_interleave():
+    """Check interleaving alternates blocks until all are exhausted."""
+    first = Numbers(5)
+    second = Numbers(2).map(lambda x: x + 100)
+
+    interleaved = first.interleave(second, block_length=2)
+    assert list(interleaved) == [0, 1, 100, 101, 2, 3, 4]
+    assert len(interleaved) == 7
+    assert interleaved.datum_datatype is None
+
+    assert first.interleave(Numbers(1)).datum_datatype == dt.Int()
+    assert first.interleave(Numbers()).len() is None
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Test module for bulk dataset validation."""
+import os
+
+import numpy as np
+import pytest
+
+import axon.datatypes as dt
+from axon.dataset import ArrayDataset
+from axon.dataset import ShardedDataset
+from axon.dataset import write_dataset
+from axon.processes import Pipeline
+from axon.processes import Process
+
+
+class CountingArray(dt.NumpyArray):
+    """NumpyArray DataType that counts single validations."""
+
+    calls = 0
+
+    def validate(self, other):
+        """Count call and validate."""
+        CountingArray.calls += 1
+        return super().validate(other)
+
+
+def make_clips(lengths):
+    """Clips of the given lengths, declared as length 4 float arrays."""
+    return ArrayDataset.from_arrays(
+        [np.zeros(length) for length in lengths],
+        datum_datatype=dt.NumpyArray(dt.Float(), (4,)))
+
+
+def test_validate_reports_invalid_items():
+    """Check invalid positions are reported."""
+    report = make_clips([4, 4, 3, 4, 5]).validate(batch_size=2, workers=2)
+    assert report.num_items == 5
+    assert report.invalid == [2, 4]
+    assert not report.valid
+
+
+def test_validation_is_persisted(tmp_path):
+    """Check datasets are only validated again when they change."""
+    clips = write_dataset(make_clips([4] * 10), str(tmp_path / 'clips'))
+    assert not clips.is_validated()
+
+    report = clips.validate()
+    assert report.valid
+    assert os.path.exists(clips.validation_path())
+    assert clips.is_validated()
+
+    # A current report is used without reading the items, which would fail
+    reopened = ShardedDataset(str(tmp_path / 'clips'))
+    reopened.iter = None
+    assert reopened.validate().valid
+
+    # A new schema needs a new validation
+    reopened.datum_datatype = dt.NumpyArray(dt.Int(), (4,))
+    assert not reopened.is_validated()
+    with pytest.raises(TypeError):
+        reopened.validate()
+
+
+def test_validation_needs_datatype():
+    """Check datasets without datum_datatype can not be validated."""
+    with pytest.raises(ValueError):
+        ArrayDataset(np.zeros((2, 2))).validate()
+
+
+def test_pipeline_trusts_validated_datasets(tmp_path):
+    """Check pipelines skip input checks of validated datasets."""
+    class Total(Process):
+        input_dtype = CountingArray(dt.Float(), (4,))
+        output_dtype = dt.Float()
+
+        def run(self, array):  # pylint: disable=arguments-differ
+            return float(array.sum())
+
+    source = ArrayDataset(
+        np.ones((6, 4)),
+        datum_datatype=CountingArray(dt.Float(), (4,)))
+    clips = write_dataset(source, str(tmp_path / 'clips'))
+    pipeline = Pipeline([Total()], validate=True)
+
+    CountingArray.calls = 0
+    assert pipeline.map(clips) == [4.0] * 6
+    assert CountingArray.calls == 6
+
+    clips.validate()
+    CountingArray.calls = 0
+    assert pipeline.map(clips) == [4.0] * 6
+    assert CountingArray.calls == 0
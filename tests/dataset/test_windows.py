@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Test module for windowed datasets."""
+import numpy as np
+import pytest
+
+from axon.dataset import WindowedDataset
+from axon.dataset.windows import sliding_windows
+
+
+def test_windows_are_views():
+    """Check windows are read-only views of the recording."""
+    recording = np.arange(10, dtype=np.float32)
+    windows = WindowedDataset(recording, window_length=4, hop=2)
+
+    assert len(windows) == 4
+    offset, window = windows[1]
+    assert offset == 2
+    np.testing.assert_array_equal(window, [2, 3, 4, 5])
+    assert np.shares_memory(window, recording)
+    assert not window.flags['WRITEABLE']
+
+    assert [offset for offset, _ in windows] == [0, 2, 4, 6]
+    assert windows[-1][0] == 6
+
+
+@pytest.mark.parametrize('length, expected', [(10, 4), (11, 5), (3, 1)])
+def test_padding(length, expected):
+    """Check padded windows cover the whole recording."""
+    recording = np.arange(1, length + 1)
+    windows = WindowedDataset(
+        recording, window_length=4, hop=2, padding='pad', pad_value=-1)
+
+    assert len(windows) == expected
+    _, last = windows[-1]
+    assert last[-1] == -1 or last[-1] == length
+    covered = set()
+    for offset, window in windows:
+        covered.update(window[window > 0].tolist())
+    assert covered == set(range(1, length + 1))
+
+
+def test_time_offsets_and_channels():
+    """Check offsets in seconds and multichannel recordings."""
+    recording = np.zeros((100, 2))
+    windows = WindowedDataset(
+        recording, window_length=20, hop=10, sample_rate=10)
+
+    np.testing.assert_allclose(windows.offsets(), np.arange(9))
+    assert windows[3][1].shape == (20, 2)
+
+
+def test_batches(tmp_path):
+    """Check batched mode yields strided 2-D views of memory maps."""
+    path = str(tmp_path / 'recording.npy')
+    np.save(path, np.arange(1000, dtype=np.int16))
+
+    windows = WindowedDataset(path, window_length=100, hop=50, padding='pad')
+    assert isinstance(windows.recording, np.memmap)
+
+    batches = list(windows.batches(8))
+    offsets = np.concatenate([offsets for offsets, _ in batches])
+    np.testing.assert_array_equal(offsets, windows.offsets())
+
+    first = batches[0][1]
+    assert first.shape == (8, 100)
+    assert np.shares_memory(first, windows.recording)
+    np.testing.assert_array_equal(first[3], np.arange(150, 250))
+
+    stacked = np.concatenate([batch for _, batch in batches])
+    expected = np.stack([window for _, window in windows])
+    np.testing.assert_array_equal(stacked, expected)
+
+
+def test_sliding_windows_short():
+    """Check recordings shorter than a window have no full windows."""
+    assert sliding_windows(np.ones(3), 4, 1).shape == (0, 4)
+    with pytest.raises(ValueError):
+        WindowedDataset(np.ones(3), 4, padding='wrap')
@@ -32,3 +32,20 @@ def test_np_array_comparebad():
     first = dt.NumpyArray(dt.Int(), (240, 240))
     second = dt.NumpyArray(dt.Float(), (240, 240))
     assert first != second
+
+
+def test_np_array_entries():
+    """Check entries of any numeric dtype are validated."""
+    assert dt.NumpyArray(dt.Int(), (3,)).validate(np.arange(3))
+    assert dt.NumpyArray(dt.Int(), [3]).validate(np.arange(3))
+    assert dt.NumpyArray(dt.Float(), (0,)).validate(np.zeros(0))
+    assert dt.NumpyArray(dt.Int(), (2,)).validate(np.array([1, 2], object))
+    assert not dt.NumpyArray(dt.Int(), (2,)).validate(
+        np.array([1, 'a'], object))
+
+
+def test_np_array_validate_many():
+    """Check bulk validation of several arrays."""
+    dtype = dt.NumpyArray(dt.Float(), (2,))
+    others = [np.zeros(2), np.zeros(3), np.arange(2), [0.0, 0.0], np.ones(2)]
+    assert dtype.validate_many(others) == [True, False, False, False, True]
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Test module for sharded evaluations."""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from mlflow.tracking import MlflowClient
+import numpy as np
+import pytest
+
+from axon.dataset import ArrayDataset
+from axon.evaluate import ConfusionMatrix
+from axon.evaluate import Evaluator
+from axon.evaluate import EventMatcher
+from axon.evaluate import MLFlowEvaluator
+from axon.evaluate.evaluator import shard_bounds
+
+
+def labelled_dataset(size=1000):
+    """Dataset of rows of a label and three class scores."""
+    random = np.random.RandomState(0)
+    labels = random.randint(0, 3, size=size)
+    scores = random.rand(size, 3)
+    scores[np.arange(size), labels] += 0.5
+    return ArrayDataset(np.column_stack([labels, scores]))
+
+
+class Classification(Evaluator):
+    """Evaluator of rows of a label and class scores."""
+
+    name = 'Classification'
+
+    # Shared by all instances, as process attributes change fingerprints
+    updates = []
+    fail_at = None
+
+    def metrics(self):
+        return {'confusion': ConfusionMatrix(3)}
+
+    def predict(self, item):
+        label = int(item[0])
+        if label == Classification.fail_at:
+            raise RuntimeError('Interrupted')
+        return label, item[1:]
+
+    def update(self, metrics, item):
+        Classification.updates.append(item[0])
+        label, scores = item
+        metrics['confusion'].update([label], scores[None])
+
+
+class LoggedClassification(MLFlowEvaluator, Classification):
+    """Classification evaluator that logs to mlflow."""
+
+
+@pytest.fixture(autouse=True)
+def reset_evaluator():
+    """Clear the shared state of the test evaluator."""
+    Classification.updates = []
+    Classification.fail_at = None
+
+
+def test_shard_bounds():
+    """Check positions are split into contiguous ranges."""
+    assert shard_bounds(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert shard_bounds(2, 4) == [(0, 1), (1, 2)]
+    assert shard_bounds(0, 4) == []
+
+    assert shard_bounds(None, 1) == [(0, None)]
+    with pytest.raises(ValueError):
+        shard_bounds(None, 4)
+
+
+def test_unknown_length():
+    """Check datasets of unknown length are evaluated in a single shard."""
+    dataset = labelled_dataset(100).filter(lambda item: item[0] == 1)
+    with pytest.raises(TypeError, match='unknown'):
+        len(dataset)
+
+    results = Classification().evaluate(dataset)
+    matrix = results['confusion']['confusion_matrix']
+    assert matrix.sum() == matrix[1].sum() > 0
+
+
+def test_parallel_evaluation_matches_sequential():
+    """Check shards evaluated in a process pool reduce to the same result."""
+    dataset = labelled_dataset()
+    evaluator = Classification()
+
+    sequential = evaluator.run(dataset)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = evaluator.evaluate(
+            dataset, num_shards=7, executor=executor)
+
+    np.testing.assert_array_equal(
+        parallel['confusion']['confusion_matrix'],
+        sequential['confusion']['confusion_matrix'])
+    assert parallel['confusion']['confusion_matrix'].sum() == 1000
+
+
+def test_interrupted_evaluation_resumes(tmp_path):
+    """Check finished shards are not evaluated again after an error."""
+    dataset = ArrayDataset(np.column_stack([
+        np.repeat([0, 1, 2, 0], 25),
+        np.random.RandomState(0).rand(100, 3)]))
+    checkpoint_dir = str(tmp_path / 'evaluation')
+    evaluator = Classification()
+
+    # Label 2 only appears in the third of four shards
+    Classification.fail_at = 2
+    with pytest.raises(RuntimeError):
+        evaluator.evaluate(
+            dataset, num_shards=4, checkpoint_dir=checkpoint_dir)
+    assert len(Classification.updates) == 50
+    assert len(os.listdir(checkpoint_dir)) == 3
+
+    Classification.fail_at = None
+    Classification.updates = []
+    results = evaluator.evaluate(
+        dataset, num_shards=4, checkpoint_dir=checkpoint_dir)
+    assert len(Classification.updates) == 50
+    assert results['confusion']['support'].tolist() == [50, 25, 25]
+
+    # Another dataset invalidates the finished shards
+    Classification.updates = []
+    evaluator.evaluate(
+        dataset[:80], num_shards=4, checkpoint_dir=checkpoint_dir)
+    assert len(Classification.updates) == 80
+
+
+def test_checkpoint_key():
+    """Check the resume key covers the evaluation methods."""
+    class Relabelled(Classification):
+        def predict(self, item):
+            return (int(item[0]) + 1) % 3, item[1:]
+
+    assert Classification().fingerprint() == Classification().fingerprint()
+    assert Relabelled().fingerprint() != Classification().fingerprint()
+
+    with pytest.raises(ValueError):
+        Classification().evaluate(
+            labelled_dataset().filter(lambda item: item[0] > 0),
+            num_shards=2)
+
+
+def test_run_key(tmp_path):
+    """Check evaluators that cannot be fingerprinted resume by run key."""
+    class Model:
+        pass
+
+    dataset = labelled_dataset(100)
+    checkpoint_dir = str(tmp_path / 'evaluation')
+    evaluator = Classification()
+    evaluator.model = Model()
+    with pytest.raises(TypeError):
+        evaluator.fingerprint()
+
+    evaluator.evaluate(
+        dataset, num_shards=2, checkpoint_dir=checkpoint_dir, run_key='v1')
+    Classification.updates = []
+    evaluator.evaluate(
+        dataset, num_shards=2, checkpoint_dir=checkpoint_dir, run_key='v1')
+    assert not Classification.updates
+
+
+def test_results_are_logged_once(experiment):
+    """Check the reduced results are logged to a single mlflow run."""
+    _, experiment_id = experiment
+    dataset = labelled_dataset(300)
+    evaluator = LoggedClassification(experiment_id=experiment_id)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = evaluator.evaluate(
+            dataset, num_shards=4, executor=executor)
+
+    client = MlflowClient()
+    runs = client.search_runs([experiment_id])
+    assert len(runs) == 1
+
+    run = runs[0]
+    accuracy = results['confusion']['accuracy']
+    assert run.data.metrics['confusion/accuracy'] == pytest.approx(accuracy)
+    assert 'confusion/macro_f1' in run.data.metrics
+    artifacts = [
+        artifact.path
+        for artifact in client.list_artifacts(run.info.run_id, 'evaluation')]
+    assert artifacts == ['evaluation/results.json']
+
+
+def test_event_evaluation():
+    """Check event matching accumulates over recordings."""
+
+    class Detection(Evaluator):
+        name = 'Detection'
+
+        def metrics(self):
+            return {'events': EventMatcher(iou_threshold=0.5)}
+
+        def update(self, metrics, item):
+            true, predicted = item
+            metrics['events'].update(true, predicted)
+
+    recordings = [([[0, 1]], [[0, 1], [4, 5]])] * 10
+    results = Detection()(recordings)
+    assert results['events']['true_positives'] == 10
+    assert results['events']['precision'] == pytest.approx(0.5)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Test module for the streaming metric accumulators."""
+import pickle
+
+import numpy as np
+import pytest
+
+from axon.evaluate import BinnedCurve
+from axon.evaluate import ConfusionMatrix
+from axon.evaluate import Evaluator
+from axon.evaluate import EventMatcher
+from axon.evaluate import merge
+from axon.evaluate.metrics import interval_iou
+
+
+def batches(labels, *arrays, size=100):
+    """Split arrays into batches."""
+    for start in range(0, len(labels), size):
+        yield (labels[start:start + size],) + tuple(
+            array[start:start + size] for array in arrays)
+
+
+def test_confusion_matrix():
+    """Check the streamed matrix and scores match a direct computation."""
+    random = np.random.RandomState(0)
+    labels = random.randint(0, 3, size=1000)
+    scores = random.rand(1000, 3)
+    predictions = scores.argmax(axis=1)
+
+    matrix = ConfusionMatrix(3)
+    for label_batch, score_batch in batches(labels, scores):
+        matrix.update(label_batch, score_batch)
+
+    expected = np.zeros((3, 3), dtype=int)
+    for label, prediction in zip(labels, predictions):
+        expected[label, prediction] += 1
+    np.testing.assert_array_equal(matrix.matrix, expected)
+
+    result = matrix.result()
+    precision = [
+        np.mean(labels[predictions == k] == k) for k in range(3)]
+    recall = [np.mean(predictions[labels == k] == k) for k in range(3)]
+    np.testing.assert_allclose(result['precision'], precision)
+    np.testing.assert_allclose(result['recall'], recall)
+    assert result['accuracy'] == np.mean(labels == predictions)
+
+    with pytest.raises(ValueError):
+        matrix.update([3], [0])
+
+
+def test_merge_across_workers():
+    """Check merged accumulators equal a single accumulator."""
+    random = np.random.RandomState(1)
+    labels = random.randint(0, 4, size=900)
+    scores = random.rand(900, 4)
+
+    single = ConfusionMatrix(4)
+    single.update(labels, scores)
+
+    workers = []
+    for part in range(3):
+        worker = ConfusionMatrix(4)
+        worker.update(labels[part::3], scores[part::3])
+        # Accumulators travel between processes pickled
+        workers.append(pickle.loads(pickle.dumps(worker)))
+
+    merged = merge(workers)
+    np.testing.assert_array_equal(merged.matrix, single.matrix)
+    assert workers[0].matrix.sum() == 300
+
+    with pytest.raises(ValueError):
+        single.merge(ConfusionMatrix(3))
+
+
+def test_binned_curve():
+    """Check binned curve areas against exact computations."""
+    random = np.random.RandomState(2)
+    labels = random.rand(5000) < 0.3
+    scores = np.clip(labels * 0.3 + random.rand(5000) * 0.7, 0, 1)
+
+    curve = BinnedCurve(num_bins=1000)
+    for label_batch, score_batch in batches(labels, scores, size=512):
+        curve.update(label_batch, score_batch)
+
+    # Exact ROC AUC is the probability of ranking a positive higher
+    positives = scores[labels]
+    negatives = scores[~labels]
+    exact = np.mean(positives[:, None] > negatives[None, :])
+    assert abs(curve.roc_auc() - exact) < 1e-2
+
+    precision, recall = curve.pr_curve()
+    assert recall[0] == 1
+    assert precision[0] == pytest.approx(labels.mean())
+    assert 0 < curve.average_precision() <= 1
+
+    halves = [BinnedCurve(num_bins=1000), BinnedCurve(num_bins=1000)]
+    halves[0].update(labels[:2500], scores[:2500])
+    halves[1].update(labels[2500:], scores[2500:])
+    assert merge(halves).roc_auc() == pytest.approx(curve.roc_auc())
+
+
+def test_one_vs_rest_curves():
+    """Check curves of every class are computed at once."""
+    random = np.random.RandomState(3)
+    labels = random.randint(0, 3, size=600)
+    scores = random.rand(600, 3)
+    scores[np.arange(600), labels] += 1
+    scores /= scores.max()
+
+    curve = BinnedCurve(num_classes=3, num_bins=100)
+    curve.update(labels, scores)
+    auc = curve.roc_auc()
+    assert auc.shape == (3,)
+    assert np.all(auc > 0.9)
+
+    single = BinnedCurve(num_bins=100)
+    single.update(labels == 1, scores[:, 1])
+    assert auc[1] == pytest.approx(single.roc_auc())
+
+
+def test_interval_iou():
+    """Check the intersection over union of intervals."""
+    iou = interval_iou([[0, 2], [5, 6]], [[1, 3], [5, 6], [10, 11]])
+    np.testing.assert_allclose(iou, [[1 / 3, 0, 0], [0, 1, 0]])
+
+
+def test_event_matcher():
+    """Check predictions are matched one to one to true events."""
+    matcher = EventMatcher(iou_threshold=0.5, num_bins=10)
+
+    # Two predictions overlap the first event, only the best scored matches
+    matcher.update(
+        true=[[0, 1], [2, 3], [5, 6]],
+        predicted=[[0, 1], [0.1, 1], [2.2, 3], [8, 9]],
+        scores=[0.6, 0.9, 0.8, 0.3])
+    # Events of different classes do not match
+    matcher.update(
+        true=[[0, 1]],
+        predicted=[[0, 1]],
+        scores=[0.2],
+        true_labels=['owl'],
+        predicted_labels=['bat'])
+
+    result = matcher.result()
+    assert result['true_positives'] == 2
+    assert result['false_positives'] == 3
+    assert result['false_negatives'] == 2
+    assert result['precision'] == pytest.approx(2 / 5)
+    assert result['recall'] == pytest.approx(2 / 4)
+
+    # Above a threshold of 0.7 only the two matches remain
+    assert result['precision_curve'][7] == 1
+    assert result['recall_curve'][7] == pytest.approx(2 / 4)
+
+
+def test_streaming_evaluator():
+    """Check evaluators stream items through their accumulators."""
+
+    class Classification(Evaluator):
+        name = 'Classification'
+
+        def metrics(self):
+            return {'confusion': ConfusionMatrix(2)}
+
+        def update(self, metrics, item):
+            metrics['confusion'].update(*item)
+
+    items = ((np.array([0, 1]), np.array([0, 0])) for _ in range(50))
+    result = Classification()(items)
+    np.testing.assert_array_equal(
+        result['confusion']['confusion_matrix'], [[50, 0], [50, 0]])
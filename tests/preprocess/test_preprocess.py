@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Test module for batched feature extraction processes."""
+import numpy as np
+import pytest
+from scipy import signal
+
+from axon.dataset import WindowedDataset
+from axon.preprocess import Frame
+from axon.preprocess import MelSpectrogram
+from axon.preprocess import PCEN
+from axon.preprocess import Resample
+from axon.preprocess import Spectrogram
+from axon.preprocess import get_window
+from axon.preprocess import mel_filterbank
+
+
+SAMPLE_RATE = 16000
+
+
+def clips(batch_size=8, num_samples=4000):
+    """Batch of noisy sines of different frequencies."""
+    random = np.random.RandomState(0)
+    times = np.arange(num_samples) / SAMPLE_RATE
+    frequencies = np.linspace(500, 4000, batch_size)[:, None]
+    noise = 0.01 * random.randn(batch_size, num_samples)
+    return (np.sin(2 * np.pi * frequencies * times) + noise).astype(
+        np.float32)
+
+
+def processes(num_samples=4000):
+    """Processes of clips with num_samples samples."""
+    mel = MelSpectrogram(
+        num_samples, SAMPLE_RATE, n_fft=512, hop_length=128, n_mels=40)
+    return [
+        Frame(num_samples, 400, 160),
+        Spectrogram(num_samples, n_fft=512, hop_length=128),
+        mel,
+        Resample(num_samples, SAMPLE_RATE, 22050),
+        PCEN(40, mel.num_frames(), SAMPLE_RATE, 128),
+    ]
+
+
+def process_input(process, batch):
+    """Input of a process, computing spectrograms for PCEN."""
+    if isinstance(process, PCEN):
+        return processes()[2].run(batch)
+    return batch
+
+
+@pytest.mark.parametrize('index', range(5))
+def test_batches_match_clips(index):
+    """Check batched outputs equal per-clip outputs with exact types."""
+    process = processes()[index]
+    batch = process_input(process, clips())
+
+    outputs = process.run(batch)
+    assert outputs.dtype == np.float32
+    assert outputs.shape == (8,) + process.output_shape()
+    assert process.get_output_dtype().validate(outputs[0])
+
+    for clip, output in zip(batch, outputs):
+        assert process.get_input_dtype().validate(clip)
+        np.testing.assert_allclose(
+            process.run(clip), output, rtol=1e-4, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        process.run(batch[..., :-1])
+
+    empty = process.run(batch[:0])
+    assert empty.shape == (0,) + process.output_shape()
+    assert empty.dtype == np.float32
+
+
+def test_batch_datatypes():
+    """Check datatypes describe batches when a batch size is given."""
+    process = Spectrogram(4000, n_fft=512, hop_length=128, batch_size=8)
+    outputs = process.run(clips())
+    assert process.get_input_dtype().validate(clips())
+    assert process.get_output_dtype().validate(outputs)
+    assert outputs.shape == (8, 257, 32)
+
+
+def test_blocks_do_not_change_outputs():
+    """Check outputs and fingerprints do not depend on the block size."""
+    batch = clips().reshape(2, 4, 4000)
+    whole = MelSpectrogram(4000, SAMPLE_RATE, n_fft=512, n_mels=40)
+    blocked = MelSpectrogram(
+        4000, SAMPLE_RATE, n_fft=512, n_mels=40, block_bytes=1)
+
+    outputs = blocked.run(batch)
+    assert outputs.shape == (2, 4) + whole.output_shape()
+    np.testing.assert_allclose(outputs, whole.run(batch), rtol=1e-5)
+    assert blocked.fingerprint() == whole.fingerprint()
+
+
+def test_spectrogram_values():
+    """Check the spectrogram equals a direct FFT of windowed frames."""
+    clip = clips()[3].astype(np.float64)
+    process = Spectrogram(
+        4000, n_fft=512, hop_length=128, center=False, power=1,
+        dtype='float64')
+
+    window = signal.get_window('hann', 512)
+    expected = np.stack([
+        np.abs(np.fft.rfft(clip[start:start + 512] * window))
+        for start in range(0, 4000 - 512 + 1, 128)], axis=1)
+    np.testing.assert_allclose(process.run(clip), expected, atol=1e-8)
+
+    # The strongest bin is the frequency of the sine
+    peak = process.run(clip).mean(axis=1).argmax()
+    assert peak * SAMPLE_RATE / 512 == pytest.approx(2000, abs=32)
+
+
+def test_cached_filters():
+    """Check windows and filterbanks are built once and read-only."""
+    filterbank = mel_filterbank(SAMPLE_RATE, 512, 40)
+    assert filterbank is mel_filterbank(SAMPLE_RATE, 512, 40)
+    assert filterbank.shape == (40, 257)
+    assert not filterbank.flags.writeable
+    assert (filterbank >= 0).all() and (filterbank.sum(axis=1) > 0).all()
+    assert get_window('hann', 512) is get_window('hann', 512)
+
+    with pytest.raises(ValueError):
+        MelSpectrogram(4000, SAMPLE_RATE, fmax=SAMPLE_RATE)
+
+
+def test_resample_matches_scipy():
+    """Check resampling equals scipy with a cached filter."""
+    batch = clips().astype(np.float64)
+    process = Resample(4000, SAMPLE_RATE, 8000, dtype='float64')
+    expected = signal.resample_poly(batch, 1, 2, axis=-1)
+    np.testing.assert_allclose(process.run(batch), expected)
+    assert process.output_shape() == (2000,)
+
+
+def test_pcen_normalizes_gain():
+    """Check PCEN outputs barely depend on the loudness of a recording."""
+    mel = processes()[2]
+    pcen = processes()[4]
+    spectrogram = mel.run(clips()[0])
+    quiet = pcen.run(spectrogram * 1e-2)
+    loud = pcen.run(spectrogram * 1e2)
+    assert np.isfinite(loud).all()
+
+    # A 10000 fold gain changes the mean output by less than half
+    assert loud.mean() / quiet.mean() < 1.5
+
+
+def test_stream_windows():
+    """Check batches of recording windows are transformed chunk by chunk."""
+    recording = np.random.RandomState(0).randn(SAMPLE_RATE * 2)
+    windows = WindowedDataset(
+        recording, window_length=4000, hop=2000, sample_rate=SAMPLE_RATE)
+    process = MelSpectrogram(
+        4000, SAMPLE_RATE, n_fft=512, hop_length=128, n_mels=40)
+
+    chunks = list(process.stream(windows.batches(5)))
+    offsets = np.concatenate([offset for offset, _ in chunks])
+    features = np.concatenate([feature for _, feature in chunks])
+    assert len(chunks) == 3
+    assert offsets[1] == pytest.approx(0.125)
+    np.testing.assert_allclose(
+        features, process.run(windows.windows), rtol=1e-5)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Test module for mlflow metric aggregation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from axon.processes.mlflow_aggregation import MetricAggregator
+from axon.processes.mlflow_aggregation import QuantileSketch
+from axon.processes.mlflow_aggregation import RawMetricWriter
+from axon.processes.mlflow_aggregation import RunningSummary
+
+
+def test_running_summary():
+    """Check streaming statistics match numpy."""
+    values = np.random.RandomState(0).randn(1000)
+    summary = RunningSummary()
+    for value in values:
+        summary.update(value)
+
+    assert summary.count == 1000
+    assert np.isclose(summary.mean, values.mean())
+    assert np.isclose(summary.std, values.std())
+    assert summary.min == values.min()
+    assert summary.max == values.max()
+
+
+def test_quantile_sketch():
+    """Check sketch quantiles are within the relative accuracy."""
+    values = np.random.RandomState(0).lognormal(size=10000)
+    values[:100] = 0
+    values[100:2000] *= -1
+
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.update_many(values[:5000])
+
+    other = QuantileSketch(relative_accuracy=0.01)
+    for value in values[5000:]:
+        other.update(value)
+    sketch.merge(other)
+
+    assert sketch.count == 10000
+    assert sum(sketch.histogram()['counts']) == 10000
+    for quantile in (0.01, 0.1, 0.5, 0.9, 0.99):
+        expected = np.quantile(values, quantile, method='lower')
+        assert sketch.quantile(quantile) == pytest.approx(expected, rel=0.02)
+
+    with pytest.raises(ValueError):
+        sketch.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_non_finite_values():
+    """Check NaN and infinite values are counted apart from the sketch."""
+    values = [1.0, np.nan, np.inf, -np.inf, 2.0]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.update(value)
+
+    other = QuantileSketch()
+    other.update_many(values)
+    sketch.merge(other)
+
+    assert sketch.count == 4
+    assert sketch.nan_count == 2
+    assert sketch.inf_count == 4
+    assert sum(sketch.histogram()['counts']) == 4
+    assert sketch.quantile(1) == pytest.approx(2, rel=0.01)
+
+    emitted = []
+    aggregator = MetricAggregator(
+        lambda metrics, step=None: emitted.append(metrics))
+    for step, value in enumerate(values):
+        aggregator.update('loss', value, step=step)
+    aggregator.close()
+
+    assert emitted[0]['loss/count'] == 2
+    assert emitted[0]['loss/mean'] == 1.5
+    assert emitted[0]['loss/max'] == 2
+    assert emitted[0]['loss/nan_count'] == 1
+    assert emitted[0]['loss/inf_count'] == 2
+    assert aggregator.histograms()['loss']['inf_count'] == 2
+
+
+def test_metrics_without_finite_values():
+    """Check only the counts of metrics without finite values are logged."""
+    summary = RunningSummary().to_dict()
+    assert summary['count'] == 0
+    assert all(np.isnan(summary[key]) for key in ('mean', 'min', 'max'))
+
+    emitted = []
+    aggregator = MetricAggregator(
+        lambda metrics, step=None: emitted.append(metrics))
+    aggregator.update('loss', np.nan, step=0)
+    aggregator.update('loss', np.inf, step=1)
+    aggregator.close()
+
+    assert emitted == [{
+        'loss/count': 0,
+        'loss/nan_count': 1,
+        'loss/inf_count': 1,
+    }]
+
+
+def test_aggregator_counts_steps():
+    """Check every_n_steps counts steps, not values of all metrics."""
+    emitted = []
+
+    def log_metrics(metrics, step=None):
+        emitted.append((step, metrics))
+
+    aggregator = MetricAggregator(log_metrics, every_n_steps=10)
+    for step in range(25):
+        aggregator.update_many({'loss': step, 'accuracy': 1}, step=step)
+    aggregator.close()
+
+    assert [step for step, _ in emitted] == [9, 19, 24]
+    assert emitted[0][1]['loss/count'] == 10
+    assert emitted[0][1]['accuracy/count'] == 10
+
+
+def test_aggregator_emits_every_n_steps():
+    """Check summaries are emitted periodically and reset."""
+    emitted = []
+
+    def log_metrics(metrics, step=None):
+        emitted.append((step, metrics))
+
+    aggregator = MetricAggregator(log_metrics, every_n_steps=100)
+    for step in range(250):
+        aggregator.update('loss', float(step), step=step)
+    aggregator.close()
+
+    assert [step for step, _ in emitted] == [99, 199, 249]
+    assert emitted[0][1]['loss/count'] == 100
+    assert emitted[0][1]['loss/mean'] == 49.5
+    assert emitted[2][1]['loss/min'] == 200
+    assert 'loss/p50' in emitted[2][1]
+    assert sum(aggregator.histograms()['loss']['counts']) == 250
+
+
+def test_raw_metric_writer(tmp_path):
+    """Check raw values are written in columnar form."""
+    writer = RawMetricWriter(str(tmp_path / 'raw'), chunk_size=7)
+    for step in range(20):
+        writer.write('loss', float(step), step, 0)
+    path = writer.close()
+
+    if path.endswith('.parquet'):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.DataFrame(dict(np.load(path)))
+
+    assert list(frame['step']) == list(range(20))
+    assert set(frame['key']) == {'loss'}
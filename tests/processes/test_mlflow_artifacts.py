@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Test module for deduplicated mlflow artifacts."""
+import mlflow
+from mlflow.tracking import MlflowClient
+import numpy as np
+import pandas as pd
+import pytest
+
+import axon.datatypes as dt
+from axon.processes.mlflow_artifacts import ArtifactStore
+from axon.processes.mlflow_artifacts import BLOB_DIRECTORY
+from axon.processes.mlflow_artifacts import content_hash
+from axon.processes.mlflow_artifacts import get_format
+from axon.processes.mlflow_artifacts import serialize
+
+
+def test_get_format():
+    """Check formats are selected by DataType."""
+    array = np.zeros((2, 2))
+    frame = pd.DataFrame({'a': [1, 2]})
+
+    assert get_format(array) == 'npy'
+    assert get_format(array, compress=True) == 'npz'
+    assert get_format(array, datatype=dt.NumpyArray(dt.Float(), (2, 2))) == (
+        'npy')
+    assert get_format(frame) == 'parquet'
+    assert get_format(frame, dataframe_format='feather') == 'feather'
+
+    with pytest.raises(ValueError):
+        get_format([1, 2])
+
+    with pytest.raises(ValueError):
+        get_format(frame, dataframe_format='csv')
+
+
+def test_content_hash_is_stable():
+    """Check compressed arrays hash by content."""
+    array = np.arange(100)
+    first = content_hash(array, 'npz', serialize(array, 'npz'))
+    second = content_hash(array.copy(), 'npz', serialize(array, 'npz'))
+    assert first == second
+    assert first != content_hash(array + 1, 'npz', serialize(array, 'npz'))
+
+
+def test_deduplicated_uploads(experiment):
+    """Check identical payloads are uploaded once and loaded back."""
+    _, experiment_id = experiment
+    client = MlflowClient()
+    store = ArtifactStore(experiment_id)
+
+    array = np.random.RandomState(0).randn(100, 10)
+    frame = pd.DataFrame({'score': [0.1, 0.2], 'label': ['a', 'b']})
+
+    run_ids = []
+    for _ in range(3):
+        with mlflow.start_run(experiment_id=experiment_id) as run:
+            store.log(run.info.run_id, 'features', array, compress=True)
+            store.log(run.info.run_id, 'scores', frame)
+            run_ids.append(run.info.run_id)
+    store.wait()
+
+    blobs = client.list_artifacts(store.blob_run.info.run_id, BLOB_DIRECTORY)
+    assert len(blobs) == 2
+
+    # A new store reuses the blobs of the experiment
+    other = ArtifactStore(experiment_id)
+    with mlflow.start_run(experiment_id=experiment_id) as run:
+        other.log(run.info.run_id, 'features', array.copy(), compress=True)
+    other.close()
+    blobs = client.list_artifacts(store.blob_run.info.run_id, BLOB_DIRECTORY)
+    assert len(blobs) == 2
+
+    for run_id in run_ids:
+        assert np.array_equal(store.load(run_id, 'features'), array)
+        pd.testing.assert_frame_equal(store.load(run_id, 'scores'), frame)
+
+    with pytest.raises(KeyError):
+        store.load(run_ids[0], 'missing')
+    store.close()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Test module for the batched mlflow logger."""
+import mlflow
+from mlflow.tracking import MlflowClient
+import pytest
+
+from axon.processes.mlflow_logging import BatchLogger
+from axon.processes.mlflow_logging import split_batches
+
+
+def test_split_batches():
+    """Check entities are chunked within log_batch limits."""
+    batches = list(split_batches(list(range(2500)), list(range(150)), []))
+    assert [len(batch[0]) for batch in batches] == [900, 950, 650]
+    assert [len(batch[1]) for batch in batches] == [100, 50, 0]
+
+    batches = list(split_batches([], list(range(150)), list(range(120))))
+    assert [(len(batch[1]), len(batch[2])) for batch in batches] == [
+        (100, 100), (50, 20)]
+
+    batch_logger = BatchLogger('run', max_batch_size=5000)
+    assert batch_logger.max_batch_size == 1000
+    batch_logger.close()
+
+
+def test_flush_on_close(experiment):
+    """Check all values are written when the logger is closed."""
+    _, experiment_id = experiment
+    client = MlflowClient()
+
+    with mlflow.start_run(experiment_id=experiment_id) as run:
+        run_id = run.info.run_id
+        batch_logger = BatchLogger(run_id, flush_interval=60)
+
+        for step in range(1500):
+            batch_logger.log_metric('loss', 1.0 / (step + 1), step=step)
+        batch_logger.log_params({'lr': 0.1, 'epochs': 3})
+        batch_logger.set_tag('stage', 'test')
+        batch_logger.close()
+
+    history = client.get_metric_history(run_id, 'loss')
+    assert len(history) == 1500
+    assert sorted(metric.step for metric in history) == list(range(1500))
+
+    data = client.get_run(run_id).data
+    assert data.params == {'lr': '0.1', 'epochs': '3'}
+    assert data.tags['stage'] == 'test'
+
+    with pytest.raises(ValueError):
+        batch_logger.log_metric('loss', 0.0)
+
+
+def test_flush_by_interval(experiment):
+    """Check values are written periodically without an explicit flush."""
+    _, experiment_id = experiment
+    client = MlflowClient()
+
+    with mlflow.start_run(experiment_id=experiment_id) as run:
+        batch_logger = BatchLogger(run.info.run_id, flush_interval=0.01)
+        batch_logger.log_metric('accuracy', 0.5)
+        batch_logger.flush()
+        assert client.get_run(run.info.run_id).data.metrics == {
+            'accuracy': 0.5}
+        batch_logger.close()
+
+
+def test_errors_are_raised(experiment):
+    """Check background write errors surface on flush."""
+    _, experiment_id = experiment
+
+    with mlflow.start_run(experiment_id=experiment_id) as run:
+        batch_logger = BatchLogger(run.info.run_id)
+        batch_logger.log_param('lr', 0.1)
+        batch_logger.flush()
+
+        # Params are immutable in mlflow
+        batch_logger.log_param('lr', 0.2)
+        with pytest.raises(Exception):
+            batch_logger.flush()
+        batch_logger.close()
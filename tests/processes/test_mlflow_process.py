@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""Test module for MLFlow processes."""
+from mlflow.tracking import MlflowClient
+import numpy as np
+import pandas as pd
+import pytest
+
+from axon.processes import MLFlowProcess
+from axon.processes.mlflow_process import get_experiment_id
+
+
+class Scorer(MLFlowProcess):
+    """Process that logs a metric per step."""
+
+    name = 'Scorer'
+
+    def run(self, steps):  # pylint: disable=arguments-differ
+        self.log_param('steps', steps)
+        self.set_tag('kind', 'scorer')
+        for step in range(steps):
+            self.log_metric('score', float(step), step=step)
+        return self.mlflow_run.info.run_id
+
+
+def test_mlflow_process_run(experiment):
+    """Check process calls are wrapped in an mlflow run."""
+    _, experiment_id = experiment
+    process = Scorer(experiment_id=experiment_id)
+    run_id = process(5)
+
+    client = MlflowClient()
+    assert len(client.get_metric_history(run_id, 'score')) == 5
+    assert client.get_run(run_id).data.params == {'steps': '5'}
+    assert process.mlflow_run is None
+
+
+def test_mlflow_process_async_logging(experiment):
+    """Check asynchronous logging writes everything before the run ends."""
+    _, experiment_id = experiment
+    process = Scorer(
+        experiment_id=experiment_id,
+        async_logging=True,
+        flush_interval=60)
+    run_id = process(200)
+
+    client = MlflowClient()
+    run = client.get_run(run_id)
+    assert run.info.status == 'FINISHED'
+    assert run.data.tags['kind'] == 'scorer'
+    assert len(client.get_metric_history(run_id, 'score')) == 200
+    assert process.batch_logger is None
+
+
+def test_logger_is_closed_on_aggregation_errors(experiment, monkeypatch):
+    """Check the batch logger is closed if aggregated logs fail."""
+    _, experiment_id = experiment
+    process = Scorer(
+        experiment_id=experiment_id,
+        async_logging=True,
+        aggregate=True,
+        flush_interval=60)
+
+    closed = []
+
+    def end_aggregation():
+        closed.append(process.batch_logger)
+        raise IOError('Unreachable')
+
+    monkeypatch.setattr(process, 'end_aggregation', end_aggregation)
+    with pytest.raises(IOError):
+        process(5)
+
+    assert closed[0].closed
+    assert process.batch_logger is None
+    assert process.mlflow_run is None
+
+
+class ClipScorer(MLFlowProcess):
+    """Process that logs one metric per call."""
+
+    name = 'Clip Scorer'
+
+    def run(self, score):  # pylint: disable=arguments-differ
+        self.log_metric('score', score)
+        return self.mlflow_run.info.run_id
+
+
+def test_batch_scope(experiment):
+    """Check calls within map share a single run with one step per call."""
+    name, _ = experiment
+    process = ClipScorer(experiment=name, run_scope='batch')
+    run_ids = process.map([1.0, 2.0, 3.0])
+    assert len(set(run_ids)) == 1
+
+    history = MlflowClient().get_metric_history(run_ids[0], 'score')
+    assert sorted((m.step, m.value) for m in history) == [
+        (0, 1.0), (1, 2.0), (2, 3.0)]
+
+    # Single calls still get their own run
+    assert process(1.0) != process(1.0)
+
+
+def test_session_scope_aggregate(experiment):
+    """Check session calls are aggregated into summary statistics."""
+    name, _ = experiment
+    process = ClipScorer(experiment=name, run_scope='session', aggregate=True)
+    run_ids = [process(float(score)) for score in range(10)]
+    assert len(set(run_ids)) == 1
+    assert process.mlflow_run is not None
+
+    process.end_session()
+    assert process.mlflow_run is None
+
+    run = MlflowClient().get_run(run_ids[0])
+    assert run.info.status == 'FINISHED'
+    assert 'score' not in run.data.metrics
+    assert run.data.metrics['score/count'] == 10
+    assert run.data.metrics['score/mean'] == 4.5
+    assert run.data.metrics['score/min'] == 0
+    assert run.data.metrics['score/max'] == 9
+
+
+def test_invalid_run_scope():
+    """Check unknown run scopes are rejected."""
+    with pytest.raises(ValueError):
+        ClipScorer(run_scope='epoch')
+
+
+def test_experiment_lookup_is_cached(experiment, monkeypatch):
+    """Check experiments are looked up only once."""
+    name, experiment_id = experiment
+    assert get_experiment_id(name) == experiment_id
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Experiment looked up twice')
+
+    monkeypatch.setattr(MlflowClient, 'get_experiment_by_name', fail)
+    assert get_experiment_id(name) == experiment_id
+
+
+class BatchScorer(MLFlowProcess):
+    """Process that logs a metric per batch within a single call."""
+
+    name = 'Batch Scorer'
+
+    def run(self, batches):  # pylint: disable=arguments-differ
+        for step in range(batches):
+            self.log_metric('loss', 1.0 / (step + 1), step=step)
+        return self.mlflow_run.info.run_id
+
+
+def test_aggregation_with_raw_metrics(experiment):
+    """Check metrics are downsampled and raw values logged as artifact."""
+    _, experiment_id = experiment
+    process = BatchScorer(
+        experiment_id=experiment_id,
+        aggregate=True,
+        aggregate_every=100,
+        log_raw_metrics=True)
+    run_id = process(1000)
+
+    client = MlflowClient()
+    assert not client.get_metric_history(run_id, 'loss')
+    history = client.get_metric_history(run_id, 'loss/mean')
+    assert len(history) == 10
+
+    artifacts = [
+        artifact.path
+        for artifact in client.list_artifacts(run_id, 'metrics')]
+    assert 'metrics/histograms.json' in artifacts
+    assert any('raw_metrics' in path for path in artifacts)
+
+
+class FeatureExtractor(MLFlowProcess):
+    """Process that logs its output as an artifact."""
+
+    name = 'Feature Extractor'
+
+    def run(self, size):  # pylint: disable=arguments-differ
+        features = np.ones((size, 4))
+        self.log_array('features', features)
+        self.log_dataframe('summary', pd.DataFrame({'size': [size]}))
+        return self.mlflow_run.info.run_id
+
+
+def test_log_array_and_dataframe(experiment):
+    """Check outputs are logged as deduplicated artifacts."""
+    _, experiment_id = experiment
+    process = FeatureExtractor(experiment_id=experiment_id)
+    run_ids = [process(3), process(3)]
+
+    store = process.artifact_stores[experiment_id]
+    assert store._executor is None  # pylint: disable=protected-access
+    tags = [MlflowClient().get_run(run_id).data.tags for run_id in run_ids]
+    assert tags[0]['axon.artifact.features'] == (
+        tags[1]['axon.artifact.features'])
+    assert np.array_equal(store.load(run_ids[0], 'features'), np.ones((3, 4)))
+
+    with pytest.raises(ValueError):
+        process.log_array('features', np.ones(3))
+
+
+def test_fingerprint_ignores_run_state(experiment):
+    """Check the mlflow run state does not change the fingerprint."""
+    _, experiment_id = experiment
+    process = FeatureExtractor(experiment_id=experiment_id)
+    before = process.fingerprint()
+
+    with process.scope():
+        process(3)
+        assert process.fingerprint() == before
+
+    # The artifact store of the experiment remains after the run
+    assert process.artifact_stores
+    assert process.fingerprint() == before
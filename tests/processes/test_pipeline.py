@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Test module for process pipelines."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import axon.datatypes as dt
+from axon.processes import Process
+from axon.processes import Pipeline
+from axon.processes import FusedProcess
+
+
+class CountingInt(dt.Int):
+    """Int DataType that counts validations."""
+
+    calls = 0
+
+    def validate(self, other):
+        """Count call and validate."""
+        CountingInt.calls += 1
+        return super().validate(other)
+
+
+class AddOne(Process):
+    """Fusable process that adds one."""
+
+    name = 'Add One'
+    fusable = True
+    input_dtype = CountingInt()
+    output_dtype = CountingInt()
+
+    def run(self, number):  # pylint: disable=arguments-differ
+        return number + 1
+
+
+class Double(Process):
+    """Fusable process that doubles."""
+
+    name = 'Double'
+    fusable = True
+    input_dtype = CountingInt()
+    output_dtype = CountingInt()
+
+    def run(self, number):  # pylint: disable=arguments-differ
+        return 2 * number
+
+
+class ToString(Process):
+    """Non fusable process that converts to string."""
+
+    name = 'To String'
+    input_dtype = CountingInt()
+    output_dtype = dt.String()
+
+    def run(self, number):  # pylint: disable=arguments-differ
+        return str(number)
+
+
+class ToInt(Process):
+    """Non fusable process that converts to int."""
+
+    name = 'To Int'
+    input_dtype = dt.String()
+    output_dtype = CountingInt()
+
+    def run(self, text):  # pylint: disable=arguments-differ
+        return int(text)
+
+
+def test_fuse_consecutive():
+    """Check consecutive fusable processes are grouped."""
+    pipeline = Pipeline([AddOne(), Double(), ToString()])
+    assert len(pipeline.units) == 2
+    assert isinstance(pipeline.units[0], FusedProcess)
+    assert isinstance(pipeline.units[1], ToString)
+    assert pipeline.units[0].get_input_dtype() is AddOne.input_dtype
+    assert pipeline.get_output_dtype() == dt.String()
+
+    pipeline = Pipeline([AddOne(), ToString()])
+    assert len(pipeline.units) == 2
+    assert isinstance(pipeline.units[0], AddOne)
+
+    pipeline = Pipeline([AddOne(), Double(), AddOne()], fuse=False)
+    assert len(pipeline.units) == 3
+
+
+def test_incompatible_processes():
+    """Check incompatible data types are rejected at construction."""
+    with pytest.raises(ValueError):
+        Pipeline([ToString(), AddOne()])
+
+    with pytest.raises(ValueError):
+        Pipeline([])
+
+    with pytest.raises(ValueError):
+        FusedProcess([AddOne(), ToString()])
+
+
+def test_fused_matches_unfused():
+    """Check fused and unfused pipelines compute the same results."""
+    processes = [AddOne(), Double(), AddOne(), Double(), ToString()]
+    fused = Pipeline(processes)
+    unfused = Pipeline(processes, fuse=False)
+
+    assert fused(3) == unfused(3) == '18'
+    assert fused.map(range(10)) == unfused.map(range(10))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = fused.map(range(10), executor=executor)
+        assert result == unfused.map(range(10))
+
+
+def test_map_submits_whole_chain():
+    """Check data runs through all units in a single executor map."""
+    class RecordingExecutor(ThreadPoolExecutor):
+        calls = []
+
+        def map(self, fn, *iterables, **kwargs):
+            RecordingExecutor.calls.append(kwargs)
+            return super().map(fn, *iterables, **kwargs)
+
+    pipeline = Pipeline([AddOne(), ToString(), ToInt(), Double()])
+    assert len(pipeline.units) == 4
+
+    with RecordingExecutor(max_workers=2) as executor:
+        results = pipeline.imap(range(10), executor=executor, chunksize=4)
+        assert list(results) == [2 * (number + 1) for number in range(10)]
+
+    assert RecordingExecutor.calls == [{'chunksize': 4}]
+
+
+def test_validation_at_boundaries():
+    """Check fused chains are validated only at their boundaries."""
+    processes = [AddOne(), Double(), AddOne(), Double(), AddOne()]
+
+    CountingInt.calls = 0
+    Pipeline(processes, validate=True)(1)
+    assert CountingInt.calls == 2
+
+    CountingInt.calls = 0
+    Pipeline(processes, fuse=False, validate=True)(1)
+    assert CountingInt.calls == 10
+
+    with pytest.raises(ValueError):
+        Pipeline(processes, validate=True)('1')
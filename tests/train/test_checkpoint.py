@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Test module for non-blocking trainer checkpoints."""
+import os
+import threading
+
+import mlflow
+from mlflow.tracking import MlflowClient
+import numpy as np
+import pytest
+
+from axon.train import CheckpointManager
+from axon.train import Trainer
+
+
+class Unpicklable:
+    """Value that can be copied but not written."""
+
+    def __deepcopy__(self, memo):
+        return Unpicklable()
+
+    def __reduce__(self):
+        raise TypeError('Cannot pickle')
+
+
+class GatedManager(CheckpointManager):
+    """Checkpoint manager whose writes wait for a gate to open."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = threading.Event()
+
+    def _write(self, *args):
+        self.gate.wait(5)
+        return super()._write(*args)
+
+
+def test_save_does_not_block(tmp_path):
+    """Check saves return before the checkpoint is written."""
+    manager = GatedManager(str(tmp_path))
+    weights = np.zeros(10)
+
+    future = manager.save(1, {'weights': weights})
+    assert not future.done()
+    assert not os.path.exists(manager.path(1))
+
+    # The snapshot is not affected by later updates
+    weights += 1
+    manager.gate.set()
+    manager.wait()
+
+    checkpoint = manager.latest()
+    assert checkpoint['step'] == 1
+    np.testing.assert_array_equal(checkpoint['state']['weights'], 0)
+    assert not [name for name in os.listdir(str(tmp_path))
+                if name.endswith('.tmp')]
+    manager.close()
+
+
+def test_load_waits_for_pending_writes(tmp_path):
+    """Check checkpoints can be loaded right after they are saved."""
+    manager = GatedManager(str(tmp_path))
+    manager.save(1, {'weights': np.ones(3)})
+    assert manager.steps == []
+
+    threading.Timer(0.1, manager.gate.set).start()
+    checkpoint = manager.load(1)
+    np.testing.assert_array_equal(checkpoint['state']['weights'], 1)
+    assert manager.steps == [1]
+    manager.close()
+
+
+def test_retention(tmp_path):
+    """Check the last N and the best K checkpoints are kept."""
+    manager = CheckpointManager(
+        str(tmp_path), keep_last=2, keep_best=1, monitor='loss')
+    losses = [0.9, 0.2, 0.5, 0.6, 0.7]
+    for step, loss in enumerate(losses):
+        manager.save(step, {'step': step}, {'loss': loss})
+    manager.wait()
+
+    assert manager.steps == [1, 3, 4]
+    files = sorted(
+        name for name in os.listdir(str(tmp_path)) if name.endswith('.pkl'))
+    assert files == [
+        os.path.basename(manager.path(step)) for step in (1, 3, 4)]
+    assert manager.best()['step'] == 1
+
+    # The index survives the manager
+    manager.close()
+    assert CheckpointManager(str(tmp_path)).steps == [1, 3, 4]
+
+    with pytest.raises(ValueError):
+        CheckpointManager(str(tmp_path), keep_best=1)
+
+
+def test_latest_skips_corrupted_checkpoints(tmp_path):
+    """Check resumes use the latest checkpoint that is still valid."""
+    manager = CheckpointManager(str(tmp_path), keep_last=None)
+    for step in range(3):
+        manager.save(step, {'step': step})
+    manager.close()
+
+    with open(manager.path(2), 'r+b') as fileobj:
+        fileobj.write(b'corrupted')
+    os.remove(manager.path(1))
+    with open(manager.path(3) + '.tmp', 'wb') as fileobj:
+        fileobj.write(b'interrupted write')
+
+    manager = CheckpointManager(str(tmp_path), keep_last=None)
+    assert manager.latest()['step'] == 0
+    assert not os.path.exists(manager.path(3) + '.tmp')
+    manager.close()
+
+
+def test_write_errors_are_raised(tmp_path):
+    """Check errors of background writes reach the training loop."""
+    manager = CheckpointManager(str(tmp_path))
+    manager.save(0, {'value': Unpicklable()})
+
+    with pytest.raises(TypeError):
+        manager.wait()
+
+    manager.save(1, {'step': 1})
+    manager.close()
+    assert manager.steps == [1]
+
+
+def test_mlflow_artifacts(tmp_path, experiment):
+    """Check written checkpoints are logged to the active run."""
+    _, experiment_id = experiment
+    manager = CheckpointManager(str(tmp_path), log_artifacts=True)
+
+    with mlflow.start_run(experiment_id=experiment_id) as run:
+        manager.save(7, {'step': 7})
+        manager.wait()
+
+    artifacts = MlflowClient().list_artifacts(run.info.run_id, 'checkpoints')
+    assert [artifact.path for artifact in artifacts] == [
+        'checkpoints/ckpt-000000007.pkl']
+    manager.close()
+
+
+class Counter(Trainer):
+    """Trainer that counts steps and can be interrupted."""
+
+    name = 'Counter'
+    interrupt_at = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.total = 0
+
+    def get_state(self):
+        return {'total': self.total}
+
+    def set_state(self, state):
+        self.total = state['total']
+
+    def run(self, steps):  # pylint: disable=arguments-differ
+        for step in range(self.start_step, steps):
+            if step == Counter.interrupt_at:
+                raise KeyboardInterrupt
+            self.total += step
+            self.checkpoint(step + 1)
+        return self.total
+
+
+def test_trainer_resumes(tmp_path):
+    """Check interrupted trainers resume from their latest checkpoint."""
+    Counter.interrupt_at = 6
+    with pytest.raises(KeyboardInterrupt):
+        Counter(checkpoints=CheckpointManager(str(tmp_path)))(10)
+
+    Counter.interrupt_at = None
+    trainer = Counter(checkpoints=CheckpointManager(str(tmp_path)))
+    assert trainer(10) == sum(range(10))
+    assert trainer.start_step == 6
+
+    with pytest.raises(ValueError):
+        Counter().checkpoint(0)
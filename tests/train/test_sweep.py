@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Test module for parallel hyperparameter sweeps."""
+from concurrent.futures import ProcessPoolExecutor
+
+from mlflow.tracking import MlflowClient
+import numpy as np
+import pytest
+from threadpoolctl import threadpool_info
+
+from axon.train import ASHAScheduler
+from axon.train import Sweep
+from axon.train import Trainer
+from axon.train.sweep import limit_threads
+
+
+class Quadratic(Trainer):
+    """Trainer whose loss decreases towards the distance to a target."""
+
+    name = 'Quadratic'
+
+    def __init__(self, rate, fail=False, **kwargs):
+        super().__init__(**kwargs)
+        self.rate = rate
+        self.fail = fail
+        self.steps = 0
+
+    def get_state(self):
+        return {'steps': self.steps}
+
+    def set_state(self, state):
+        self.steps = state['steps']
+
+    def run(self, steps):  # pylint: disable=arguments-differ
+        if self.fail:
+            raise RuntimeError('Diverged')
+
+        resumed = self.start_step
+        for step in range(self.start_step, steps):
+            self.steps += 1
+            self.checkpoint(step + 1)
+
+        loss = (self.rate - 0.3) ** 2 + 1 / self.steps
+        return {'loss': loss, 'resumed': resumed}
+
+
+def simulate(scheduler, values):
+    """Run the jobs of a scheduler one at a time."""
+    jobs = []
+    while True:
+        job = scheduler.next_job()
+        if job is None:
+            return jobs
+        jobs.append(job)
+        trial, rung = job
+        scheduler.report(trial, rung, values[trial])
+
+
+def thread_counts():
+    """Get the thread counts of the loaded numerical libraries."""
+    return {info['num_threads'] for info in threadpool_info()}
+
+
+def test_limit_threads():
+    """Check worker initializers limit libraries that are already loaded."""
+    assert np.ones(1) @ np.ones(1) == 1
+    with ProcessPoolExecutor(
+            max_workers=1,
+            initializer=limit_threads,
+            initargs=(3,)) as executor:
+        assert executor.submit(thread_counts).result() == {3}
+
+
+def test_successive_halving():
+    """Check only the best configurations of every rung are promoted."""
+    scheduler = ASHAScheduler(9, min_resource=1, max_resource=9, eta=3)
+    assert [scheduler.budget(rung) for rung in range(3)] == [1, 3, 9]
+
+    values = [0.5, 0.9, 0.1, 0.8, 0.7, 0.6, 0.95, 0.3, 0.4]
+    jobs = simulate(scheduler, values)
+
+    rungs = [[trial for trial, rung in jobs if rung == index]
+             for index in range(3)]
+    assert sorted(rungs[0]) == list(range(9))
+    # Promotions do not wait for a rung to fill, so a few more happen than
+    # in synchronous successive halving
+    assert rungs[1][:2] == [2, 0]
+    assert len(rungs[1]) == 4
+    assert rungs[2] == [2]
+    assert scheduler.best() == 2
+
+    # Total budget is far below training all configurations fully
+    used = sum(scheduler.budget(rung) for _, rung in jobs)
+    assert used < 9 * 9 / 2
+
+    with pytest.raises(ValueError):
+        ASHAScheduler(9, min_resource=1, max_resource=9, mode='median')
+
+
+def test_maximize():
+    """Check higher values are promoted in max mode."""
+    scheduler = ASHAScheduler(
+        3, min_resource=1, max_resource=3, eta=3, mode='max')
+    jobs = simulate(scheduler, [0.2, 0.9, 0.5])
+    assert jobs[-1] == (1, 1)
+
+
+def test_sweep(tmp_path, experiment):
+    """Check trials run in parallel as nested runs and resume when promoted."""
+    _, experiment_id = experiment
+    rates = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+    configs = [{'rate': rate} for rate in rates]
+    configs.append({'rate': 0.3, 'fail': True})
+
+    sweep = Sweep(
+        Quadratic,
+        configs,
+        metric='loss',
+        directory=str(tmp_path),
+        min_resource=1,
+        max_resource=9,
+        eta=3,
+        max_cpus=2,
+        experiment_id=experiment_id)
+    assert sweep.num_workers == 2
+    trials = sweep.run()
+
+    best = trials[0]
+    assert best.config == {'rate': 0.3}
+    assert best.status == 'completed'
+    assert best.budget == 9
+    assert best.metrics['resumed'] == 3
+
+    statuses = {trial.index: trial.status for trial in trials}
+    assert statuses[9] == 'failed'
+    assert list(statuses.values()).count('stopped') >= 5
+
+    client = MlflowClient()
+    runs = client.search_runs([experiment_id])
+    children = [
+        run for run in runs
+        if run.data.tags.get('mlflow.parentRunId') == sweep.run_id]
+    assert len(runs) == len(configs) + 1
+    assert len(children) == len(configs)
+
+    best_run = client.get_run(best.run_id)
+    assert best_run.info.status == 'FINISHED'
+    assert best_run.data.params['rate'] == '0.3'
+    history = client.get_metric_history(best.run_id, 'loss')
+    assert [metric.step for metric in history] == [1, 3, 9]
+    assert client.get_run(trials[-1].run_id).info.status in (
+        'KILLED', 'FAILED')
+
+    parent = client.get_run(sweep.run_id)
+    assert parent.data.tags['best_run_id'] == best.run_id
+    assert parent.data.metrics['best/loss'] == pytest.approx(
+        best.metrics['loss'])
+
+
+def test_sweep_without_mlflow(tmp_path):
+    """Check sweeps can run without logging runs."""
+    sweep = Sweep(
+        Quadratic,
+        [{'rate': 0.1}, {'rate': 0.3}],
+        metric='loss',
+        directory=str(tmp_path),
+        min_resource=1,
+        max_resource=2,
+        eta=2,
+        max_cpus=1,
+        log_runs=False)
+    trials = sweep.run()
+    assert trials[0].config == {'rate': 0.3}
+    assert trials[0].budget == 2
+    assert trials[0].run_id is None